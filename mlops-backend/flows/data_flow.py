@@ -8,15 +8,24 @@ from typing import Dict, Any
 from flows.utils import create_logs_file
 from prefect import flow, task, get_run_logger, context
 from datetime import datetime
-from subprocess import run, CalledProcessError
 
 from tasks.timeseries.data.dataset import (
     load_time_series_data,
     prepare_time_series_data,
+    prepare_multivariate_time_series_data,
     split_time_series_data,
     validate_timeseries_data,
-    generate_metadata_timeseries
+    generate_metadata_timeseries,
+    profile_time_series_chunks,
+    time_series_file_format
 )
+from tasks.timeseries.data.windows import save_windowed_series, SPLIT_NAMES
+from tasks.timeseries.data.ingest import DEFAULT_CHUNK_ROWS, read_columns
+from tasks.timeseries.data.frame_cache import file_sha256
+from tasks.timeseries.data.sketches import SKETCH_FILE, load_sketch, save_sketch, profile_chunks
+from tasks.timeseries.data.incremental import build_lineage, find_appended_rows, extend_windowed_series, is_same_source
+from tasks.timeseries.data.blob_store import put_blob, link_blob
+from tasks.timeseries.data.dvc_batch import DvcBatch, active_batch
 
 from packaging.version import Version
 
@@ -24,13 +33,6 @@ DVC_DATA_STORAGE = os.getenv("DVC_DATA_STORAGE", "/home/ariya/central_storage/da
 
 # Utility functions
 
-def check_dvc_repo(ds_root: str):
-    try:
-        run(["dvc", "status"], cwd=ds_root, check=True)
-    except CalledProcessError:
-        run(["dvc", "init", "--no-scm"], cwd=ds_root, check=True)
-        get_run_logger().info("DVC repository initialized without SCM.")
-
 def convert_to_serializable(obj):
     if isinstance(obj, np.integer):
         return int(obj)
@@ -53,18 +55,16 @@ def convert_to_serializable(obj):
     return obj
 
 def save_data_to_dvc(file_path: str, ds_root: str):
-    logger = get_run_logger()
-    check_dvc_repo(ds_root)
-    try:
-        run(["dvc", "add", file_path], cwd=ds_root)
-        run(["git", "add", file_path + ".dvc"], cwd=ds_root)
-        run(["git", "commit", "-m", f"Add {file_path} to DVC"], cwd=ds_root)
-    except CalledProcessError as e:
-        logger.error(f"Error occurred while adding file to DVC: {e}")
+    # Inside a data_flow run the file joins the run's single DVC/git transaction
+    batch = active_batch(ds_root)
+    if batch is not None:
+        batch.add(file_path)
+        return
+    with DvcBatch(ds_root, f"Add {file_path} to DVC") as batch:
+        batch.add(file_path)
 
 def save_metadata_to_dvc(metadata, ds_root, ds_name, version=None):
     logger = get_run_logger()
-    check_dvc_repo(ds_root)
     metadata_serializable = convert_to_serializable(metadata)
 
     if version:
@@ -114,30 +114,102 @@ def save_metadata_to_dvc(metadata, ds_root, ds_name, version=None):
     save_data_to_dvc(global_metadata_file, ds_root)
     logger.info(f"✅ Metadata saved for dataset '{ds_name}' at version {version}.")
 
-def get_latest_version(ds_root: str) -> str:
+def load_or_build_streaming_profile(file_path: str, ds_cfg: Dict[str, Any]):
+    """
+    Streaming statistics of a version file, kept next to it as a pickled sketch.
+    The sketch is rebuilt only when the file content changed since it was written.
+    """
+    logger = get_run_logger()
+    sketch_path = os.path.join(os.path.dirname(file_path), SKETCH_FILE)
+    file_hash = file_sha256(file_path)
+
+    profile = load_sketch(sketch_path) if os.path.exists(sketch_path) else None
+    if profile is not None and profile.source.get("sha256") == file_hash:
+        logger.info(f"♻️ Reusing statistics sketch: {sketch_path}")
+        return profile, sketch_path
+
+    profile = profile_time_series_chunks(
+        file_path,
+        date_col=ds_cfg['date_col'],
+        chunk_rows=ds_cfg.get('chunk_rows', DEFAULT_CHUNK_ROWS)
+    )
+    return _save_profile(profile, file_path, file_hash, sketch_path)
+
+def extend_streaming_profile(file_path: str, appended):
+    """
+    For an append-only upload, the previous version's sketch extended with the new rows only.
+    Returns ``(None, None)`` when the previous version has no usable sketch.
+    """
+    logger = get_run_logger()
+    sketch_path = os.path.join(os.path.dirname(file_path), SKETCH_FILE)
+    file_hash = file_sha256(file_path)
+    profile = load_sketch(sketch_path) if os.path.exists(sketch_path) else None
+    if profile is not None and profile.source.get("sha256") == file_hash:
+        return profile, sketch_path
+
+    base_path = os.path.join(appended.prev_folder, SKETCH_FILE)
+    base = load_sketch(base_path) if os.path.exists(base_path) else None
+    if base is None or base.source.get("sha256") != appended.lineage["sha256"]:
+        return None, None
+
+    logger.info(f"➕ Merging {len(appended)} appended rows into sketch of {appended.prev_folder}")
+    profile = profile_chunks([appended.rows], base=base).extend_duplicates(appended.rows)
+    return _save_profile(profile, file_path, file_hash, sketch_path)
+
+def version_profile(file_path: str, ds_cfg: Dict[str, Any], appended=None):
+    """
+    Sketch-based statistics of this version: the previous sketch extended with appended rows, or
+    a streamed profile with ``streaming_stats``. ``(None, None)`` means exact statistics from the
+    parsed frame (also for an append whose previous version has no sketch).
+    """
+    if appended is not None:
+        profile, sketch_path = extend_streaming_profile(file_path, appended)
+        if profile is not None:
+            return profile, sketch_path
+    if ds_cfg.get('streaming_stats', False):
+        return load_or_build_streaming_profile(file_path, ds_cfg)
+    return None, None
+
+def save_frame_profile(file_path: str, data_raw: pd.DataFrame, date_col: str):
+    """Sketch of a version profiled in memory, so the next append extends it instead of re-scanning the file."""
+    profile = profile_chunks([data_raw], sort_col=date_col).track_duplicates(data_raw)
+    return _save_profile(profile, file_path, file_sha256(file_path), os.path.join(os.path.dirname(file_path), SKETCH_FILE))
+
+def _save_profile(profile, file_path: str, file_hash: str, sketch_path: str):
+    logger = get_run_logger()
+    profile.source = {"file": os.path.basename(file_path), "sha256": file_hash, "rows": profile.n_rows}
+    save_sketch(profile, sketch_path)
+    logger.info(f"💾 Statistics sketch saved: {sketch_path}")
+    return profile, sketch_path
+
+def get_current_version(ds_root: str):
     version_dir = os.path.join(ds_root, "versions")
     if not os.path.exists(version_dir):
-        return "1.0.0"
+        return None
     versions = [v for v in os.listdir(version_dir) if v.replace(".", "").isdigit()]
     if not versions:
-        return "1.0.0"
+        return None
     versions.sort(key=lambda v: list(map(int, v.split("."))))
-    major, minor, patch = map(int, versions[-1].split("."))
+    return versions[-1]
+
+def get_latest_version(ds_root: str) -> str:
+    current_version = get_current_version(ds_root)
+    if current_version is None:
+        return "1.0.0"
+    major, minor, patch = map(int, current_version.split("."))
     return f"{major}.{minor}.{patch + 1}"
 
 def get_dataset_index(ds_name: str, dvc_root: str) -> int:
     datasets = sorted([
         d for d in os.listdir(dvc_root) 
-        if os.path.isdir(os.path.join(dvc_root, d)) and d != ".ipynb_checkpoints"
+        if os.path.isdir(os.path.join(dvc_root, d)) and not d.startswith(".")  # .ipynb_checkpoints, .blobs
     ])
     if ds_name in datasets:
         return datasets.index(ds_name) + 1
     return len(datasets) + 1
 
-@task(name="data_collect", log_prints=True)
-def task_data_collect(cfg, dvc_ds_root, new_version):
+def resolve_source_file(ds_cfg: Dict[str, Any], dvc_ds_root: str) -> str:
     logger = get_run_logger()
-    ds_cfg = cfg['dataset']
     file_path = ds_cfg.get('file_path')
 
     if not file_path:
@@ -150,6 +222,25 @@ def task_data_collect(cfg, dvc_ds_root, new_version):
                 break
         if not file_path:
             raise FileNotFoundError(f"❌ No CSV/XLSX/TXT file found in {dvc_ds_root}. Cannot proceed.")
+    return file_path
+
+def window_layout(cfg: Dict[str, Any]):
+    """
+    ``(sequences, feature_cols, horizon)`` of the windows built for this config.
+    ``feature_cols`` is None for univariate windows over the target column alone.
+    """
+    ds_cfg = cfg['dataset']
+    model_cfg = cfg['model'][cfg['data_type']]
+    feature_cols = list(ds_cfg.get('feature_cols') or []) or None
+    if feature_cols == [ds_cfg['target_col']]:
+        feature_cols = None
+    return model_cfg["sequences"], feature_cols, int(model_cfg.get("output_num", 1))
+
+@task(name="data_collect", log_prints=True)
+def task_data_collect(cfg, dvc_ds_root, new_version, load_data: bool = True):
+    logger = get_run_logger()
+    ds_cfg = cfg['dataset']
+    file_path = resolve_source_file(ds_cfg, dvc_ds_root)
 
     version_folder = os.path.join(dvc_ds_root, "versions", new_version)
     os.makedirs(version_folder, exist_ok=True)
@@ -157,37 +248,66 @@ def task_data_collect(cfg, dvc_ds_root, new_version):
 
     if os.path.exists(new_file_path):
         logger.info(f"✅ File already exists in version folder: {new_file_path}")
-        return new_file_path
+    else:
+        # Identical uploads share one blob; the version folder only holds a link to it
+        digest, blob = put_blob(file_path, DVC_DATA_STORAGE)
+        method = link_blob(blob, new_file_path, digest)
+        logger.info(f"📁 Linked blob {digest[:12]} into version folder ({method}): {new_file_path}")
 
-    shutil.copy2(file_path, new_file_path)
-    logger.info(f"📁 Copied file to version folder: {new_file_path}")
-    
+    if not load_data:
+        # Incremental mode parses only what it needs once the previous version is compared
+        return new_file_path, None
+
+    # Only the date/target columns are needed for training; the Parquet copy lands in the version folder
     ds_file_format, data_raw, data_train = load_time_series_data(
-        file_path=file_path,
+        file_path=new_file_path,
         date_col=ds_cfg['date_col'],
-        target_col=ds_cfg['target_col']
+        target_col=ds_cfg['target_col'],
+        projected=True,
+        feature_cols=window_layout(cfg)[1]
     )
     return new_file_path, data_train
 
+@task(name="detect_append", log_prints=True)
+def task_detect_append(file_path, cfg, dvc_ds_root, prev_version):
+    ds_cfg = cfg['dataset']
+    if prev_version is None:
+        return None
+    sequences, feature_cols, horizon = window_layout(cfg)
+    if feature_cols is not None:
+        get_run_logger().info("ℹ️ Multivariate windows are always rebuilt from scratch.")
+        return None
+    return find_appended_rows(
+        file_path,
+        prev_folder=os.path.join(dvc_ds_root, "versions", prev_version),
+        date_col=ds_cfg['date_col'],
+        target_col=ds_cfg['target_col'],
+        sequences=sequences,
+        horizon=horizon
+    )
+
 # Task: Validate image dataset (output HTML report)
 @task(name="validate_data", log_prints=True)
-def task_data_validation(data_type: str, file_path: str, ds_name: str, dvc_ds_root: str):
+def task_data_validation(data_type: str, file_path: str, ds_name: str, dvc_ds_root: str, ds_cfg: Dict[str, Any], appended=None):
     logger = get_run_logger()
 
 
     if data_type == "timeseries":
-        # Read file
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(file_path)
-        elif file_path.endswith(".txt"):
-            df = pd.read_csv(file_path, delimiter="\t")
-        else:
-            raise ValueError(f"Unsupported file format for validation: {file_path}")
+        # Out-of-core: nulls and outliers come from the per-version sketch
+        df = None
+        profile, _ = version_profile(file_path, ds_cfg, appended)
+        if profile is None:
+            # Served from the frame cache, so the upload is not parsed again
+            _, df, _ = load_time_series_data(
+                file_path=file_path,
+                date_col=ds_cfg['date_col'],
+                target_col=ds_cfg['target_col']
+            )
+            if df is None:
+                raise ValueError(f"Unsupported file format for validation: {file_path}")
 
         # Validate and save report
-        report = validate_timeseries_data(df)
+        report = validate_timeseries_data(df, profile)
         json_report_path = os.path.join(dvc_ds_root, f"{data_type}_{ds_name}_validation.json")
         with open(json_report_path, "w", encoding="utf-8") as f:
             json.dump(convert_to_serializable(report), f, ensure_ascii=False, indent=4)
@@ -200,8 +320,20 @@ def task_data_validation(data_type: str, file_path: str, ds_name: str, dvc_ds_ro
         logger.warning(f"⚠️ Validation for data_type '{data_type}' is not supported.")
         return None
 
+def appended_time_range(appended, profile, date_col: str):
+    """(start, end, sample rate) of an appended version from the lineage and the new rows, without reading the file."""
+    lineage = appended.lineage
+    start = lineage.get("first_timestamp")
+    if start is None and date_col in profile.preview.columns:
+        # Older lineages: the sketch preview holds the first rows in date order
+        start = profile.preview[date_col].min()
+    end = appended.rows[date_col].max() if len(appended) else lineage.get("last_timestamp")
+    if start is None or end is None or pd.isna(start) or pd.isna(end):
+        return None
+    return pd.Timestamp(start), pd.Timestamp(end), lineage.get("sample_rate")
+
 @task(name="feature_engineering", log_prints=True)
-def task_feature_engineering(file_path, cfg, dvc_ds_root, new_version):
+def task_feature_engineering(file_path, cfg, dvc_ds_root, new_version, appended=None):
     
     data_type = cfg['data_type']
     ds_cfg = cfg['dataset']
@@ -211,17 +343,40 @@ def task_feature_engineering(file_path, cfg, dvc_ds_root, new_version):
     logger = get_run_logger()
     logger.info(f"🔍 Loading and preprocessing file: {file_path}")
 
-    ds_file_format, data_raw, data_train = load_time_series_data(
-        file_path=file_path,
-        date_col=ds_cfg['date_col'],
-        target_col=ds_cfg['target_col']
-    )
+    # Append-only uploads extend the previous version's sketch; streaming_stats merges chunk by chunk
+    profile, sketch_path = version_profile(file_path, ds_cfg, appended)
 
-    metadata = generate_metadata_timeseries(data_raw, ds_name, ds_name, ds_author, data_type, ds_cfg, file_path)
-    timestamps = pd.to_datetime(data_raw[ds_cfg['date_col']].dropna())
-    if not timestamps.empty:
-        metadata["timeRange"] = f"{timestamps.min().strftime('%Y-%m-%d %H:%M:%S')} ~ {timestamps.max().strftime('%Y-%m-%d %H:%M:%S')}"
-        metadata["sampleRate"] = str(timestamps.sort_values().diff().dropna().median())
+    time_range = None
+    if profile is not None:
+        ds_file_format = time_series_file_format(file_path)
+        save_data_to_dvc(sketch_path, dvc_ds_root)
+        metadata = generate_metadata_timeseries(None, ds_name, ds_name, ds_author, data_type, ds_cfg, file_path, profile=profile)
+        if appended is not None:
+            time_range = appended_time_range(appended, profile, ds_cfg['date_col'])
+        else:
+            dates = read_columns(file_path, columns=[ds_cfg['date_col']]).get(ds_cfg['date_col'], pd.Series(dtype=object))
+    else:
+        # Exact statistics (also when an append's previous version has no sketch to extend)
+        ds_file_format, data_raw, data_train = load_time_series_data(
+            file_path=file_path,
+            date_col=ds_cfg['date_col'],
+            target_col=ds_cfg['target_col']
+        )
+        metadata = generate_metadata_timeseries(data_raw, ds_name, ds_name, ds_author, data_type, ds_cfg, file_path)
+        dates = data_raw[ds_cfg['date_col']]
+        if ds_cfg.get('incremental', False):
+            # Only append-only datasets need a sketch for the next version to extend
+            _, sketch_path = save_frame_profile(file_path, data_raw, ds_cfg['date_col'])
+            save_data_to_dvc(sketch_path, dvc_ds_root)
+
+    if time_range is None:
+        timestamps = pd.to_datetime(dates.dropna())
+        time_range = (timestamps.min(), timestamps.max(), str(timestamps.sort_values().diff().dropna().median())) \
+            if not timestamps.empty else None
+    if time_range is not None:
+        start, end, sample_rate = time_range
+        metadata["timeRange"] = f"{start.strftime('%Y-%m-%d %H:%M:%S')} ~ {end.strftime('%Y-%m-%d %H:%M:%S')}"
+        metadata["sampleRate"] = sample_rate or "Unknown"
     else:
         metadata["timeRange"] = "Unknown"
         metadata["sampleRate"] = "Unknown"
@@ -239,25 +394,12 @@ def task_feature_engineering(file_path, cfg, dvc_ds_root, new_version):
 
     return metadata
 
-@task(name="split_data", log_prints=True)
-def task_data_split(data_train, cfg, dvc_ds_root, new_version, metadata=None):
-    
+def save_split_metadata(metadata, cfg, dvc_ds_root, new_version, train_windows, val_windows, test_windows, n_rows):
     data_type = cfg['data_type']
     ds_cfg = cfg['dataset']
     ds_name = ds_cfg['ds_name']
     ds_author = ds_cfg['ds_author']
-    model_cfg=cfg['model']
-    
-    logger = get_run_logger()
-    logger.info(f"✂️ Splitting time series data with time sequences = {ds_cfg['sequences']}")
-    
-    X, y, scaler = prepare_time_series_data(
-        data=data_train, 
-        sequences=model_cfg[data_type]["sequences"], 
-        target_col=ds_cfg['target_col']
-    )
-    X_train, X_val, X_test, y_train, y_val, y_test = split_time_series_data(X, y)
-    
+
     if metadata is None:
         version_info = {
                         "version": new_version,
@@ -304,17 +446,75 @@ def task_data_split(data_train, cfg, dvc_ds_root, new_version, metadata=None):
 
     if metadata is not None:
         metadata["split_ratio"] = {
-            "train_set": len(y_train),
-            "val_set": len(y_val),
-            "test_set": len(y_test),
-            "outside_set": len(data_train) - len(y_train) - len(y_val) - len(y_test)
+            "train_set": len(train_windows),
+            "val_set": len(val_windows),
+            "test_set": len(test_windows),
+            "outside_set": n_rows - len(train_windows) - len(val_windows) - len(test_windows)
         }
         save_metadata_to_dvc(metadata, dvc_ds_root, ds_name, new_version)
 
+@task(name="split_data", log_prints=True)
+def task_data_split(data_train, cfg, dvc_ds_root, new_version, metadata=None, file_path=None):
+    
+    data_type = cfg['data_type']
+    ds_cfg = cfg['dataset']
+    model_cfg=cfg['model']
+    
+    logger = get_run_logger()
+    logger.info(f"✂️ Splitting time series data with time sequences = {ds_cfg['sequences']}")
+
+    # Lineage is taken from the raw rows, before missing values and zeros are filled
+    lineage = build_lineage(file_path, data_train, ds_cfg['date_col'], ds_cfg['target_col']) if file_path else None
+
+    sequences, feature_cols, horizon = window_layout(cfg)
+    feature_scaler = None
+    if feature_cols is not None:
+        windows, scaler, feature_scaler = prepare_multivariate_time_series_data(
+            data=data_train,
+            sequences=sequences,
+            target_col=ds_cfg['target_col'],
+            feature_cols=feature_cols,
+            horizon=horizon
+        )
+    else:
+        windows, scaler = prepare_time_series_data(
+            data=data_train, 
+            sequences=sequences, 
+            target_col=ds_cfg['target_col'],
+            horizon=horizon
+        )
+    train_windows, val_windows, test_windows = split_time_series_data(windows)
+
+    save_split_metadata(metadata, cfg, dvc_ds_root, new_version, train_windows, val_windows, test_windows, len(data_train))
+
     return {
-        "X_train": X_train, "X_val": X_val, "X_test": X_test,
-        "y_train": y_train, "y_val": y_val, "y_test": y_test,
-        "scaler": scaler
+        "windows": windows,
+        "train": train_windows, "val": val_windows, "test": test_windows,
+        "scaler": scaler,
+        "feature_scaler": feature_scaler,
+        "feature_cols": feature_cols,
+        "lineage": lineage
+    }
+
+@task(name="extend_data", log_prints=True)
+def task_data_extend(appended, file_path, cfg, dvc_ds_root, new_version, metadata=None):
+    ds_cfg = cfg['dataset']
+
+    logger = get_run_logger()
+    logger.info(f"➕ Extending version {os.path.basename(appended.prev_folder)} with {len(appended)} appended rows")
+
+    windows, scaler, lineage = extend_windowed_series(appended, file_path, ds_cfg['date_col'], ds_cfg['target_col'])
+    train_windows, val_windows, test_windows = split_time_series_data(windows)
+
+    save_split_metadata(metadata, cfg, dvc_ds_root, new_version, train_windows, val_windows, test_windows, lineage["rows"])
+
+    return {
+        "windows": windows,
+        "train": train_windows, "val": val_windows, "test": test_windows,
+        "scaler": scaler,
+        "feature_scaler": None,
+        "feature_cols": None,
+        "lineage": lineage
     }
 
 @flow(name="data_flow", log_prints=True)
@@ -337,41 +537,66 @@ def data_flow(cfg: Dict[str, Any]):
     task_flags = cfg.get("enabled_tasks", {}).get("data_flow", {})
     enabled_tasks = [task for task, is_enabled in task_flags.items() if is_enabled]
 
-    file_path = None
-    if "collect" in enabled_tasks:
-        file_path, data_train = task_data_collect(cfg, dvc_ds_root, new_version)
-
-    if "validate" in enabled_tasks:
-        if data_type == "timeseries" and file_path:
-            task_data_validation(data_type, file_path, ds_name, dvc_ds_root)
-
-    metadata = None
-    if "feature_engineer" in enabled_tasks:
-        metadata = task_feature_engineering(
-            file_path, cfg, dvc_ds_root, new_version
-        )
-
-    if "split" in enabled_tasks:
-        split_data = task_data_split(data_train, cfg, dvc_ds_root, new_version, metadata)
-        version_folder = os.path.join(dvc_ds_root, "versions", new_version)
-        os.makedirs(version_folder, exist_ok=True)
-
-        for file_name, data in [
-            ("X_train.npy", split_data["X_train"]),
-            ("X_val.npy", split_data["X_val"]),
-            ("X_test.npy", split_data["X_test"]),
-            ("y_train.npy", split_data["y_train"]),
-            ("y_val.npy", split_data["y_val"]),
-            ("y_test.npy", split_data["y_test"])
-        ]:
-            processed_file_path = os.path.join(version_folder, file_name)
-            np.save(processed_file_path, data)
-            save_data_to_dvc(processed_file_path, dvc_ds_root)
-
-        scaler_file = os.path.join(version_folder, "scaler.pkl")
-        with open(scaler_file, "wb") as f:
-            pickle.dump(split_data["scaler"], f)
-        save_data_to_dvc(scaler_file, dvc_ds_root)
+    # An upload identical to the latest version's file needs no copy, parse or split at all
+    prev_version = get_current_version(dvc_ds_root)
+    if data_type == "timeseries" and "collect" in enabled_tasks and prev_version is not None:
+        source_path = resolve_source_file(ds_cfg, dvc_ds_root)
+        if is_same_source(os.path.join(dvc_ds_root, "versions", prev_version), file_sha256(source_path),
+                          *window_layout(cfg), dtype=ds_cfg.get('storage_dtype'),
+                          date_col=ds_cfg['date_col'], target_col=ds_cfg['target_col']):
+            logger.info(f"♻️ {source_path} is unchanged since version {prev_version}; nothing to do.")
+            return data_type, ds_name
+
+    # Every artifact of this version is versioned in one DVC add and one git commit at the end
+    with DvcBatch(dvc_ds_root, f"Add {ds_name} dataset version {new_version}"):
+        # Incremental mode: an upload that only appends rows to the previous version extends it
+        incremental = data_type == "timeseries" and ds_cfg.get('incremental', False)
+
+        file_path = None
+        appended = None
+        if "collect" in enabled_tasks:
+            file_path, data_train = task_data_collect(cfg, dvc_ds_root, new_version, load_data=not incremental)
+            if incremental:
+                appended = task_detect_append(file_path, cfg, dvc_ds_root, prev_version)
+                if appended is None:
+                    _, _, data_train = load_time_series_data(
+                        file_path=file_path,
+                        date_col=ds_cfg['date_col'],
+                        target_col=ds_cfg['target_col'],
+                        projected=True,
+                        feature_cols=window_layout(cfg)[1]
+                    )
+
+        if "validate" in enabled_tasks:
+            if data_type == "timeseries" and file_path:
+                task_data_validation(data_type, file_path, ds_name, dvc_ds_root, ds_cfg, appended)
+
+        metadata = None
+        if "feature_engineer" in enabled_tasks:
+            metadata = task_feature_engineering(
+                file_path, cfg, dvc_ds_root, new_version, appended
+            )
+
+        if "split" in enabled_tasks:
+            if appended is not None:
+                split_data = task_data_extend(appended, file_path, cfg, dvc_ds_root, new_version, metadata)
+            else:
+                split_data = task_data_split(data_train, cfg, dvc_ds_root, new_version, metadata, file_path)
+            version_folder = os.path.join(dvc_ds_root, "versions", new_version)
+            os.makedirs(version_folder, exist_ok=True)
+
+            # One memory-mappable store per version: scaled series, split boundaries and scalers
+            split_store_path = save_windowed_series(
+                version_folder,
+                split_data["windows"],
+                {name: split_data[name] for name in SPLIT_NAMES},
+                scaler=split_data["scaler"],
+                lineage=split_data["lineage"],
+                feature_scaler=split_data["feature_scaler"],
+                feature_cols=split_data["feature_cols"],
+                dtype=ds_cfg.get('storage_dtype')
+            )
+            save_data_to_dvc(split_store_path, dvc_ds_root)
 
     logger.info("✅ Flow completed based on selected tasks.")
     return data_type, ds_name
@@ -7,6 +7,9 @@ import numpy as np
 from tasks.timeseries.eval.eval_model import evaluate_timeseries_model
 from tasks.timeseries.utils.model_io import load_timeseries_model
 from tasks.timeseries.utils.model_loader import build_model_by_type
+from tasks.timeseries.data.windows import load_split_arrays, load_scaler
+from tasks.timeseries.utils.system import resolve_cpu_profile, apply_cpu_profile
+from tasks.timeseries.utils.mlflow_sink import MlflowSink
 
 from flows.utils import log_mlflow_info, build_and_log_mlflow_url, create_logs_file
 from prefect import flow, get_run_logger, context
@@ -90,16 +93,16 @@ def eval_flow(cfg: Dict[str, Any], data_type: str, dataset_name: str, model_name
 
     if data_type == "timeseries":
         # Load test data
-        X_test = np.load(os.path.join(latest_ds_version_path, "X_test.npy"))
-        y_test = np.load(os.path.join(latest_ds_version_path, "y_test.npy"))
-        scaler_path = os.path.join(latest_ds_version_path, "scaler.pkl")
-        with open(scaler_path, "rb") as f:
-            scaler = pickle.load(f)
+        X_test, y_test = load_split_arrays(latest_ds_version_path, splits=("test",))["test"]
+        scaler = load_scaler(latest_ds_version_path)
 
         hparams = model_cfg.get("hparams", {}).copy()
         for k in ["batch_size", "epochs"]:
             hparams.pop(k, None)
 
+        # Same CPU acceleration profile as training
+        cpu_profile = apply_cpu_profile(resolve_cpu_profile(cfg.get('train', {}).get(data_type, {}).get('hparams', {}).get("cpu_profile")), logger)
+
         if framework == "pytorch":
             # ✅ PyTorch input shape: feature dimension only
             if model_cfg.get("input_size"):
@@ -120,7 +123,7 @@ def eval_flow(cfg: Dict[str, Any], data_type: str, dataset_name: str, model_name
                 input_size_cfg = model_cfg["input_size"]
                 if isinstance(input_size_cfg, dict):
                     sequences = input_size_cfg.get("sequences", X_test.shape[1])
-                    num_features = input_size_cfg.get("input_num", 1)
+                    num_features = input_size_cfg.get("input_num", X_test.shape[2] if X_test.ndim == 3 else 1)
                 else:
                     sequences = X_test.shape[1]
                     num_features = input_size_cfg
@@ -166,37 +169,40 @@ def eval_flow(cfg: Dict[str, Any], data_type: str, dataset_name: str, model_name
 
     with mlflow.start_run(run_name=run_name, description="Evaluation for latest model version") as eval_run:
         log_mlflow_info(logger, eval_run)
+        # Metrics and tags go out as log_batch requests from a background thread
+        with MlflowSink(eval_run.info.run_id, asynchronous=True) as sink:
+
+            mse, mae, smape_eval = evaluate_timeseries_model(
+                model=trained_model,
+                X_test=X_test,
+                y_test=y_test,
+                scaler=scaler,
+                framework=framework,
+                cpu_profile=cpu_profile,
+                sink=sink
+            )
 
-        mse, mae, smape_eval = evaluate_timeseries_model(
-            model=trained_model,
-            X_test=X_test,
-            y_test=y_test,
-            scaler=scaler,
-            framework=framework
-        )
-
-        logger.info(f"📊 Evaluation metrics - MSE: {mse}, MAE: {mae}, SMAPE: {smape_eval:.2f}")
+            logger.info(f"📊 Evaluation metrics - MSE: {mse}, MAE: {mae}, SMAPE: {smape_eval:.2f}")
 
-        mlflow.log_metric("mse", mse)
-        mlflow.log_metric("mae", mae)
-        mlflow.log_metric("smape", smape_eval)
+            sink.log_metrics({"mse": mse, "mae": mae, "smape": smape_eval})
 
-        eval_run_url = build_and_log_mlflow_url(logger, eval_run)
+            eval_run_url = build_and_log_mlflow_url(logger, eval_run)
 
-        mlflow.set_tags({
-            "model_type": model_type,
-            "log_file": log_file_path,
-            "train_run_name": run_name,
-            "framework": framework,
-            "status": "deployed",
-            "accuracy": round(100 - smape_eval, 1),
-            "dataset": dataset_name,
-            "final_loss": mse,
-            "createdAt": datetime.now().strftime("%Y-%m-%d"),
-            "updatedAt": datetime.now().strftime("%Y-%m-%d"),
-        })
+            sink.set_tags({
+                "model_type": model_type,
+                "log_file": log_file_path,
+                "train_run_name": run_name,
+                "framework": framework,
+                "status": "deployed",
+                "accuracy": round(100 - smape_eval, 1),
+                "dataset": dataset_name,
+                "final_loss": mse,
+                "createdAt": datetime.now().strftime("%Y-%m-%d"),
+                "updatedAt": datetime.now().strftime("%Y-%m-%d"),
+            })
 
-        mlflow.log_artifact(model_metadata_file_path)
+            mlflow.log_artifact(model_metadata_file_path)
+            logger.info(f"📤 MLflow metrics and tags flushed in {sink.close():.2f}s")
 
     create_link_artifact(
         key="mlflow-evaluate-run",
@@ -5,6 +5,7 @@ from typing import Dict, Any
 import pickle
 import numpy as np
 from datetime import datetime
+from functools import partial
 
 from prefect import flow, get_run_logger, context
 from prefect.artifacts import create_link_artifact
@@ -16,8 +17,14 @@ from flows.utils import (log_mlflow_info, build_and_log_mlflow_url, create_logs_
 from tasks.timeseries.train.train_model import train_timeseries_model
 from tasks.timeseries.utils.model_io import save_timeseries_model
 
-from tasks.timeseries.utils.model_loader import build_model_by_type
+from tasks.timeseries.utils.model_loader import build_model_by_type, build_stateful_model_by_type, STATEFUL_BUILDERS
 from tasks.timeseries.train.hpo_optuna import optimize
+from tasks.timeseries.data.windows import load_split_arrays, load_scaler, dataset_version_hash
+from tasks.timeseries.utils.system import resolve_cpu_profile, apply_cpu_profile, cpu_profile_params
+from tasks.timeseries.utils.mlflow_sink import MlflowSink
+from tasks.timeseries.utils.throughput import ThroughputMeter
+from tasks.timeseries.utils.checkpoint import (TrainingCheckpointer, find_resumable_run, clear_checkpoints,
+                                               DEFAULT_CHECKPOINT_EVERY)
 
 
 CENTRAL_STORAGE_PATH = os.getenv("CENTRAL_STORAGE_PATH", "/home/ariya/central_storage")
@@ -59,10 +66,12 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
     # Config hyperparameters for AI models
     hparams = cfg['train'][data_type]['hparams']
     transformer_hparams = cfg['train'][data_type]['transformer_hparams']
+    checkpoint_cfg = cfg['train'][data_type].get('checkpoint') or {}
+    tbptt_cfg = cfg['train'][data_type].get('tbptt') or {}
+    hpo_cfg = cfg['train'][data_type].get('hpo') or {}
         
     if data_type == 'timeseries':
         model_cfg = cfg['model']['timeseries']
-        input_shape = (model_cfg['sequences'], model_cfg['input_num'])
     
     model_type = model_cfg['model_type']
     
@@ -70,18 +79,28 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
    
     if data_type == 'timeseries':
         
-        X_train = np.load(os.path.join(latest_ds_version_path , "X_train.npy"))
-        X_val = np.load(os.path.join(latest_ds_version_path , "X_val.npy"))
-        X_test = np.load(os.path.join(latest_ds_version_path , "X_test.npy"))
-        
-        y_train = np.load(os.path.join(latest_ds_version_path , "y_train.npy"))
-        y_val = np.load(os.path.join(latest_ds_version_path , "y_val.npy"))
-        y_test = np.load(os.path.join(latest_ds_version_path , "y_test.npy"))
+        # Windows are read-only views over the stored series (no (N, seq) copies in memory)
+        splits = load_split_arrays(latest_ds_version_path)
+        X_train, y_train = splits["train"]
+        X_val, y_val = splits["val"]
+        X_test, y_test = splits["test"]
+
+        # Feature count and target horizon come from the stored windows: (N, seq[, F]) and (N[, horizon])
+        num_features = X_train.shape[2] if X_train.ndim == 3 else 1
+        output_size = y_train.shape[1] if y_train.ndim == 2 else 1
+        if (model_cfg.get('input_num'), model_cfg.get('output_num')) != (num_features, output_size):
+            logger.warning(f"⚠️ input_num/output_num ({model_cfg.get('input_num')}, {model_cfg.get('output_num')}) "
+                           f"do not match dataset windows ({num_features}, {output_size}); using the dataset's.")
+        model_cfg['input_num'], model_cfg['output_num'] = num_features, output_size
+        if isinstance(model_cfg.get('input_size'), dict):
+            model_cfg['input_size']['w'] = num_features
+        input_shape = (X_train.shape[1], num_features)
+
+        # CPU acceleration profile (threads, bf16 autocast, torch.compile, XLA JIT), applied before any model is built
+        cpu_profile = apply_cpu_profile(resolve_cpu_profile(hparams.get("cpu_profile")), logger)
         
         # Load scaler if needed
-        scaler_path = os.path.join(latest_ds_version_path , "scaler.pkl")
-        with open(scaler_path, 'rb') as f:
-            scaler = pickle.load(f)
+        scaler = load_scaler(latest_ds_version_path)
             
         # Calculate number of data and data split ratio
         
@@ -94,10 +113,30 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
         val_ratio = round(val_data / total_data*100,1)
         test_ratio = round(test_data / total_data*100,1)
         
+        # ⏯️ Resume mode: continue the latest interrupted run of this model on the same dataset version
+        resumable = None
+        if checkpoint_cfg.get('resume', False):
+            resumable = find_resumable_run(
+                os.path.join(CENTRAL_STORAGE_PATH, 'models', data_type),
+                model_cfg['model_name'],
+                None if model_type == "AutoML" else model_type,
+                dataset_version=latest_ds_version_path
+            )
+            if resumable:
+                logger.info(f"⏯️ Resuming interrupted run {resumable[0]} from epoch {resumable[1]['epoch'] + 1}")
+            else:
+                logger.info("⏯️ No interrupted run to resume; starting a new run")
+
         # 🔹 Optuna optimization (select best model and/or hyperparameters)
-        if model_type == "AutoML":
-            n_trials=10
-            best_params = optimize(input_shape, X_train, X_val, y_train, y_val, n_trials=n_trials)  # Full Optuna optimization
+        if resumable:
+            # Same model and parameters as the checkpointed run (AutoML is not searched again)
+            best_params = resumable[1]["best_params"]
+            model_type = resumable[1]["model_type"]
+        elif model_type == "AutoML":
+            n_trials=hpo_cfg.get('n_trials', 10)
+            best_params = optimize(input_shape, X_train, X_val, y_train, y_val, n_trials=n_trials, output_size=output_size,
+                                   hpo_cfg=hpo_cfg, storage_dir=os.path.join(CENTRAL_STORAGE_PATH, 'hpo', data_type),
+                                   dataset={"name": ds_name, "version_hash": dataset_version_hash(latest_ds_version_path)})  # Persistent, warm-started Optuna study (per-epoch pruning)
             model_type = best_params["model_type"]  # Extract optimized model type
         else:
             if model_type == "Transformer":
@@ -110,6 +149,9 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
                 # best_params = optimize(input_shape, X_train, X_val, y_train, y_val, model_type)  # Optimize only hyperparameters fpr selected model
                 best_params=hparams  #Training with input parameter, not need optimizing
 
+        # Saved with the model metadata so evaluation/serving rebuild the same output layer
+        best_params = {**best_params, "output_size": output_size}
+        best_params.pop("cpu_profile", None)  # logged as resolved cpu_* params instead
         
         # 🔹 Build model with best/selected parameters
         if model_type == "Transformer":
@@ -119,7 +161,7 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
                 "num_layers": best_params["num_layers"],
                 "dim_feedforward": best_params["dim_feedforward"],
                 "dropout": best_params["dropout"],
-                "output_size": best_params.get("output_size", 1),  # fallback
+                "output_size": best_params["output_size"],
             }
             optimized_model = build_model_by_type(
                 model_type=model_type,
@@ -136,17 +178,32 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
                 conv_filters=best_params["conv_filters"],
                 kernel_size=best_params["kernel_size"],
                 dropout_rate=best_params["dropout_rate"],
-                learning_rate=best_params["learning_rate"]  # Sửa key này nếu dùng learning_rate nhỏ
+                learning_rate=best_params["learning_rate"],  # Sửa key này nếu dùng learning_rate nhỏ
+                output_size=best_params["output_size"]
             )
             framework="Tensorflow"
+
+        # 🔁 Truncated-BPTT mode: recurrent models train statefully on contiguous chunks of the series
+        stateful_builder = None
+        if tbptt_cfg.get('enabled', False):
+            if model_type in STATEFUL_BUILDERS:
+                # The stateful batch is the number of streams (passed by the trainer), not the windowed batch_size
+                stateful_params = {k: v for k, v in best_params.items() if k not in ("batch_size", "model_type")}
+                stateful_builder = partial(build_stateful_model_by_type, model_type, num_features, **stateful_params)
+            else:
+                logger.warning(f"⚠️ TBPTT needs a unidirectional recurrent model ({', '.join(STATEFUL_BUILDERS)}); "
+                               f"{model_type} trains on full windows")
             
     else:
         raise ValueError(f"Unsupported data_type: {data_type}")
     
     # Create MLflow Run Name with automatic versioning
     model_name = model_cfg['model_name']
-    run_version = get_next_version(model_name, model_type, mlflow_train_cfg)
-    run_name = f"{model_name}_model_{run_version}_{model_type}"
+    if data_type == 'timeseries' and resumable:
+        run_name = resumable[0]
+    else:
+        run_version = get_next_version(model_name, model_type, mlflow_train_cfg)
+        run_name = f"{model_name}_model_{run_version}_{model_type}"
     
     if data_type == 'timeseries':
             model_cfg['save_dir'] = os.path.join(CENTRAL_STORAGE_PATH, 'models', data_type, run_name)
@@ -157,92 +214,124 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
                 
         # Start MLflow run
     mlflow.set_experiment(mlflow_train_cfg['exp_name'])
-    with mlflow.start_run(run_name=run_name, description=mlflow_train_cfg['exp_desc']) as train_run:
+    if data_type == 'timeseries' and resumable and resumable[1].get("run_id"):
+        # Reopen the interrupted MLflow run instead of creating a new version
+        run_args = {"run_id": resumable[1]["run_id"]}
+    else:
+        run_args = {"run_name": run_name, "description": mlflow_train_cfg['exp_desc']}
+    with mlflow.start_run(**run_args) as train_run:
         log_mlflow_info(logger, train_run)
         mlflow_run_url = build_and_log_mlflow_url(logger, train_run)
 
-    
+        # Params, tags and metrics are sent as log_batch requests from a background thread
+        with MlflowSink(train_run.info.run_id, asynchronous=True) as sink:
         
-        mlflow.log_params(best_params)
-        mlflow.log_params({"epochs": hparams['epochs']})
+            sink.log_params(best_params)
+            sink.log_params({"epochs": hparams['epochs']})
+            sink.log_params(cpu_profile_params(cpu_profile))
         
-        # Gắn thẻ metadata vào MLflow
-        tags_exp_initial = {
-            "model_type": model_type,
-            "log_file": log_file_path,
-            "framework": framework,
-            "status": "training",
-            "dataset": ds_cfg.get('ds_name', "Stock_product_01"),
-            "data_type": data_type,
-            "epochs": str(hparams.get("epochs", 10)),
-            "learning_rate": str(best_params.get("learning_rate", 0.001)),
-            "createdAt": datetime.now().strftime('%Y-%m-%d'),
-            "updatedAt": datetime.now().strftime('%Y-%m-%d'),
-        }
-        for k, v in tags_exp_initial.items():
-            mlflow.set_tag(k, v)
+            # Gắn thẻ metadata vào MLflow
+            tags_exp_initial = {
+                "model_type": model_type,
+                "log_file": log_file_path,
+                "framework": framework,
+                "status": "training",
+                "dataset": ds_cfg.get('ds_name', "Stock_product_01"),
+                "data_type": data_type,
+                "epochs": str(hparams.get("epochs", 10)),
+                "learning_rate": str(best_params.get("learning_rate", 0.001)),
+                "createdAt": datetime.now().strftime('%Y-%m-%d'),
+                "updatedAt": datetime.now().strftime('%Y-%m-%d'),
+            }
+            sink.set_tags(tags_exp_initial)
+            sink.flush()  # "training" status is visible while the run is in progress
 
         
-        # Log dataset information as an artifact
-        dataset_info = {
-            "dataset_name": ds_cfg['ds_name'],
-            "dataset_version": ds_cfg.get('dvc_tag', 'v1.0.0'),
-            "data_type": data_type,
-            "dataset_path": ds_cfg['file_path'],
-            "date_column": ds_cfg.get('date_col', 'N/A'),
-            "target_column": ds_cfg.get('target_col', 'N/A'),
-            "sequences": ds_cfg.get('sequences', 'N/A'),
-            "num_samples": total_data if data_type == 'timeseries' else len(annotation_df),
-            "train_split": len(X_train) if data_type == 'timeseries' else "N/A",
-            "val_split": len(X_val) if data_type == 'timeseries' else "N/A",
-            "test_split": len(X_test) if data_type == 'timeseries' else "N/A",
-            "train_ratio": train_ratio if data_type == 'timeseries' else "N/A",
-            "val_ratio": val_ratio if data_type == 'timeseries' else "N/A",
-            "test_ratio": test_ratio if data_type == 'timeseries' else "N/A",
-        }
-        dataset_info_path = os.path.join(model_cfg['save_dir'], "dataset_info.json")
-        with open(dataset_info_path, "w") as f:
-            json.dump(dataset_info, f, indent=4)
-        mlflow.log_artifact(dataset_info_path, artifact_path="datasets")
+            # Log dataset information as an artifact
+            dataset_info = {
+                "dataset_name": ds_cfg['ds_name'],
+                "dataset_version": ds_cfg.get('dvc_tag', 'v1.0.0'),
+                "data_type": data_type,
+                "dataset_path": ds_cfg['file_path'],
+                "date_column": ds_cfg.get('date_col', 'N/A'),
+                "target_column": ds_cfg.get('target_col', 'N/A'),
+                "sequences": ds_cfg.get('sequences', 'N/A'),
+                "num_samples": total_data if data_type == 'timeseries' else len(annotation_df),
+                "train_split": len(X_train) if data_type == 'timeseries' else "N/A",
+                "val_split": len(X_val) if data_type == 'timeseries' else "N/A",
+                "test_split": len(X_test) if data_type == 'timeseries' else "N/A",
+                "train_ratio": train_ratio if data_type == 'timeseries' else "N/A",
+                "val_ratio": val_ratio if data_type == 'timeseries' else "N/A",
+                "test_ratio": test_ratio if data_type == 'timeseries' else "N/A",
+            }
+            dataset_info_path = os.path.join(model_cfg['save_dir'], "dataset_info.json")
+            with open(dataset_info_path, "w") as f:
+                json.dump(dataset_info, f, indent=4)
+            mlflow.log_artifact(dataset_info_path, artifact_path="datasets")
 
-        if data_type == 'timeseries':
-            # Train model
-            trained_model, final_train_loss, smape, training_time = train_timeseries_model(
-                model=optimized_model,
-                X_train=X_train,
-                y_train=y_train,
-                X_val=X_val,
-                y_val=y_val,
-                X_test=X_test,
-                y_test=y_test,
-                scaler=scaler,
-                best_params=best_params,
-                epochs=hparams['epochs'],
-            )
+            if data_type == 'timeseries':
+                meter = ThroughputMeter()
+
+                # Periodic checkpoints in save_dir/checkpoints; a restart loses at most one interval
+                checkpointer = TrainingCheckpointer(
+                    model_cfg['save_dir'],
+                    every=checkpoint_cfg.get('every_epochs', DEFAULT_CHECKPOINT_EVERY),
+                    meta={
+                        "run_id": train_run.info.run_id,
+                        "run_name": run_name,
+                        "model_type": model_type,
+                        "best_params": best_params,
+                        "dataset_version": latest_ds_version_path,
+                    }
+                )
+
+                # Train model
+                trained_model, final_train_loss, smape, training_time, epochs_run = train_timeseries_model(
+                    model=optimized_model,
+                    X_train=X_train,
+                    y_train=y_train,
+                    X_val=X_val,
+                    y_val=y_val,
+                    X_test=X_test,
+                    y_test=y_test,
+                    scaler=scaler,
+                    best_params=best_params,
+                    epochs=hparams['epochs'],
+                    patience=hparams.get('patience', 10),
+                    cpu_profile=cpu_profile,
+                    checkpointer=checkpointer,
+                    sink=sink,
+                    world_size=int(hparams.get('world_size', 1)),
+                    meter=meter,
+                    stateful_builder=stateful_builder,
+                    truncation=int(tbptt_cfg.get('truncation', 64)),
+                    streams=int(tbptt_cfg.get('streams', 16)),
+                )
             
-        else:
-            raise ValueError(f"Unsupported data_type: {data_type}")
+            else:
+                raise ValueError(f"Unsupported data_type: {data_type}")
         
         
         
-        tags_exp_update = {
-            "model_type": model_type,
-            "log_file": log_file_path,
-            "framework": framework,
-            "status": "training",
-            "dataset": ds_cfg.get('ds_name', "Stock_product_01"),
-            "data_type": data_type,
-            "epochs": str(hparams.get("epochs", 10)),
-            "learning_rate": str(best_params.get("learning_rate", 0.001)),
-            "createdAt": datetime.now().strftime('%Y-%m-%d'),
-            "updatedAt": datetime.now().strftime('%Y-%m-%d'),
-            "accuracy": round(100-smape,1),
-            "training_time": training_time,
-            "final_loss": final_train_loss,
-            "status": "deployed",
-        }
-        for k, v in tags_exp_update.items():
-            mlflow.set_tag(k, v)    
+            tags_exp_update = {
+                "model_type": model_type,
+                "log_file": log_file_path,
+                "framework": framework,
+                "status": "training",
+                "dataset": ds_cfg.get('ds_name', "Stock_product_01"),
+                "data_type": data_type,
+                "epochs": str(hparams.get("epochs", 10)),
+                "learning_rate": str(best_params.get("learning_rate", 0.001)),
+                "createdAt": datetime.now().strftime('%Y-%m-%d'),
+                "updatedAt": datetime.now().strftime('%Y-%m-%d'),
+                "accuracy": round(100-smape,1),
+                "training_time": training_time,
+                "epochs_run": str(epochs_run),
+                "final_loss": final_train_loss,
+                "status": "deployed",
+            }
+            sink.set_tags(tags_exp_update)
+            logger.info(f"📤 MLflow params, metrics and tags flushed in {sink.close():.2f}s")
             
         
         docker_metrics = get_docker_container_metrics(container_name_or_id="jupyter")
@@ -257,15 +346,15 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
         "dataset_format": 'csv file',
         "task": model_name,
         "model_type": model_type,
-        "train_epochs": hparams['epochs'],
+        "train_epochs": epochs_run,
         "isDeployed": True,
         "health": "healthy",  # Placeholder; You can replace with actual health check logic
         "cpu": "fulfilled" if docker_metrics["cpu_usage"] < 80 else "warning",
         "memory": "fulfilled" if docker_metrics["memory_usage"] < 80 else "warning",
         "gpu": docker_metrics["gpu_usage"],
-        "latency": docker_metrics["latency"],
-        "throughput": docker_metrics["throughput"],
-        "uptime": docker_metrics["uptime"]
+        "uptime": docker_metrics["uptime"],
+        # Measured during training (train_* keys, not the serving latency/throughput tags)
+        **meter.train_info()
         }
         
         
@@ -278,6 +367,8 @@ def train_flow(cfg: Dict[str, Any], data_type: str, ds_name: str):
             #     remote_dir=central_models_dir
             # )
             model_save_dir=model_dir
+            # The run finished: its checkpoints must not be resumed again
+            clear_checkpoints(model_cfg['save_dir'])
             # metadata_file_name=metadata_file_path#Due to not use Cloud DB to save model
             metadata_file_name = os.path.basename(metadata_file_path)
             
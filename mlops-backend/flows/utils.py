@@ -107,7 +107,8 @@ def get_next_version(model_name: str, model_type: str, mlflow_train_cfg: dict) -
 
 def get_docker_container_metrics(container_name_or_id: str):
     """
-    Lấy các thông số từ Docker container như CPU, Memory, GPU, Latency, Throughput và Uptime.
+    Lấy các thông số từ Docker container như CPU, Memory, GPU và Uptime.
+    Training throughput and step latency are measured by the trainers (ThroughputMeter, train_* keys).
     """
     # Kết nối Docker client
     client = docker.DockerClient(base_url='tcp://host.docker.internal:2375')
@@ -147,16 +148,10 @@ def get_docker_container_metrics(container_name_or_id: str):
 
     uptime = container.attrs['State']['StartedAt']
     
-
-    latency = "45ms"
-    throughput = "120 requests/sec"
-    
     return {
         "cpu_usage": cpu_percent,
         "memory_usage": memory_percent,
         "gpu_usage": gpu_usage,
-        "latency": latency,
-        "throughput": throughput,
         "uptime": uptime
     }
     
\ No newline at end of file
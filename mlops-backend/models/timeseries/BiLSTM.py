@@ -11,13 +11,13 @@ def smape_keras(y_true, y_pred):
     diff = K.abs(y_pred - y_true) / denominator
     return 200.0 * K.mean(diff)
 
-def build_model(input_shape, lstm_units=128, dropout_rate=0.2, learning_rate=0.001):
+def build_model(input_shape, lstm_units=128, dropout_rate=0.2, learning_rate=0.001, output_size=1):
     model = Sequential([
         Bidirectional(LSTM(lstm_units, return_sequences=True), input_shape=input_shape),
         Dropout(dropout_rate),
         Bidirectional(LSTM(lstm_units // 2)),
         Dropout(dropout_rate),
-        Dense(1)
+        Dense(output_size)
     ])
     model.compile(
         optimizer=Adam(learning_rate=learning_rate),
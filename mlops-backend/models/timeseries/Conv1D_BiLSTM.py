@@ -11,7 +11,7 @@ def smape_keras(y_true, y_pred):
     diff = K.abs(y_pred - y_true) / denominator
     return 200.0 * K.mean(diff)
 
-def build_model(input_shape, conv_filters=128, kernel_size=3, lstm_units=128, dropout_rate=0.2, learning_rate=0.001):
+def build_model(input_shape, conv_filters=128, kernel_size=3, lstm_units=128, dropout_rate=0.2, learning_rate=0.001, output_size=1):
     model = Sequential([
         Conv1D(conv_filters, kernel_size=kernel_size, activation="relu", input_shape=input_shape),
         MaxPooling1D(pool_size=2),
@@ -19,7 +19,7 @@ def build_model(input_shape, conv_filters=128, kernel_size=3, lstm_units=128, dr
         Dropout(dropout_rate),
         Bidirectional(LSTM(lstm_units // 2)),
         Dropout(dropout_rate),
-        Dense(1)
+        Dense(output_size)
     ])
     model.compile(
         optimizer=Adam(learning_rate=learning_rate),
@@ -10,14 +10,7 @@ def smape_keras(y_true, y_pred):
     diff = K.abs(y_pred - y_true) / denominator
     return 200.0 * K.mean(diff)
 
-def build_model(input_shape, lstm_units=128, dropout_rate=0.2, learning_rate=0.001):
-    model = Sequential([
-        GRU(lstm_units, return_sequences=True, input_shape=input_shape),
-        Dropout(dropout_rate),
-        GRU(lstm_units // 2),
-        Dropout(dropout_rate),
-        Dense(1)
-    ])
+def _compile(model, learning_rate):
     model.compile(
         optimizer=Adam(learning_rate=learning_rate),
         loss='mse',
@@ -27,4 +20,29 @@ def build_model(input_shape, lstm_units=128, dropout_rate=0.2, learning_rate=0.0
             smape_keras
         ]
     )
-    return model
\ No newline at end of file
+    return model
+
+def build_model(input_shape, lstm_units=128, dropout_rate=0.2, learning_rate=0.001, output_size=1):
+    model = Sequential([
+        GRU(lstm_units, return_sequences=True, input_shape=input_shape),
+        Dropout(dropout_rate),
+        GRU(lstm_units // 2),
+        Dropout(dropout_rate),
+        Dense(output_size)
+    ])
+    return _compile(model, learning_rate)
+
+def build_stateful_model(batch_size, num_features, lstm_units=128, dropout_rate=0.2, learning_rate=0.001, output_size=1):
+    """
+    Stateful twin of ``build_model`` for truncated-BPTT training: (batch_size, steps, features)
+    chunks in, one prediction per step out, hidden state carried across chunks.
+    The layers match ``build_model``'s, so weights transfer with ``set_weights``.
+    """
+    model = Sequential([
+        GRU(lstm_units, return_sequences=True, stateful=True, batch_input_shape=(batch_size, None, num_features)),
+        Dropout(dropout_rate),
+        GRU(lstm_units // 2, return_sequences=True, stateful=True),
+        Dropout(dropout_rate),
+        Dense(output_size)
+    ])
+    return _compile(model, learning_rate)
\ No newline at end of file
@@ -25,7 +25,7 @@ def load_metadata(ds_path: str) -> Dict:
 def get_dataset_index(ds_name: str, dvc_root: str) -> int:
     """Trả về ID dataset dựa trên danh sách thư mục (int)."""
     datasets = sorted(
-        [d for d in os.listdir(dvc_root) if os.path.isdir(os.path.join(dvc_root, d)) and d != ".ipynb_checkpoints"]
+        [d for d in os.listdir(dvc_root) if os.path.isdir(os.path.join(dvc_root, d)) and not d.startswith(".")]
     )
     return datasets.index(ds_name) + 1 if ds_name in datasets else len(datasets) + 1
 
@@ -40,8 +40,8 @@ async def get_all_datasets_info():
 
     for ds_name in os.listdir(DVC_DATA_STORAGE):
         ds_path = os.path.join(DVC_DATA_STORAGE, ds_name)
-        if not os.path.isdir(ds_path) or ds_name == ".ipynb_checkpoints":
-            continue  # Skip invalid directories
+        if not os.path.isdir(ds_path) or ds_name.startswith("."):
+            continue  # Skip invalid directories (.ipynb_checkpoints, .blobs)
 
         metadata = load_metadata(ds_path)
         if not metadata:
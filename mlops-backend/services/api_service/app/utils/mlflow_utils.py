@@ -784,7 +784,7 @@ def get_mlflow_and_datasets_info() -> Dict[str, list]:
     # Retrieve the list of datasets in the DVC_ROOT directory
     datasets = [
         d for d in os.listdir(DVC_DATA_STORAGE)
-        if os.path.isdir(os.path.join(DVC_DATA_STORAGE, d)) and d != ".ipynb_checkpoints"
+        if os.path.isdir(os.path.join(DVC_DATA_STORAGE, d)) and not d.startswith(".")
     ]
 
     # Retrieve the list of model names (excluding __init__.py)
@@ -266,7 +266,8 @@ async def predict_timeseries(
         #     )
             
         scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(pd.DataFrame(input_data))
+        # Models are trained on float32 windows; feed float32 so predict() does not cast every call
+        scaled_data = scaler.fit_transform(pd.DataFrame(input_data)).astype(np.float32)
         # Convert input data to numpy array with the correct shape
         # 
         # logger.info(f"Input data reshaped to: {timeseries_data.shape}")
@@ -287,7 +288,7 @@ async def predict_timeseries(
                 for _ in range(prediction_step):
                     predicted_stock = model.predict(model_input_data)
                     predicted_values.append(predicted_stock[0, 0])
-                    model_input_data = np.append(model_input_data[:, 1:, :], [[[predicted_stock[0, 0]]]], axis=1)
+                    model_input_data = np.append(model_input_data[:, 1:, :], np.full((1, 1, 1), predicted_stock[0, 0], dtype=np.float32), axis=1)
 
                 # Save predicted values
                 predictions.extend(scaler.inverse_transform(np.array(predicted_values).reshape(-1, 1)).flatten())
@@ -298,7 +299,7 @@ async def predict_timeseries(
             for _ in range(prediction_step):
                 predicted_stock = model.predict(model_input_data)
                 predicted_values.append(predicted_stock[0, 0])
-                model_input_data = np.append(model_input_data[:, 1:, :], [[[predicted_stock[0, 0]]]], axis=1)
+                model_input_data = np.append(model_input_data[:, 1:, :], np.full((1, 1, 1), predicted_stock[0, 0], dtype=np.float32), axis=1)
 
             # Save predicted values
             predictions.extend(scaler.inverse_transform(np.array(predicted_values).reshape(-1, 1)).flatten())
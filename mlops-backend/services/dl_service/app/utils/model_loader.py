@@ -23,10 +23,10 @@ MODEL_BUILDERS = {
 
 SUPPORTED_ARGS_BY_MODEL = {
     "Transformer": ["d_model", "nhead", "num_layers", "dim_feedforward", "dropout", "output_size"],
-    "LSTM": ["lstm_units", "dropout_rate", "learning_rate"],
-    "GRU": ["lstm_units", "dropout_rate", "learning_rate"],
-    "BiLSTM": ["lstm_units", "dropout_rate", "learning_rate"],
-    "Conv1D_BiLSTM": ["conv_filters", "kernel_size", "dropout_rate", "lstm_units", "learning_rate"],
+    "LSTM": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "GRU": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "BiLSTM": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "Conv1D_BiLSTM": ["conv_filters", "kernel_size", "dropout_rate", "lstm_units", "learning_rate", "output_size"],
 }
 
 def build_model_by_type(model_type, input_shape, **kwargs):
@@ -0,0 +1,81 @@
+# 📁 tasks/timeseries/data/blob_store.py
+import os
+import stat
+import shutil
+import logging
+from typing import Tuple
+
+from tasks.timeseries.data.frame_cache import file_sha256, remember_file_sha256
+
+# Optional: reflinks need fcntl (Linux/macOS only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = ".blobs"
+FICLONE = 0x40049409  # ioctl request for a copy-on-write clone (btrfs, XFS, overlayfs on top of those)
+
+
+def blob_path(storage_root: str, digest: str) -> str:
+    return os.path.join(storage_root, BLOB_DIR, digest[:2], digest)
+
+
+def put_blob(file_path: str, storage_root: str) -> Tuple[str, str]:
+    """
+    Store ``file_path`` in the content-addressed blob store under ``storage_root``.
+    Identical uploads map to the same blob, so it is only written once. Returns ``(digest, blob)``.
+    """
+    digest = file_sha256(file_path)
+    path = blob_path(storage_root, digest)
+    if os.path.exists(path):
+        logger.info(f"♻️ Blob {digest[:12]} already stored")
+        return digest, path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # Never hardlink the upload itself: it may later be edited or appended to in place
+    _link_or_copy(file_path, tmp_path, hardlink=False)
+    # Blobs are shared by hardlinks; make them read-only so no version can modify another
+    os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    os.replace(tmp_path, path)
+    remember_file_sha256(path, digest)
+    logger.info(f"🧱 Stored blob {digest[:12]} from {file_path}")
+    return digest, path
+
+
+def link_blob(blob: str, target_path: str, digest: str = None) -> str:
+    """
+    Materialize a blob at ``target_path``: hardlink, then reflink, then copy.
+    Returns the method that was used.
+    """
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    method = _link_or_copy(blob, target_path)
+    if digest is not None:
+        remember_file_sha256(target_path, digest)
+    return method
+
+
+def _link_or_copy(source: str, target: str, hardlink: bool = True) -> str:
+    if hardlink:
+        try:
+            os.link(source, target)
+            return "hardlink"
+        except OSError:
+            pass
+
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, target)
+            return "reflink"
+        except OSError:
+            if os.path.exists(target):
+                os.remove(target)
+
+    shutil.copy2(source, target)
+    return "copy"
@@ -8,41 +8,33 @@ from dvc.repo import Repo
 from git import Git, GitCommandError
 from prefect import task, get_run_logger
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
 from deepchecks.vision import classification_dataset_from_directory
 from deepchecks.vision.suites import train_test_validation
 from datetime import datetime
+from tasks.timeseries.data.windows import WindowedSeries
+from tasks.timeseries.data.dtypes import COMPUTE_DTYPE, as_compute
+from tasks.timeseries.data.ingest import DEFAULT_CHUNK_ROWS, iter_chunks, read_columns
+from tasks.timeseries.data.frame_cache import FRAME_CACHE_DIR, file_sha256, get_frame, put_frame
+from tasks.timeseries.data.profiling import DatasetProfile, profile_frame
+from tasks.timeseries.data.sketches import StreamingProfile, profile_chunks
 
 #======================TASKS FOR DATA VALIDATION AND PREPARATION===========================
 
     
 # Validate time series data (check nulls, duplicates, outliers)
-def validate_timeseries_data(df: pd.DataFrame):
+def validate_timeseries_data(df: pd.DataFrame, profile: DatasetProfile = None):
     logger = get_run_logger()
-    report = {}
+    profile = profile or profile_frame(df)
+    report = profile.validation_report()
 
     # 1. Check for nulls
-    null_counts = df.isnull().sum().to_dict()
-    report["null_counts"] = null_counts
-    logger.info(f"🧪 Null value check: {null_counts}")
+    logger.info(f"🧪 Null value check: {report['null_counts']}")
 
     # 2. Check for duplicate rows
-    duplicate_count = df.duplicated().sum()
-    report["duplicate_rows"] = duplicate_count
-    logger.info(f"🔁 Duplicate rows: {duplicate_count}")
+    logger.info(f"🔁 Duplicate rows: {report['duplicate_rows']}")
 
     # 3. Check for outliers (only on numerical columns)
-    outlier_report = {}
-    for col in df.select_dtypes(include=[np.number]).columns:
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-        outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-        outlier_report[col] = int(outliers)
-    report["outliers"] = outlier_report
-    logger.info(f"📈 Outlier check: {outlier_report}")
+    logger.info(f"📈 Outlier check: {report['outliers']}")
 
     return report
 
@@ -93,29 +85,67 @@ def prepare_dataset(ds_root: str, ds_name: str, dvc_tag: str, dvc_checkout: bool
 
 #======================TASKS FOR TIME SERIES===========================
 
+def time_series_file_format(file_path: str) -> str:
+    # Determine file extension
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.csv' or file_extension == '.txt':  # For CSV or TXT files
+        return "CSV/TXT"
+    elif file_extension == '.xlsx':  # For Excel files
+        return "Excel"
+    raise ValueError(f"Unsupported file type: {file_extension}")
+
+
 # @task(name='load_time_series_data')
-def load_time_series_data(file_path: str, date_col: str, target_col: str):
+def load_time_series_data(file_path: str, date_col: str, target_col: str, projected: bool = False,
+                          feature_cols: List[str] = None):
+    """
+    Load a time series file through its columnar (Parquet) copy.
+
+    Full loads are parsed once per file content and served from the frame cache
+    (memory, then a Feather spill next to the file) on every later call.
+    With ``projected=True`` only ``date_col``, ``target_col`` and ``feature_cols`` are decoded
+    when the full frame is not cached yet, which is all the windowing/training path needs.
+    The returned training frame holds the date, target and any feature columns found.
+    """
     logger = get_run_logger()
     logger.info(f"Loading time series data from {file_path}...")
 
     try:
-        # Determine file extension
-        file_extension = os.path.splitext(file_path)[1].lower()
-
-        # Load file based on its extension
-        if file_extension == '.csv' or file_extension == '.txt':  # For CSV or TXT files
-            data = pd.read_csv(file_path, delimiter=None if file_extension == '.csv' else '\t')
-            file_format = "CSV/TXT"
-        elif file_extension == '.xlsx':  # For Excel files
-            data = pd.read_excel(file_path, engine='openpyxl')  # Use openpyxl engine for better compatibility
-            file_format = "Excel"
+        file_format = time_series_file_format(file_path)
+
+        cache_key = f"{file_sha256(file_path)}:{date_col}:{target_col}"
+        spill_dir = os.path.join(os.path.dirname(file_path), FRAME_CACHE_DIR)
+        cached = get_frame(cache_key, spill_dir)
+
+        if cached is None:
+            # Parse once into a columnar file, then read only the needed columns
+            data = read_columns(file_path, columns=[date_col, target_col, *(feature_cols or [])] if projected else None)
+            data, missing_cols = _standardize_time_series_frame(data, date_col, target_col)
+            if not projected:
+                data = put_frame(cache_key, data, {"missing_cols": missing_cols}, spill_dir)
         else:
-            raise ValueError(f"Unsupported file type: {file_extension}")
+            logger.info(f"♻️ Reusing cached frame for {file_path}")
+            data, info = cached
+            missing_cols = info["missing_cols"]
 
     except Exception as e:
         logger.error(f"❌ Error loading file: {e}")
         return None, None, None  # Return None if the file cannot be read
 
+    # ✅ Determine columns to exclude
+    columns_to_exclude = [col for col in [date_col, target_col] if col in missing_cols]
+
+    # ✅ Create a dataframe that excludes columns only if they were missing in the original file
+    data_excluded = data.drop(columns=columns_to_exclude, errors='ignore')
+
+    train_cols = [date_col] + [col for col in [target_col, *(feature_cols or [])] if col in data.columns and col != date_col]
+    logger.info(f"✅ Loaded data with shape {data.shape}")
+    return file_format, data_excluded, data[list(dict.fromkeys(train_cols))]
+
+
+def _standardize_time_series_frame(data: pd.DataFrame, date_col: str, target_col: str):
+    logger = get_run_logger()
+
     # ✅ Check if the required columns exist
     missing_cols = []
     if date_col not in data.columns:
@@ -134,24 +164,99 @@ def load_time_series_data(file_path: str, date_col: str, target_col: str):
 
     # ✅ Sort by date_col, placing None values at the end
     data = data.sort_values(by=date_col, ascending=True, na_position='last')
-    
-    # ✅ Determine columns to exclude
-    columns_to_exclude = [col for col in [date_col, target_col] if col in missing_cols]
+    return data, missing_cols
 
-    # ✅ Create a dataframe that excludes columns only if they were missing in the original file
-    data_excluded = data.drop(columns=columns_to_exclude, errors='ignore')
 
-    logger.info(f"✅ Loaded data with shape {data.shape}")
-    return file_format, data_excluded, data[[date_col, target_col]] if target_col in data.columns else data[[date_col]]
 
+def profile_time_series_chunks(file_path: str, date_col: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StreamingProfile:
+    """
+    Build a streaming profile of a file that may not fit in memory, one chunk at a time.
+    The date column gets the same datetime conversion as ``load_time_series_data``.
+    To extend an earlier profile with appended rows only, use ``profile_chunks(rows, base=...)``.
+    """
+    logger = get_run_logger()
+    logger.info(f"🌊 Streaming statistics for {file_path} in chunks of {chunk_rows} rows...")
+
+    def standardized_chunks():
+        for chunk in iter_chunks(file_path, chunk_rows=chunk_rows):
+            if date_col in chunk.columns and chunk[date_col].notna().all():
+                chunk[date_col] = pd.to_datetime(chunk[date_col], errors='coerce')
+            yield chunk
+
+    profile = profile_chunks(standardized_chunks(), sort_col=date_col)
+    logger.info(f"✅ Streamed {profile.n_rows} rows x {len(profile.columns)} columns")
+    return profile
 
 
 # @task(name='prepare_time_series_data')
-def prepare_time_series_data(data: pd.DataFrame, sequences: int, target_col: str) -> Tuple[np.ndarray, np.ndarray, MinMaxScaler]:
+def prepare_time_series_data(data: pd.DataFrame, sequences: int, target_col: str, horizon: int = 1) -> Tuple[WindowedSeries, MinMaxScaler]:
 
     logger = get_run_logger()
     logger.info(f"Preparing time series data with time squences={sequences} for column {target_col}...")
 
+    _clean_target_column(data, target_col)
+
+    # ✅ Normalize
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    target_values = scaler.fit_transform(data[[target_col]])
+
+    # ✅ Sequence creation (windows are strided views over the series, nothing is copied)
+    series = as_compute(np.nan_to_num(target_values[:, 0], nan=0.0, posinf=0.0, neginf=0.0))
+    windows = WindowedSeries(series, sequences, horizon=horizon)
+
+    logger.info(f"✅ Data preparation complete: X shape={windows.X.shape}, y shape={windows.y.shape}")
+    logger.info(f"Target min: {data[target_col].min()}, max: {data[target_col].max()}, unique: {data[target_col].nunique()}")
+    return windows, scaler
+
+
+# @task(name='prepare_multivariate_time_series_data')
+def prepare_multivariate_time_series_data(data: pd.DataFrame, sequences: int, target_col: str, feature_cols: List[str],
+                                          horizon: int = 1) -> Tuple[WindowedSeries, MinMaxScaler, MinMaxScaler]:
+    """
+    Scale ``feature_cols`` column-wise (one scaler fitted once over the whole block) and
+    window them into ``(N, sequences, F)`` float32 views with ``horizon``-step targets.
+    The target keeps its own single-column scaler so predictions can be inverse transformed.
+    Returns ``(windows, target_scaler, feature_scaler)``.
+    """
+    logger = get_run_logger()
+    logger.info(f"Preparing multivariate time series data with time squences={sequences}, "
+                f"features={feature_cols}, target={target_col}, horizon={horizon}...")
+
+    missing = [col for col in feature_cols if col not in data.columns]
+    if missing:
+        raise ValueError(f"❌ Error: Feature columns {missing} not found in DataFrame.")
+
+    _clean_target_column(data, target_col)
+
+    # ✅ Features: non-numeric -> NaN, Inf -> NaN, NaN -> column mean (0 for all-NaN columns)
+    values = data[feature_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+    values[~np.isfinite(values)] = np.nan
+    missing_counts = np.isnan(values).sum(axis=0)
+    if missing_counts.any():
+        logger.warning(f"⚠️ Warning: Filling missing/invalid feature values with column means: "
+                       f"{dict(zip(feature_cols, missing_counts.tolist()))}")
+    with np.errstate(invalid='ignore'):
+        col_means = np.nan_to_num(np.nanmean(values, axis=0), nan=0.0)
+    values = np.where(np.isnan(values), col_means, values)
+    if target_col in feature_cols:
+        # The target used as an input gets the same cleaning as the target itself
+        values[:, feature_cols.index(target_col)] = data[target_col].to_numpy(dtype=np.float64)
+
+    # ✅ Normalize: MinMaxScaler keeps one min/scale per column
+    feature_scaler = MinMaxScaler(feature_range=(0, 1))
+    series = feature_scaler.fit_transform(values).astype(COMPUTE_DTYPE)
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    targets = scaler.fit_transform(data[[target_col]])[:, 0].astype(COMPUTE_DTYPE)
+
+    windows = WindowedSeries(np.nan_to_num(series), sequences, targets=np.nan_to_num(targets), horizon=horizon)
+
+    logger.info(f"✅ Data preparation complete: X shape={windows.X.shape}, y shape={windows.y.shape}")
+    return windows, scaler, feature_scaler
+
+
+def _clean_target_column(data: pd.DataFrame, target_col: str):
+    logger = get_run_logger()
+
     if target_col not in data.columns:
         raise ValueError(f"❌ Error: Target column '{target_col}' not found in DataFrame.")
 
@@ -187,106 +292,51 @@ def prepare_time_series_data(data: pd.DataFrame, sequences: int, target_col: str
         logger.info(f"Replacing {zero_count} zero values with non-zero mean: {non_zero_mean:.4f}")
         data[target_col] = data[target_col].replace(0, non_zero_mean)
 
-    # ✅ Normalize
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    target_values = scaler.fit_transform(data[[target_col]])
-
-    # ✅ Sequence creation
-    X, y = [], []
-    for i in range(len(target_values) - sequences):
-        X.append(target_values[i:i + sequences, 0])
-        y.append(target_values[i + sequences, 0])
-
-    X, y = np.array(X), np.array(y)
-    X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
-    y = np.nan_to_num(y, nan=0.0, posinf=0.0, neginf=0.0)
-
-    logger.info(f"✅ Data preparation complete: X shape={X.shape}, y shape={y.shape}")
-    logger.info(f"Target min: {data[target_col].min()}, max: {data[target_col].max()}, unique: {data[target_col].nunique()}")
-    return X, y, scaler
-
 
 # @task(name='split_time_series_data')
-def split_time_series_data(X: np.ndarray, y: np.ndarray, test_size: float = 0.2, val_size: float = 0.1):
+def split_time_series_data(windows: WindowedSeries, test_size: float = 0.2, val_size: float = 0.1):
     logger = get_run_logger()
     logger.info("Splitting time series data...")
 
-    if len(X) < 10:
+    if len(windows) < 10:
         raise ValueError("Dataset is too small to split. Ensure it contains enough samples.")
 
-    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=test_size, shuffle=False)
-    val_split = val_size / (1 - test_size)
-    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=val_split, shuffle=False)
+    train_windows, val_windows, test_windows = windows.split(test_size=test_size, val_size=val_size)
 
-    logger.info(f"Split completed: Train {X_train.shape}, Val {X_val.shape}, Test {X_test.shape}")
-    return X_train, X_val, X_test, y_train, y_val, y_test
+    logger.info(f"Split completed: Train {train_windows.X.shape}, Val {val_windows.X.shape}, Test {test_windows.X.shape}")
+    return train_windows, val_windows, test_windows
 
 
 #======================TASKS FOR CALCULATING STATISTICS AND QUALITY===========================
 
 # @task(name='calculate_numerical_statistics')
-def calculate_numerical_statistics(df: pd.DataFrame) -> Dict[str, Any]:
+def calculate_numerical_statistics(df: pd.DataFrame, profile: DatasetProfile = None) -> Dict[str, Any]:
     logger = get_run_logger()
     logger.info("Calculating numerical statistics...")
 
-    numerical_cols = df.select_dtypes(include=['number']).columns
-    stats = {
-        'mean': df[numerical_cols].mean().tolist(),
-        'std': df[numerical_cols].std().tolist(),
-        'min': df[numerical_cols].min().tolist(),
-        'max': df[numerical_cols].max().tolist()
-    }
+    stats = (profile or profile_frame(df)).numerical_statistics()
 
     logger.info("Numerical statistics calculated successfully.")
     return stats
 
 
 # @task(name='calculate_categorical_statistics')
-def calculate_categorical_statistics(df: pd.DataFrame) -> Dict[str, Any]:
+def calculate_categorical_statistics(df: pd.DataFrame, profile: DatasetProfile = None) -> Dict[str, Any]:
     logger = get_run_logger()
     logger.info("Calculating categorical statistics...")
 
-    categorical_cols = df.select_dtypes(include=['object']).columns
-    stats = {
-        'unique': [df[col].nunique() for col in categorical_cols],
-        'top': [df[col].mode().iloc[0] if not df[col].mode().empty else None for col in categorical_cols],
-        'freq': [df[col].value_counts().iloc[0] if not df[col].value_counts().empty else None for col in categorical_cols],
-    }
+    stats = (profile or profile_frame(df)).categorical_statistics()
 
     logger.info("Categorical statistics calculated successfully.")
     return stats
 
 
-def calculate_quality(df: pd.DataFrame) -> Dict[str, Any]:
+def calculate_quality(df: pd.DataFrame, profile: DatasetProfile = None) -> Dict[str, Any]:
     logger = get_run_logger()
     logger.info("🔍 Calculating data quality metrics...")
 
-    # COMPLETENESS: % non-null values across all columns
-    completeness = (1 - df.isnull().mean().mean()) * 100
-
-    # CONSISTENCY: 1 - average uniqueness ratio across columns
-    avg_unique_ratio = (df.nunique() / df.count()).mean()
-    consistency = (1 - avg_unique_ratio) * 100
-
-    # BALANCE: average entropy-like score per column
-    balance_scores = []
-    for col in df.columns:
-        col_counts = df[col].value_counts(normalize=True)
-        if len(col_counts) <= 1:
-            balance_scores.append(0.0)
-            continue
-        std_dev = col_counts.std()
-        balance_score = (1 - std_dev) * 100
-        balance_scores.append(balance_score)
-
-    balance = sum(balance_scores) / len(balance_scores)
-
-    # Compose quality metrics
-    quality_metrics = {
-        "completeness": round(completeness, 2),
-        "consistency": round(consistency, 2),
-        "balance": round(balance, 2)
-    }
+    # Completeness, consistency and balance all come from the same profile pass
+    quality_metrics = (profile or profile_frame(df)).quality()
 
     logger.info(f"📊 Quality Scores → Completeness: {quality_metrics['completeness']}%, "
                 f"Consistency: {quality_metrics['consistency']}%, "
@@ -296,13 +346,14 @@ def calculate_quality(df: pd.DataFrame) -> Dict[str, Any]:
 
 
 # @task(name='calculate_features')
-def calculate_features(df: pd.DataFrame) -> List[Dict[str, Union[str, int]]]:
+def calculate_features(df: pd.DataFrame, profile: DatasetProfile = None) -> List[Dict[str, Union[str, int]]]:
     """
     Calculate the features in the dataset.
     For each column in the dataset, return its name, type, and the number of missing values.
 
     Args:
         df (pd.DataFrame): The dataset.
+        profile (DatasetProfile): Precomputed profile of ``df``, computed if not given.
 
     Returns:
         List[Dict[str, Union[str, int]]]: List of dictionaries containing feature information.
@@ -310,15 +361,10 @@ def calculate_features(df: pd.DataFrame) -> List[Dict[str, Union[str, int]]]:
     logger = get_run_logger()
     logger.info("Calculating features information...")
 
-    features = []
-    for col in df.columns:
-        feature_info = {
-            'name': col,
-            'type': str(df[col].dtype),
-            'missing': df[col].isna().sum(),
-            'description': f'Feature {col}'  # You can extend this with custom descriptions if needed
-        }
-        features.append(feature_info)
+    features = [
+        {**feature_info, 'description': f'Feature {feature_info["name"]}'}  # You can extend this with custom descriptions if needed
+        for feature_info in (profile or profile_frame(df)).features()
+    ]
 
     logger.info("Feature information calculated successfully.")
     return features
@@ -346,24 +392,32 @@ def increment_version(version: str) -> str:
 
 # @task(name='generate_metadata_timeseries')
 # Function to generate metadata for time series datasets
-def generate_metadata_timeseries(df: pd.DataFrame, ds_id, ds_name: str, ds_author: str, data_type: str, ds_cfg: Dict[str, Any], updated_file_path: str) -> Dict[str, Any]:
+def generate_metadata_timeseries(df: pd.DataFrame, ds_id, ds_name: str, ds_author: str, data_type: str, ds_cfg: Dict[str, Any], updated_file_path: str,
+                                 profile: Union[DatasetProfile, StreamingProfile] = None) -> Dict[str, Any]:
     """
     Generates metadata for time series datasets, including statistics, quality measures, and sample data.
+    With a ``StreamingProfile`` (built chunk by chunk) ``df`` may be None; the preview rows come from the profile.
     """
     # Log process
     print(f"Generating metadata for dataset: {ds_name}")
-    
-     # Kiểm tra nếu df là None hoặc DataFrame trống
-    if df is None or df.empty:
-        raise ValueError("❌ DataFrame is empty or None. Cannot generate metadata.")
 
-    # Compute dataset statistics and quality metrics
-    numerical_stats = calculate_numerical_statistics(df)
-    categorical_stats = calculate_categorical_statistics(df)
-    quality_metrics = calculate_quality(df)
+    if profile is None:
+        # Kiểm tra nếu df là None hoặc DataFrame trống
+        if df is None or df.empty:
+            raise ValueError("❌ DataFrame is empty or None. Cannot generate metadata.")
+
+        # Profile the frame once; statistics, quality and features are all views of it
+        profile = profile_frame(df)
+    elif profile.n_rows == 0:
+        raise ValueError("❌ Dataset profile is empty. Cannot generate metadata.")
+
+    preview = df if df is not None else profile.preview
+    numerical_stats = calculate_numerical_statistics(df, profile)
+    categorical_stats = calculate_categorical_statistics(df, profile)
+    quality_metrics = calculate_quality(df, profile)
 
     # Extract feature details (column names and missing values)
-    features = [{"name": col, "type": str(df[col].dtype), "missing": df[col].isna().sum()} for col in df.columns]
+    features = profile.features()
 
     # Get dataset file size and last modification date
     file_path = updated_file_path if updated_file_path else ds_cfg.get('file_path', '')
@@ -408,8 +462,8 @@ def generate_metadata_timeseries(df: pd.DataFrame, ds_id, ds_name: str, ds_autho
         "type": data_type,
         "size": size,
         "lastModified": last_modified,
-        "rows": len(df),
-        "columns": len(df.columns),
+        "rows": profile.n_rows,
+        "columns": len(profile.columns),
         "status": "completed",
         "progress": 100,
         "tags": ds_cfg.get("dvc_tag", []),
@@ -428,8 +482,8 @@ def generate_metadata_timeseries(df: pd.DataFrame, ds_id, ds_name: str, ds_autho
             "categorical": categorical_stats
         },
         "quality": quality_metrics,
-        "columns_list": df.columns.tolist(),
-        "data": df.head(50).to_dict(orient='records'),  # Store first 50 rows for preview
+        "columns_list": list(profile.columns),
+        "data": preview.head(50).to_dict(orient='records'),  # Store first 50 rows for preview
         "versions": version_info
     }
 
@@ -0,0 +1,22 @@
+# 📁 tasks/timeseries/data/dtypes.py
+import numpy as np
+
+# Every window, batch and model input of the time-series pipeline is float32
+COMPUTE_DTYPE = np.float32
+
+# Scaled series may be stored in half precision: values live in [0, 1], where float16
+# keeps ~3 significant digits. They are widened to COMPUTE_DTYPE one batch at a time.
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16}
+DEFAULT_STORAGE_DTYPE = "float32"
+
+
+def storage_dtype(name: str = None) -> np.dtype:
+    name = name or DEFAULT_STORAGE_DTYPE
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype '{name}'. Choose one of {list(STORAGE_DTYPES)}.")
+    return np.dtype(STORAGE_DTYPES[name])
+
+
+def as_compute(array) -> np.ndarray:
+    """Array in COMPUTE_DTYPE; no copy when it already is."""
+    return np.asarray(array, dtype=COMPUTE_DTYPE)
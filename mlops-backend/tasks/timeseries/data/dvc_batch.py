@@ -0,0 +1,104 @@
+# 📁 tasks/timeseries/data/dvc_batch.py
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from dvc.repo import Repo
+from dvc.exceptions import NotDvcRepoError
+import git
+
+logger = logging.getLogger(__name__)
+
+_active: Dict[str, "DvcBatch"] = {}
+_lock = threading.Lock()
+
+
+def open_dvc_repo(ds_root: str) -> Repo:
+    """
+    Open the DVC repo containing ``ds_root`` in-process (``Repo`` searches the parent directories
+    for its root); only when there is none, initialize one without SCM at ``ds_root``.
+    """
+    try:
+        return Repo(ds_root)
+    except NotDvcRepoError:
+        Repo.init(ds_root, no_scm=True)
+        logger.info(f"DVC repository initialized without SCM at {ds_root}.")
+        return Repo(ds_root)
+
+
+def active_batch(ds_root: str) -> Optional["DvcBatch"]:
+    with _lock:
+        return _active.get(os.path.abspath(ds_root))
+
+
+class DvcBatch:
+    """
+    Collects every artifact a flow run writes under ``ds_root`` and versions them together:
+    one in-process ``dvc add`` for all paths and, when ``ds_root`` lives in a git work tree,
+    one git commit of the resulting ``.dvc`` files.
+
+    While the batch is open (``with DvcBatch(root, message):``) ``save_data_to_dvc`` only
+    registers paths; everything is committed when the block exits without an exception.
+    """
+
+    def __init__(self, ds_root: str, message: str = None):
+        self.ds_root = os.path.abspath(ds_root)
+        self.message = message or "Add artifacts to DVC"
+        self.paths: List[str] = []
+
+    def add(self, path: str):
+        path = os.path.abspath(path)
+        if path not in self.paths:
+            self.paths.append(path)
+
+    def __enter__(self) -> "DvcBatch":
+        with _lock:
+            _active[self.ds_root] = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with _lock:
+            _active.pop(self.ds_root, None)
+        if exc_type is None:
+            self.commit()
+        else:
+            # A failed run must not version a partial dataset
+            logger.warning(f"⚠️ Flow failed; not versioning {len(self.paths)} collected artifacts: {self.message}")
+            self.paths = []
+        return False
+
+    def commit(self) -> List[str]:
+        paths = [path for path in self.paths if os.path.exists(path)]
+        self.paths = []
+        if not paths:
+            return []
+
+        repo = open_dvc_repo(self.ds_root)
+        try:
+            repo.add(paths)
+        except Exception as e:
+            logger.error(f"Error occurred while adding files to DVC: {e}")
+            return []
+        finally:
+            repo.close()
+
+        self._git_commit(paths)
+        logger.info(f"📦 Versioned {len(paths)} artifacts with one DVC add: {self.message}")
+        return paths
+
+    def _git_commit(self, paths: List[str]):
+        try:
+            git_repo = git.Repo(self.ds_root, search_parent_directories=True)
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+            # dvc init --no-scm: there is nothing to commit
+            return
+
+        tracked = [path + ".dvc" for path in paths]
+        tracked += {os.path.join(os.path.dirname(path), ".gitignore") for path in paths}
+        tracked = [os.path.relpath(path, git_repo.working_tree_dir) for path in tracked if os.path.exists(path)]
+        try:
+            git_repo.index.add(tracked)
+            git_repo.index.commit(self.message)
+        except git.GitCommandError as e:
+            logger.error(f"Error occurred while committing DVC files: {e}")
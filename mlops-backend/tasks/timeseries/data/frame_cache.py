@@ -0,0 +1,114 @@
+# 📁 tasks/timeseries/data/frame_cache.py
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FRAME_CACHE_DIR = ".frame_cache"
+MAX_CACHED_FRAMES = 4
+
+_frames: "OrderedDict[str, Tuple[pd.DataFrame, Dict[str, Any]]]" = OrderedDict()
+_hashes: Dict[Tuple[str, int, float], str] = {}
+_lock = threading.Lock()
+
+
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Streaming SHA-256 of a file. Hashes are memoized per (path, size, mtime) so the
+    tasks of one flow run do not re-read a multi-GB upload to compute the same key.
+    """
+    stat = os.stat(file_path)
+    stamp = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+    with _lock:
+        if stamp in _hashes:
+            return _hashes[stamp]
+
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _lock:
+        _hashes[stamp] = digest
+    return digest
+
+
+def remember_file_sha256(file_path: str, digest: str):
+    """Record a known digest, e.g. for a hardlink or copy of an already hashed file."""
+    stat = os.stat(file_path)
+    with _lock:
+        _hashes[(os.path.abspath(file_path), stat.st_size, stat.st_mtime)] = digest
+
+
+def _spill_paths(spill_dir: str, key: str) -> Tuple[str, str]:
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(spill_dir, f"{name}.feather"), os.path.join(spill_dir, f"{name}.json")
+
+
+def get_frame(key: str, spill_dir: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """
+    Look a parsed frame up in memory first, then in the on-disk Feather spill.
+    Callers receive a shallow copy, so adding or replacing columns never touches the cached frame.
+    """
+    with _lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            frame, info = _frames[key]
+            return frame.copy(deep=False), dict(info)
+
+    if spill_dir is None:
+        return None
+
+    frame_path, info_path = _spill_paths(spill_dir, key)
+    if not (os.path.exists(frame_path) and os.path.exists(info_path)):
+        return None
+
+    try:
+        frame = pd.read_feather(frame_path)
+        with open(info_path, "r") as f:
+            info = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable frame cache entry {frame_path}: {e}")
+        return None
+
+    _remember(key, frame, info)
+    return frame.copy(deep=False), dict(info)
+
+
+def put_frame(key: str, frame: pd.DataFrame, info: Dict[str, Any], spill_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Cache a parsed frame in memory and spill it to ``spill_dir`` as Feather.
+    The index is reset so the memory and disk copies are identical.
+    """
+    frame = frame.reset_index(drop=True)
+    _remember(key, frame, info)
+
+    if spill_dir is not None:
+        os.makedirs(spill_dir, exist_ok=True)
+        frame_path, info_path = _spill_paths(spill_dir, key)
+        try:
+            frame.to_feather(frame_path + ".tmp")
+            os.replace(frame_path + ".tmp", frame_path)
+            with open(info_path, "w") as f:
+                json.dump(info, f)
+        except Exception as e:
+            # Spilling is an optimization only (e.g. pyarrow missing or mixed-type object columns)
+            logger.warning(f"⚠️ Could not spill frame cache entry to {spill_dir}: {e}")
+
+    return frame.copy(deep=False)
+
+
+def _remember(key: str, frame: pd.DataFrame, info: Dict[str, Any]):
+    with _lock:
+        _frames[key] = (frame, dict(info))
+        _frames.move_to_end(key)
+        while len(_frames) > MAX_CACHED_FRAMES:
+            _frames.popitem(last=False)
@@ -0,0 +1,273 @@
+# 📁 tasks/timeseries/data/incremental.py
+import io
+import os
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from prefect import get_run_logger
+
+from tasks.timeseries.data.ingest import _csv_delimiter, read_columns
+from tasks.timeseries.data.frame_cache import file_sha256
+from tasks.timeseries.data.split_store import SPLIT_STORE_FILE, SplitStore
+from tasks.timeseries.data.windows import WindowedSeries
+from tasks.timeseries.data.dtypes import DEFAULT_STORAGE_DTYPE, as_compute
+
+LINEAGE_KEY = "lineage"
+_MASK64 = (1 << 64) - 1
+
+
+# ---------- Lineage (stored in the split store manifest of every version) ----------
+
+def row_digest(frame: pd.DataFrame, date_col: str, target_col: str, offset: int = 0) -> Dict[str, int]:
+    """
+    Extendable digest of the (date, target) rows: the plain and the position-weighted sum of
+    the 64-bit row hashes. Digests of consecutive row ranges add up, so the digest of a
+    version can be extended with only its appended rows.
+    """
+    # Normalize dtypes so the digest does not depend on how the rows were parsed
+    frame = frame[[date_col, target_col]]
+    if pd.api.types.is_datetime64_any_dtype(frame[date_col]):
+        frame = frame.astype({date_col: "datetime64[ns]"})
+    try:
+        frame = frame.astype({target_col: np.float64})
+    except (TypeError, ValueError):
+        pass
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+    positions = np.arange(offset + 1, offset + len(hashes) + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        return {
+            "sum": int(hashes.sum(dtype=np.uint64)),
+            "weighted": int((hashes * positions).sum(dtype=np.uint64)),
+        }
+
+
+def _add_digests(left: Dict[str, int], right: Dict[str, int]) -> Dict[str, int]:
+    return {key: (left[key] + right[key]) & _MASK64 for key in left}
+
+
+def target_stats(values: pd.Series) -> Dict[str, float]:
+    """Running sums of the finite and the non-zero targets (the values ``prepare_time_series_data`` keeps as is)."""
+    values = pd.to_numeric(values, errors="coerce").replace([np.inf, -np.inf], np.nan).dropna()
+    non_zero = values[values != 0]
+    return {
+        "count": int(len(values)),
+        "sum": float(values.sum()),
+        "non_zero_count": int(len(non_zero)),
+        "non_zero_sum": float(non_zero.sum()),
+    }
+
+
+def build_lineage(file_path: str, data_train: pd.DataFrame, date_col: str, target_col: str) -> Dict[str, Any]:
+    """Lineage of a version built from scratch; ``data_train`` is the raw (date, target) frame."""
+    dates = data_train[date_col].dropna()
+    is_datetime = pd.api.types.is_datetime64_any_dtype(dates) and not dates.empty
+    return {
+        "file": os.path.basename(file_path),
+        "sha256": file_sha256(file_path),
+        "size": os.path.getsize(file_path),
+        "date_col": date_col,
+        "target_col": target_col,
+        "rows": len(data_train),
+        "row_digest": row_digest(data_train, date_col, target_col),
+        "first_timestamp": str(dates.min()) if is_datetime else None,
+        "last_timestamp": str(dates.max()) if is_datetime else None,
+        "sample_rate": str(dates.sort_values().diff().dropna().median()) if is_datetime and len(dates) > 1 else None,
+        "target_stats": target_stats(data_train[target_col]),
+    }
+
+
+def needs_no_filling(stats: Dict[str, float], rows: int) -> bool:
+    """
+    True when none of ``rows`` targets was missing, infinite or zero. Otherwise the scaled series holds
+    mean / non-zero-mean fills of those rows, and the fills change as soon as rows are added.
+    """
+    return stats["count"] == rows and stats["non_zero_count"] == stats["count"]
+
+
+def load_lineage(version_folder: str) -> Optional[Dict[str, Any]]:
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if not os.path.exists(store_path):
+        return None
+    return SplitStore(store_path).manifest.get(LINEAGE_KEY)
+
+
+def is_same_source(version_folder: str, digest: str, sequences: int, feature_cols: List[str] = None,
+                   horizon: int = 1, dtype: str = None, date_col: str = None, target_col: str = None) -> bool:
+    """
+    True when ``version_folder`` was built from a file with SHA-256 ``digest``, the same date/target
+    columns and the same window layout.
+    """
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if not os.path.exists(store_path):
+        return False
+    manifest = SplitStore(store_path).manifest
+    lineage = manifest.get(LINEAGE_KEY)
+    return lineage is not None and lineage["sha256"] == digest and manifest["sequences"] == sequences \
+        and lineage.get("date_col") == date_col and lineage.get("target_col") == target_col \
+        and manifest.get("feature_cols") == feature_cols and manifest.get("horizon", 1) == horizon \
+        and manifest.get("dtype") == (dtype or DEFAULT_STORAGE_DTYPE)
+
+
+# ---------- Append detection ----------
+
+class AppendedRows:
+    """New rows of an upload that extends the file of ``prev_folder`` (date column already parsed)."""
+
+    def __init__(self, prev_folder: str, lineage: Dict[str, Any], rows: pd.DataFrame, method: str):
+        self.prev_folder = prev_folder
+        self.lineage = lineage
+        self.rows = rows
+        self.method = method
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def _prefix_sha256(file_path: str, size: int, chunk_size: int = 1 << 20) -> str:
+    hasher = hashlib.sha256()
+    remaining = size
+    with open(file_path, "rb") as f:
+        while remaining > 0 and (chunk := f.read(min(chunk_size, remaining))):
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher.hexdigest()
+
+
+def _read_byte_tail(file_path: str, offset: int) -> pd.DataFrame:
+    # The appended bytes are parsed with the header line of the file, nothing before them is read
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            raise ValueError("previous file does not end with a newline")
+        tail = f.read()
+    return pd.read_csv(io.BytesIO(header + tail), delimiter=_csv_delimiter(file_path))
+
+
+def find_appended_rows(file_path: str, prev_folder: str, date_col: str, target_col: str,
+                       sequences: int, horizon: int = 1) -> Optional[AppendedRows]:
+    """
+    Return the rows appended to the previous version's file, or None if ``file_path`` is not
+    an append-only extension of it (a full rebuild is needed then).
+
+    CSV/TXT uploads whose leading bytes hash to the previous file's SHA-256 only parse the new
+    bytes. Otherwise the file is parsed and its first rows must match the previous row digest.
+    Either way the new rows must not be older than the previous timestamp watermark, and neither
+    the previous nor the new targets may need filling: a rebuild would fill them with the mean of
+    all rows, so extending the stored series would not give the same result.
+    """
+    logger = get_run_logger()
+    lineage = load_lineage(prev_folder)
+    if lineage is None:
+        logger.info(f"ℹ️ No lineage in {prev_folder}; building the version from scratch.")
+        return None
+
+    if (lineage.get("date_col"), lineage.get("target_col")) != (date_col, target_col):
+        logger.info("ℹ️ Date/target column changed (or not recorded) since the previous version; full rebuild.")
+        return None
+
+    manifest = SplitStore(os.path.join(prev_folder, SPLIT_STORE_FILE)).manifest
+    if manifest["sequences"] != sequences or manifest.get("horizon", 1) != horizon \
+            or "targets" in manifest["arrays"] or lineage.get("last_timestamp") is None:
+        logger.info("ℹ️ Window layout changed or previous version has no timestamp watermark; full rebuild.")
+        return None
+
+    if lineage.get("target_stats") is None or not needs_no_filling(lineage["target_stats"], lineage["rows"]):
+        logger.info("ℹ️ Previous version has filled (missing or zero) targets; full rebuild.")
+        return None
+
+    size = os.path.getsize(file_path)
+    rows, method = None, None
+    if os.path.splitext(file_path)[1].lower() in (".csv", ".txt") and size >= lineage["size"] \
+            and _prefix_sha256(file_path, lineage["size"]) == lineage["sha256"]:
+        try:
+            rows, method = _read_byte_tail(file_path, lineage["size"]), "byte_prefix"
+        except (ValueError, pd.errors.ParserError) as e:
+            logger.info(f"ℹ️ Byte-prefix match but tail not parseable ({e}); checking row digest.")
+
+    if rows is None:
+        data = read_columns(file_path)
+        if date_col not in data.columns or target_col not in data.columns:
+            return None
+        if data[date_col].notna().all():
+            data[date_col] = pd.to_datetime(data[date_col], errors="coerce")
+        data = data.sort_values(by=date_col, ascending=True, na_position="last")
+        if len(data) < lineage["rows"] or row_digest(data.iloc[:lineage["rows"]], date_col, target_col) != lineage["row_digest"]:
+            logger.info("ℹ️ Upload is not an append-only extension of the previous version; full rebuild.")
+            return None
+        rows, method = data.iloc[lineage["rows"]:].copy(), "row_digest"
+
+    if date_col not in rows.columns or target_col not in rows.columns:
+        return None
+    if len(rows):
+        if rows[date_col].isna().any():
+            return None
+        rows[date_col] = pd.to_datetime(rows[date_col], errors="coerce")
+        if rows[date_col].isna().any() or rows[date_col].min() < pd.Timestamp(lineage["last_timestamp"]):
+            logger.info("ℹ️ Appended rows are older than the previous watermark; full rebuild.")
+            return None
+        if not needs_no_filling(target_stats(rows[target_col]), len(rows)):
+            logger.info("ℹ️ Appended rows have missing or zero targets; full rebuild.")
+            return None
+        rows = rows.sort_values(by=date_col, ascending=True)
+
+    logger.info(f"➕ Detected {len(rows)} appended rows via {method} on top of {prev_folder}")
+    return AppendedRows(prev_folder, lineage, rows.reset_index(drop=True), method)
+
+
+# ---------- Extending the stored series ----------
+
+def extend_windowed_series(appended: AppendedRows, file_path: str, date_col: str, target_col: str):
+    """
+    Extend the previous version's scaled series with the appended rows.
+
+    ``find_appended_rows`` only returns rows when no target needs filling, so the series equals a
+    rebuild from the whole file: the scaler is extended with ``partial_fit``, and when the min/max
+    range grows the stored series is mapped to the new range with one affine transform instead of
+    rescaling the raw data. Returns ``(windows, scaler, lineage)``.
+    """
+    logger = get_run_logger()
+    store = SplitStore(os.path.join(appended.prev_folder, SPLIT_STORE_FILE))
+    scaler = store.scaler
+    old_series = store.array("series")
+    lineage = appended.lineage
+
+    stats = target_stats(appended.rows[target_col])
+    stats = {key: lineage["target_stats"][key] + stats[key] for key in stats}
+    values = pd.to_numeric(appended.rows[target_col]).to_numpy(dtype=np.float64).reshape(-1, 1)
+
+    old_scale, old_min = scaler.scale_.copy(), scaler.min_.copy()
+    if len(values):
+        scaler.partial_fit(values)
+
+    ratio = scaler.scale_[0] / old_scale[0]
+    shift = scaler.min_[0] - old_min[0] * ratio
+    if ratio != 1.0 or shift != 0.0:
+        logger.info(f"📏 Target range grew; remapping stored series (x * {ratio:.6g} + {shift:.6g})")
+        series = np.asarray(old_series, dtype=np.float64) * ratio + shift
+    else:
+        series = np.asarray(old_series, dtype=np.float64)
+
+    new_values = np.nan_to_num(scaler.transform(values)[:, 0], nan=0.0, posinf=0.0, neginf=0.0) if len(values) else np.empty(0)
+    # The remap runs in float64 on the (possibly float16) stored series; the result is float32 again
+    windows = WindowedSeries(as_compute(np.concatenate([series, new_values])), store.manifest["sequences"],
+                             horizon=store.manifest.get("horizon", 1))
+
+    new_lineage = {
+        "file": os.path.basename(file_path),
+        "sha256": file_sha256(file_path),
+        "size": os.path.getsize(file_path),
+        "date_col": date_col,
+        "target_col": target_col,
+        "rows": lineage["rows"] + len(appended),
+        "row_digest": _add_digests(lineage["row_digest"], row_digest(appended.rows, date_col, target_col, offset=lineage["rows"])),
+        "first_timestamp": lineage.get("first_timestamp"),
+        "last_timestamp": str(appended.rows[date_col].max()) if len(appended) else lineage["last_timestamp"],
+        # Median step of the original series; appends continue at the same rate
+        "sample_rate": lineage.get("sample_rate"),
+        "target_stats": stats,
+    }
+    logger.info(f"✅ Extended series from {len(old_series)} to {len(windows.series)} points")
+    return windows, scaler, new_lineage
@@ -0,0 +1,138 @@
+# 📁 tasks/timeseries/data/ingest.py
+import os
+import logging
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# Optional Arrow imports: without pyarrow every read falls back to pandas
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_EXTENSION = ".parquet"
+DEFAULT_CHUNK_ROWS = 200_000
+CSV_BLOCK_SIZE = 64 << 20  # bytes per streamed CSV block
+
+
+def _csv_delimiter(file_path: str) -> str:
+    return '\t' if os.path.splitext(file_path)[1].lower() == '.txt' else ','
+
+
+def columnar_path(file_path: str, out_dir: Optional[str] = None) -> str:
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(out_dir or os.path.dirname(file_path), stem + COLUMNAR_EXTENSION)
+
+
+def _arrow_table(data: pd.DataFrame):
+    """Arrow table of ``data``; object columns mixing types (e.g. ints and strings) are stored as strings."""
+    for col in data.columns[data.dtypes == object]:
+        if pd.api.types.infer_dtype(data[col], skipna=True).startswith("mixed"):
+            data[col] = data[col].where(data[col].isna(), data[col].astype(str))
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def convert_to_columnar(file_path: str, out_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Convert an uploaded CSV/TXT/XLSX file into a Parquet file next to it (or in ``out_dir``).
+
+    CSV/TXT files are streamed block by block, so the source never has to fit in memory.
+    The conversion is skipped when an up-to-date Parquet file already exists.
+    Returns None when pyarrow is not available or the file cannot be stored as Arrow columns,
+    in which case callers read the source file with pandas.
+    """
+    if pa is None:
+        return None
+
+    target_path = columnar_path(file_path, out_dir)
+    if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(file_path):
+        return target_path
+
+    tmp_path = target_path + ".tmp"
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    if file_extension not in ('.csv', '.txt', '.xlsx'):
+        raise ValueError(f"Unsupported file type: {file_extension}")
+
+    try:
+        if file_extension == '.xlsx':
+            pq.write_table(_arrow_table(pd.read_excel(file_path, engine='openpyxl')), tmp_path)
+        else:
+            try:
+                reader = pa_csv.open_csv(
+                    file_path,
+                    read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+                    parse_options=pa_csv.ParseOptions(delimiter=_csv_delimiter(file_path)),
+                )
+                with pq.ParquetWriter(tmp_path, reader.schema) as writer:
+                    for batch in reader:
+                        writer.write_table(pa.Table.from_batches([batch]))
+            except pa.ArrowInvalid as e:
+                # Type inference is done on the first block; mixed columns further down need pandas
+                logger.warning(f"⚠️ Streaming CSV conversion failed ({e}). Falling back to pandas.")
+                data = pd.read_csv(file_path, delimiter=_csv_delimiter(file_path), low_memory=False)
+                pq.write_table(_arrow_table(data), tmp_path)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.warning(f"⚠️ No columnar copy for {file_path} ({e}). Reading it with pandas.")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    os.replace(tmp_path, target_path)
+    logger.info(f"🗜️ Converted {file_path} to columnar file {target_path}")
+    return target_path
+
+
+def _existing_columns(parquet_file, columns: Optional[List[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    available = set(parquet_file.schema_arrow.names)
+    return [col for col in columns if col in available]
+
+
+def read_columns(file_path: str, columns: Optional[List[str]] = None, out_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a file through its columnar copy, decoding only ``columns`` (all columns if None).
+    Requested columns that do not exist in the file are simply not returned.
+    """
+    parquet_path = convert_to_columnar(file_path, out_dir)
+    if parquet_path is not None:
+        parquet_file = pq.ParquetFile(parquet_path)
+        return parquet_file.read(columns=_existing_columns(parquet_file, columns)).to_pandas()
+
+    file_extension = os.path.splitext(file_path)[1].lower()
+    usecols = (lambda col: col in columns) if columns is not None else None
+    if file_extension in ('.csv', '.txt'):
+        return pd.read_csv(file_path, delimiter=_csv_delimiter(file_path), usecols=usecols)
+    if file_extension == '.xlsx':
+        return pd.read_excel(file_path, engine='openpyxl', usecols=usecols)
+    raise ValueError(f"Unsupported file type: {file_extension}")
+
+
+def iter_chunks(file_path: str, columns: Optional[List[str]] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                out_dir: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield the file as DataFrames of at most ``chunk_rows`` rows, for files larger than memory.
+    """
+    parquet_path = convert_to_columnar(file_path, out_dir)
+    if parquet_path is not None:
+        parquet_file = pq.ParquetFile(parquet_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=_existing_columns(parquet_file, columns)):
+            yield batch.to_pandas()
+        return
+
+    file_extension = os.path.splitext(file_path)[1].lower()
+    usecols = (lambda col: col in columns) if columns is not None else None
+    if file_extension in ('.csv', '.txt'):
+        yield from pd.read_csv(file_path, delimiter=_csv_delimiter(file_path), usecols=usecols, chunksize=chunk_rows)
+    elif file_extension == '.xlsx':
+        data = pd.read_excel(file_path, engine='openpyxl', usecols=usecols)
+        for start in range(0, len(data), chunk_rows):
+            yield data.iloc[start:start + chunk_rows]
+    else:
+        raise ValueError(f"Unsupported file type: {file_extension}")
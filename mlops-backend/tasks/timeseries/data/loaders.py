@@ -0,0 +1,144 @@
+# 📁 tasks/timeseries/data/loaders.py
+import math
+import numpy as np
+
+from tasks.timeseries.data.dtypes import COMPUTE_DTYPE
+from tasks.timeseries.data.windows import strided_span
+
+# Optional framework imports: each loader is only needed by its own trainer
+try:
+    import torch
+    from torch.utils.data import Dataset
+except ImportError:
+    torch = None
+    Dataset = object
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+# Seed of the Keras training shuffle; epoch orders are derived from it statelessly
+SHUFFLE_SEED = 42
+
+
+def _as_model_input(batch: np.ndarray) -> np.ndarray:
+    # Univariate windows are stored as (N, seq); models expect (N, seq, features)
+    if batch.ndim == 2:
+        batch = batch[..., np.newaxis]
+    return np.ascontiguousarray(batch, dtype=COMPUTE_DTYPE)
+
+
+class TorchWindowDataset(Dataset):
+    """
+    Serves windows from a (possibly strided) window array without materializing it.
+    Each item is copied out of the view only when the DataLoader asks for it.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray = None):
+        self.X = X
+        self.y = y
+
+    def __len__(self):
+        return len(self.X)
+
+    def __getitem__(self, idx):
+        # torch.tensor copies: float32 windows over a read-only memmap are not converted otherwise
+        x = torch.tensor(_as_model_input(self.X[idx:idx + 1])[0])
+        if self.y is None:
+            return (x,)
+        return x, torch.tensor(np.asarray(self.y[idx], dtype=COMPUTE_DTYPE))
+
+
+class TorchWindowBatches(Dataset):
+    """
+    Batch-level variant of ``TorchWindowDataset`` for DataLoader workers. It is indexed with a
+    list of window indices (use ``batch_size=None`` and a ``BatchSampler``) and gathers the whole
+    batch with one NumPy fancy index instead of collating per-window tensors.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray = None):
+        self.X = X
+        self.y = y
+
+    def __len__(self):
+        return len(self.X)
+
+    def __getitem__(self, indices):
+        indices = np.asarray(indices)
+        xb = torch.from_numpy(_as_model_input(self.X[indices]))
+        if self.y is None:
+            return (xb,)
+        return xb, torch.from_numpy(np.asarray(self.y[indices], dtype=COMPUTE_DTYPE))
+
+
+def _tf_window_gather(array: np.ndarray):
+    """
+    Batch gather for a (strided) window view: the series behind the view becomes one tensor and
+    ``gather(idx)`` rebuilds ``array[idx]`` from it with ``tf.gather`` (element offsets per window).
+    """
+    span, shape, strides = strided_span(array)
+    series = tf.constant(np.asarray(span, dtype=COMPUTE_DTYPE))
+
+    # Offsets of every element of one window, relative to the window start: shape[1:]
+    offsets = np.zeros(shape[1:], dtype=np.int64)
+    for axis, (n, stride) in enumerate(zip(shape[1:], strides[1:])):
+        axis_shape = [1] * (len(shape) - 1)
+        axis_shape[axis] = n
+        offsets = offsets + (np.arange(n, dtype=np.int64) * stride).reshape(axis_shape)
+    offsets = tf.constant(offsets)
+    window_shape = [-1] + [1] * (len(shape) - 1)
+    window_stride = strides[0]
+
+    def gather(idx):
+        return tf.gather(series, tf.reshape(idx * window_stride, window_shape) + offsets)
+
+    return gather
+
+
+def keras_window_dataset(
+    X: np.ndarray,
+    y: np.ndarray = None,
+    batch_size: int = 128,
+    shuffle: bool = False,
+    seed: int = SHUFFLE_SEED,
+    epochs: int = 1,
+    initial_epoch: int = 0,
+):
+    """
+    ``tf.data`` pipeline over window views for ``model.fit``/``predict``. Returns ``(dataset, steps)``.
+
+    Only the series behind the windows is held as a tensor, so memory is O(series) rather than
+    O(N·seq); batches are gathered in parallel map calls and prefetched while the model trains.
+    With ``shuffle``, the dataset covers epochs ``initial_epoch..epochs-1``, each in a permutation
+    keyed on ``(seed, epoch)``: pass ``steps_per_epoch=steps`` to ``fit`` so the iterator is not
+    reset, and a resumed run sees exactly the batches it would have seen.
+    """
+    n = len(X)
+    steps = math.ceil(n / batch_size)
+
+    if shuffle:
+        def epoch_batches(epoch):
+            keys = tf.random.stateless_uniform([n], seed=tf.stack([tf.constant(seed, tf.int64), epoch]))
+            order = tf.cast(tf.argsort(keys), tf.int64)
+            return tf.data.Dataset.from_tensor_slices(order).batch(batch_size)
+        indices = tf.data.Dataset.range(initial_epoch, epochs).flat_map(epoch_batches)
+    else:
+        indices = tf.data.Dataset.range(n).batch(batch_size)
+
+    gather_x = _tf_window_gather(X)
+    univariate = X.ndim == 2
+    gather_y = _tf_window_gather(y) if y is not None else None
+
+    def load(idx):
+        xb = gather_x(idx)
+        if univariate:
+            # Univariate windows are stored as (N, seq); models expect (N, seq, features)
+            xb = tf.expand_dims(xb, -1)
+        if gather_y is None:
+            return xb
+        return xb, gather_y(idx)
+
+    # No .cache(): cached batches would materialize every window again; the series is already in memory
+    dataset = indices.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    return dataset.prefetch(tf.data.AUTOTUNE), steps
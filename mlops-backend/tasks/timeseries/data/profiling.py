@@ -0,0 +1,180 @@
+# 📁 tasks/timeseries/data/profiling.py
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+IQR_QUANTILES = (0.25, 0.75)
+
+
+class DatasetProfile:
+    """
+    Everything the validation report and the dataset metadata need, computed in one pass.
+
+    All columns are encoded into a single float64 key block (numeric values as-is, every
+    other column as sorted factorize codes). The block is sorted once along axis 0; from
+    the sorted block we read quantiles, min/max, cardinality, value counts (for balance)
+    and the most frequent category of every column without any per-column pandas scans.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = list(df.columns)
+        self.n_rows = len(df)
+
+        numerical_cols = df.select_dtypes(include=['number']).columns
+        categorical_cols = df.select_dtypes(include=['object']).columns
+        self.numerical_columns = list(numerical_cols)
+        self.categorical_columns = list(categorical_cols)
+
+        # ---- Encode every column into one key block ----
+        keys = np.empty((self.n_rows, len(self.columns)), dtype=np.float64)
+        uniques = {}
+        for j, col in enumerate(self.columns):
+            if col in numerical_cols:
+                keys[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                try:
+                    codes, values = pd.factorize(df[col], sort=True)
+                except TypeError:
+                    # Unorderable mixed objects: keep first-seen order
+                    codes, values = pd.factorize(df[col], sort=False)
+                codes = codes.astype(np.float64)
+                codes[codes < 0] = np.nan
+                keys[:, j] = codes
+                uniques[col] = values
+
+        valid = ~np.isnan(keys)
+        self.valid_counts = valid.sum(axis=0)
+        self.null_counts = self.n_rows - self.valid_counts
+
+        # ---- One sort for all columns (NaN goes last) ----
+        sorted_keys = np.sort(keys, axis=0)
+        rows = np.arange(self.n_rows)[:, None]
+        in_range = rows < self.valid_counts[None, :]
+
+        is_new = np.zeros_like(in_range)
+        if self.n_rows:
+            is_new[0] = in_range[0]
+            is_new[1:] = (sorted_keys[1:] != sorted_keys[:-1]) & in_range[1:]
+        self.nunique = is_new.sum(axis=0)
+
+        # Run lengths of equal values, numbered globally so one bincount serves every column
+        run_offsets = np.concatenate(([0], np.cumsum(self.nunique)[:-1]))
+        run_ids = np.cumsum(is_new, axis=0) - 1 + run_offsets[None, :]
+        run_counts = np.bincount(run_ids[in_range], minlength=int(self.nunique.sum()))
+        run_columns = np.repeat(np.arange(len(self.columns)), self.nunique)
+        self.sum_sq_counts = np.bincount(run_columns, weights=run_counts.astype(np.float64) ** 2,
+                                         minlength=len(self.columns))
+
+        # Most frequent value per column (the first, i.e. smallest, run wins ties like Series.mode)
+        self.top_counts = np.zeros(len(self.columns), dtype=np.int64)
+        self.top_keys = np.full(len(self.columns), np.nan)
+        if run_counts.size:
+            order = np.lexsort((np.arange(run_counts.size), -run_counts, run_columns))
+            first_of_column = order[np.searchsorted(run_columns[order], np.flatnonzero(self.nunique))]
+            run_start_rows = np.flatnonzero(is_new.T.ravel()) % max(self.n_rows, 1)
+            has_values = np.flatnonzero(self.nunique)
+            self.top_counts[has_values] = run_counts[first_of_column]
+            self.top_keys[has_values] = sorted_keys[run_start_rows[first_of_column], has_values]
+
+        # ---- Numeric statistics ----
+        num_idx = [self.columns.index(col) for col in self.numerical_columns]
+        block = keys[:, num_idx]
+        n_valid = self.valid_counts[num_idx]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums = np.nansum(block, axis=0)
+            self.mean = np.where(n_valid > 0, sums / n_valid, np.nan)
+            sq_dev = np.nansum((block - self.mean) ** 2, axis=0)
+            self.std = np.where(n_valid > 1, np.sqrt(sq_dev / (n_valid - 1)), np.nan)
+        sorted_num = sorted_keys[:, num_idx]
+        self.min = self._sorted_at(sorted_num, n_valid, 0.0)
+        self.max = self._sorted_at(sorted_num, n_valid, 1.0)
+        q1, q3 = (self._sorted_at(sorted_num, n_valid, q) for q in IQR_QUANTILES)
+
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+        with np.errstate(invalid='ignore'):
+            self.outlier_counts = ((block < lower_bound) | (block > upper_bound)).sum(axis=0)
+
+        # ---- Categorical statistics ----
+        self.top_values = []
+        for col in self.categorical_columns:
+            j = self.columns.index(col)
+            self.top_values.append(None if np.isnan(self.top_keys[j]) else uniques[col][int(self.top_keys[j])])
+
+        self.duplicate_rows = int(df.duplicated().sum())
+        self.dtypes = [str(df[col].dtype) for col in self.columns]
+
+    @staticmethod
+    def _sorted_at(sorted_block: np.ndarray, n_valid: np.ndarray, q: float) -> np.ndarray:
+        # Linear interpolation between order statistics, same as Series.quantile
+        if sorted_block.shape[1] == 0:
+            return np.empty(0)
+        pos = q * np.maximum(n_valid - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        cols = np.arange(sorted_block.shape[1])
+        lo_val = sorted_block[np.minimum(lo, max(len(sorted_block) - 1, 0)), cols] if len(sorted_block) else np.full(len(cols), np.nan)
+        hi_val = sorted_block[np.minimum(hi, max(len(sorted_block) - 1, 0)), cols] if len(sorted_block) else np.full(len(cols), np.nan)
+        values = lo_val + (hi_val - lo_val) * (pos - lo)
+        return np.where(n_valid > 0, values, np.nan)
+
+    # ---------- Views used by dataset.py ----------
+
+    def validation_report(self) -> Dict[str, Any]:
+        return {
+            "null_counts": dict(zip(self.columns, self.null_counts.tolist())),
+            "duplicate_rows": self.duplicate_rows,
+            "outliers": dict(zip(self.numerical_columns, self.outlier_counts.tolist())),
+        }
+
+    def numerical_statistics(self) -> Dict[str, Any]:
+        return {
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'min': self.min.tolist(),
+            'max': self.max.tolist(),
+        }
+
+    def categorical_statistics(self) -> Dict[str, Any]:
+        cat_idx = [self.columns.index(col) for col in self.categorical_columns]
+        return {
+            'unique': self.nunique[cat_idx].tolist(),
+            'top': self.top_values,
+            'freq': [int(self.top_counts[j]) if self.nunique[j] else None for j in cat_idx],
+        }
+
+    def quality(self) -> Dict[str, Any]:
+        n_cols = len(self.columns)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # COMPLETENESS: % non-null values across all columns
+            completeness = (1 - np.mean(self.null_counts / self.n_rows)) * 100
+
+            # CONSISTENCY: 1 - average uniqueness ratio across columns
+            unique_ratio = self.nunique / self.valid_counts
+            avg_unique_ratio = np.nanmean(unique_ratio) if np.any(~np.isnan(unique_ratio)) else np.nan
+            consistency = (1 - avg_unique_ratio) * 100
+
+            # BALANCE: std of the normalized value counts, from sum(p^2) = sum(c^2) / n^2
+            k = self.nunique.astype(np.float64)
+            sum_sq_p = self.sum_sq_counts / np.maximum(self.valid_counts, 1) ** 2
+            std_dev = np.sqrt(np.maximum(sum_sq_p - 1 / np.maximum(k, 1), 0) / np.maximum(k - 1, 1))
+            balance_scores = np.where(k <= 1, 0.0, (1 - std_dev) * 100)
+        balance = float(balance_scores.sum() / n_cols) if n_cols else 0.0
+
+        return {
+            "completeness": round(float(completeness), 2),
+            "consistency": round(float(consistency), 2),
+            "balance": round(balance, 2),
+        }
+
+    def features(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": col, "type": dtype, "missing": int(missing)}
+            for col, dtype, missing in zip(self.columns, self.dtypes, self.null_counts)
+        ]
+
+
+def profile_frame(df: pd.DataFrame) -> DatasetProfile:
+    return DatasetProfile(df)
@@ -0,0 +1,462 @@
+# 📁 tasks/timeseries/data/sketches.py
+import os
+import math
+import pickle
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SKETCH_FILE = "stats_sketch.pkl"
+TDIGEST_DELTA = 500      # t-digest compression (at most ~delta/2 centroids)
+HLL_PRECISION = 14       # 2^14 registers (~0.8% relative error)
+TOP_K_CAPACITY = 256     # Space-Saving counters (counts are exact up to this many distinct values)
+PREVIEW_ROWS = 50
+
+
+# ---------- Single-purpose mergeable sketches ----------
+
+class MomentSketch:
+    """Count, mean, M2, min and max with Welford updates and Chan's parallel merge."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        other = MomentSketch()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "MomentSketch"):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+
+class TDigest:
+    """
+    Merging t-digest. Sorted points are grouped into centroids whose width is one unit of
+    the arcsine scale function, so centroids stay tiny in the tails where outlier bounds live.
+    Grouping is done with one sort and a bincount, for both new chunks and merges.
+    """
+
+    def __init__(self, delta: float = TDIGEST_DELTA):
+        self.delta = delta
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def n(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray):
+        self._absorb(values, np.ones(len(values)))
+
+    def merge(self, other: "TDigest"):
+        self._absorb(other.means, other.weights)
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray):
+        if len(means) == 0:
+            return
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        q_mid = (np.cumsum(weights) - weights / 2) / weights.sum()
+        scale = self.delta / (2 * np.pi) * np.arcsin(np.clip(2 * q_mid - 1, -1, 1))
+        _, bucket = np.unique(np.floor(scale - scale[0]).astype(np.int64), return_inverse=True)
+
+        self.weights = np.bincount(bucket, weights=weights)
+        self.means = np.bincount(bucket, weights=weights * means) / self.weights
+
+    def _positions(self) -> np.ndarray:
+        return np.cumsum(self.weights) - self.weights / 2
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if len(self.means) == 0:
+            return np.full(len(qs), np.nan)
+        return np.interp(qs * self.n, self._positions(), self.means)
+
+    def rank(self, value: float) -> float:
+        """Approximate number of points below ``value``."""
+        if len(self.means) == 0:
+            return 0.0
+        return float(np.interp(value, self.means, self._positions(), left=0.0, right=self.n))
+
+    def rank_above(self, value: float) -> float:
+        return self.n - self.rank(value) if len(self.means) else 0.0
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit ``pd.util.hash_array`` hashes."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        rank = (65 - _bit_length(rest)).astype(np.uint8)  # leading zeros + 1
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return estimate
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    # Exact for uint64: split in 32-bit halves so the float64 log2 never rounds
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        hi_len = np.where(hi > 0, np.floor(np.log2(np.maximum(hi, 1))) + 33, 0)
+        lo_len = np.where(lo > 0, np.floor(np.log2(np.maximum(lo, 1))) + 1, 0)
+    return np.where(hi > 0, hi_len, lo_len).astype(np.int64)
+
+
+class TopKSketch:
+    """
+    Mergeable Space-Saving summary of value counts. Counts are exact while a column has at
+    most ``capacity`` distinct values. Beyond that only ``capacity`` values are monitored and
+    ``truncated`` is set: the true count of a monitored value lies in ``[count - error, count]``,
+    and a value that is not monitored occurs at most ``floor()`` times.
+    """
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.truncated = False
+
+    def __setstate__(self, state):
+        # Sketches pickled before error terms were tracked
+        self.__dict__.update(state)
+        if "errors" not in state:
+            self.errors = pd.Series(0, index=self.counts.index, dtype=np.int64)
+
+    def floor(self) -> int:
+        """Upper bound on the count of any value that is not monitored."""
+        return int(self.counts.min()) if self.truncated and not self.counts.empty else 0
+
+    def update(self, values: pd.Series):
+        self.merge_counts(values.value_counts(dropna=True))
+
+    def merge(self, other: "TopKSketch"):
+        self.merge_counts(other.counts, other.errors, other.floor())
+        self.truncated |= other.truncated
+
+    def merge_counts(self, counts: pd.Series, errors: pd.Series = None, floor: int = 0):
+        """
+        Add a summary of more rows (exact ``counts`` by default). A value missing from one side
+        is counted with that side's ``floor``, which also goes into its error, and only the
+        ``capacity`` largest counters are kept.
+        """
+        if counts.empty:
+            return
+        if errors is None:
+            errors = pd.Series(0, index=counts.index, dtype=np.int64)
+        own_floor = self.floor()
+        keys = self.counts.index.union(counts.index, sort=False)
+        merged = self.counts.reindex(keys, fill_value=own_floor) + counts.reindex(keys, fill_value=floor)
+        merged_errors = self.errors.reindex(keys, fill_value=own_floor) + errors.reindex(keys, fill_value=floor)
+        if len(merged) > self.capacity:
+            merged = merged.nlargest(self.capacity, keep="first")
+            merged_errors = merged_errors[merged.index]
+            self.truncated = True
+        self.counts = merged.astype(np.int64)
+        self.errors = merged_errors.astype(np.int64)
+
+    def top(self):
+        """
+        Most frequent value and its count (an upper bound once truncated); ties go to the
+        smallest value like ``Series.mode``.
+        """
+        if self.counts.empty:
+            return None, None
+        counts = self.counts
+        try:
+            counts = counts.sort_index()
+        except TypeError:
+            pass
+        counts = counts.sort_values(ascending=False, kind="stable")
+        return counts.index[0], int(counts.iloc[0])
+
+
+# ---------- Column and dataset profiles ----------
+
+class ColumnSketch:
+    def __init__(self, name: str):
+        self.name = name
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+        self.moments = MomentSketch()
+        self.quantiles = TDigest()
+        self.distinct = HyperLogLog()
+        self.top_values = TopKSketch()
+
+    def update(self, values: pd.Series):
+        self.dtype = values.dtype if self.dtype is None else _merge_dtype(self.dtype, values.dtype)
+        self.rows += len(values)
+        valid = values.dropna()
+        self.nulls += len(values) - len(valid)
+
+        if _is_numeric(valid.dtype):
+            numbers = valid.to_numpy(dtype=np.float64)
+            self.moments.update(numbers)
+            self.quantiles.update(numbers)
+        self.distinct.update(valid.to_numpy())
+        self.top_values.update(valid)
+
+    def merge(self, other: "ColumnSketch"):
+        self.dtype = other.dtype if self.dtype is None else _merge_dtype(self.dtype, other.dtype)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+
+    @property
+    def count(self) -> int:
+        return self.rows - self.nulls
+
+    @property
+    def nunique(self) -> int:
+        if not self.top_values.truncated:
+            return len(self.top_values.counts)
+        return max(int(round(self.distinct.estimate())), len(self.top_values.counts))
+
+    def sum_sq_counts(self) -> float:
+        counts = self.top_values.counts.to_numpy(dtype=np.float64)
+        total = float((counts ** 2).sum())
+        if self.top_values.truncated:
+            # Spread the rows outside the tracked values evenly over the remaining distinct values
+            rest_rows = max(self.count - counts.sum(), 0.0)
+            rest_values = max(self.nunique - len(counts), 1)
+            total += rest_rows ** 2 / rest_values
+        return total
+
+    def outliers(self) -> int:
+        if self.moments.count == 0:
+            return 0
+        q1, q3 = self.quantiles.quantiles((0.25, 0.75))
+        iqr = q3 - q1
+        below = self.quantiles.rank(q1 - 1.5 * iqr)
+        above = self.quantiles.rank_above(q3 + 1.5 * iqr)
+        return int(round(below + above))
+
+
+def _is_numeric(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _is_categorical(dtype) -> bool:
+    # Same columns as select_dtypes(include=['object'])
+    return pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype)
+
+
+def _merge_dtype(left, right):
+    if left == right:
+        return left
+    if _is_numeric(left) and _is_numeric(right):
+        return np.result_type(left, right)
+    return np.dtype("O")
+
+
+class StreamingProfile:
+    """
+    Dataset profile built chunk by chunk from mergeable sketches, for files larger than memory.
+
+    Exposes the same views as ``DatasetProfile`` so the metadata JSON keeps its schema.
+    Null counts, row counts, mean/std/min/max are exact; quantile-based outliers, cardinality
+    above ``TOP_K_CAPACITY`` and balance on high-cardinality columns are approximate.
+    Duplicate rows cannot be counted in one streaming pass and are reported as None, unless the
+    profile started from a frame held in memory (``track_duplicates``): appended rows are never
+    older than the last timestamp, so keeping the rows at that timestamp keeps the count exact.
+    """
+
+    def __init__(self, sort_col: Optional[str] = None):
+        self.sort_col = sort_col
+        self.columns: List[str] = []
+        self.sketches: Dict[str, ColumnSketch] = {}
+        self.n_rows = 0
+        self.preview = pd.DataFrame()
+        self.source: Dict[str, Any] = {}
+        self.duplicate_rows: Optional[int] = None
+        self.watermark_rows: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingProfile":
+        for col in chunk.columns:
+            if col not in self.sketches:
+                self.columns.append(col)
+                self.sketches[col] = ColumnSketch(col)
+            self.sketches[col].update(chunk[col])
+        self.n_rows += len(chunk)
+        self._update_preview(chunk)
+        return self
+
+    def merge(self, other: "StreamingProfile") -> "StreamingProfile":
+        for col in other.columns:
+            if col not in self.sketches:
+                self.columns.append(col)
+                self.sketches[col] = ColumnSketch(col)
+            self.sketches[col].merge(other.sketches[col])
+        self.n_rows += other.n_rows
+        self._update_preview(other.preview)
+        return self
+
+    def track_duplicates(self, frame: pd.DataFrame) -> "StreamingProfile":
+        """Exact duplicate count of the (whole) profiled ``frame``, kept exact by ``extend_duplicates``."""
+        self.duplicate_rows = int(frame.duplicated().sum())
+        self._keep_watermark(frame)
+        return self
+
+    def extend_duplicates(self, rows: pd.DataFrame) -> "StreamingProfile":
+        """Add the duplicates among appended ``rows`` (only rows at the last timestamp can repeat older ones)."""
+        if getattr(self, "duplicate_rows", None) is None or getattr(self, "watermark_rows", None) is None:
+            self.duplicate_rows = None
+            return self
+        combined = pd.concat([self.watermark_rows, rows], ignore_index=True)
+        self.duplicate_rows += int(combined.duplicated().iloc[len(self.watermark_rows):].sum())
+        self._keep_watermark(combined)
+        return self
+
+    def _keep_watermark(self, frame: pd.DataFrame):
+        if self.sort_col is None or self.sort_col not in frame.columns or frame[self.sort_col].isna().any():
+            self.watermark_rows = None
+            return
+        if len(frame):
+            self.watermark_rows = frame[frame[self.sort_col] == frame[self.sort_col].max()].reset_index(drop=True)
+
+    def _update_preview(self, rows: pd.DataFrame):
+        # Keep the first rows in date order, like df.head() on the sorted frame
+        preview = pd.concat([self.preview, rows.head(PREVIEW_ROWS) if self.sort_col is None else rows], ignore_index=True)
+        if self.sort_col is not None and self.sort_col in preview.columns:
+            preview = preview.sort_values(by=self.sort_col, ascending=True, na_position='last', kind='stable')
+        self.preview = preview.head(PREVIEW_ROWS).reset_index(drop=True)
+
+    def _sketches_of_kind(self, kind: str) -> List[ColumnSketch]:
+        if kind == 'number':
+            return [self.sketches[col] for col in self.columns if _is_numeric(self.sketches[col].dtype)]
+        return [self.sketches[col] for col in self.columns if _is_categorical(self.sketches[col].dtype)]
+
+    # ---------- Same views as DatasetProfile ----------
+
+    def validation_report(self) -> Dict[str, Any]:
+        return {
+            "null_counts": {col: self.sketches[col].nulls for col in self.columns},
+            "duplicate_rows": getattr(self, "duplicate_rows", None),
+            "outliers": {sketch.name: sketch.outliers() for sketch in self._sketches_of_kind('number')},
+        }
+
+    def numerical_statistics(self) -> Dict[str, Any]:
+        sketches = self._sketches_of_kind('number')
+        return {
+            'mean': [s.moments.mean if s.moments.count else np.nan for s in sketches],
+            'std': [s.moments.std for s in sketches],
+            'min': [s.moments.min for s in sketches],
+            'max': [s.moments.max for s in sketches],
+        }
+
+    def categorical_statistics(self) -> Dict[str, Any]:
+        sketches = self._sketches_of_kind('object')
+        tops = [s.top_values.top() for s in sketches]
+        return {
+            'unique': [s.nunique for s in sketches],
+            'top': [value for value, _ in tops],
+            'freq': [freq for _, freq in tops],
+        }
+
+    def quality(self) -> Dict[str, Any]:
+        sketches = [self.sketches[col] for col in self.columns]
+        completeness = (1 - np.mean([s.nulls / s.rows for s in sketches])) * 100 if self.n_rows else np.nan
+
+        ratios = [s.nunique / s.count for s in sketches if s.count]
+        consistency = (1 - np.mean(ratios)) * 100 if ratios else np.nan
+
+        balance_scores = []
+        for s in sketches:
+            k = s.nunique
+            if k <= 1:
+                balance_scores.append(0.0)
+                continue
+            sum_sq_p = s.sum_sq_counts() / s.count ** 2
+            std_dev = math.sqrt(max(sum_sq_p - 1 / k, 0.0) / (k - 1))
+            balance_scores.append((1 - std_dev) * 100)
+        balance = sum(balance_scores) / len(balance_scores) if balance_scores else 0.0
+
+        return {
+            "completeness": round(float(completeness), 2),
+            "consistency": round(float(consistency), 2),
+            "balance": round(float(balance), 2),
+        }
+
+    def features(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": col, "type": str(self.sketches[col].dtype), "missing": self.sketches[col].nulls}
+            for col in self.columns
+        ]
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], sort_col: Optional[str] = None,
+                   base: Optional[StreamingProfile] = None) -> StreamingProfile:
+    """Feed ``chunks`` into ``base`` (or a new profile); merging onto ``base`` only reads the new chunks."""
+    profile = base if base is not None else StreamingProfile(sort_col)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def save_sketch(profile: StreamingProfile, path: str) -> str:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(profile, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_sketch(path: str) -> Optional[StreamingProfile]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
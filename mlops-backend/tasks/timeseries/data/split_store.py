@@ -0,0 +1,84 @@
+# 📁 tasks/timeseries/data/split_store.py
+import os
+import io
+import json
+import pickle
+import struct
+import zipfile
+from typing import Any, Dict
+
+import numpy as np
+
+SPLIT_STORE_FILE = "split_store.npz"
+MANIFEST_MEMBER = "manifest.json"
+SCALER_MEMBER = "scaler.pkl"
+FEATURE_SCALER_MEMBER = "feature_scaler.pkl"
+
+# Size of the fixed part of a zip local file header (see PKZIP APPNOTE 4.3.7)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+def write_split_store(path: str, arrays: Dict[str, np.ndarray], manifest: Dict[str, Any], scaler=None,
+                      feature_scaler=None) -> str:
+    """
+    Write every array of a dataset version, its manifest and scalers into one uncompressed
+    ``.npz`` file. Members are stored (not deflated) so each array can be memory mapped in place.
+    """
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, array in arrays.items():
+            with zf.open(f"{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, np.ascontiguousarray(array), allow_pickle=False)
+        zf.writestr(MANIFEST_MEMBER, json.dumps({**manifest, "arrays": sorted(arrays)}, indent=4))
+        if scaler is not None:
+            zf.writestr(SCALER_MEMBER, pickle.dumps(scaler))
+        if feature_scaler is not None:
+            zf.writestr(FEATURE_SCALER_MEMBER, pickle.dumps(feature_scaler))
+    os.replace(tmp_path, path)
+    return path
+
+
+class SplitStore:
+    """
+    Read side of a split store. ``array(name)`` returns a read-only ``np.memmap``,
+    so callers only page in the parts of an array they actually index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with zipfile.ZipFile(path, "r") as zf:
+            self._members = {info.filename: info for info in zf.infolist()}
+            self.manifest = json.loads(zf.read(MANIFEST_MEMBER))
+            self._scaler_bytes = zf.read(SCALER_MEMBER) if SCALER_MEMBER in self._members else None
+            self._feature_scaler_bytes = zf.read(FEATURE_SCALER_MEMBER) if FEATURE_SCALER_MEMBER in self._members else None
+
+    @property
+    def scaler(self):
+        return pickle.loads(self._scaler_bytes) if self._scaler_bytes is not None else None
+
+    @property
+    def feature_scaler(self):
+        return pickle.loads(self._feature_scaler_bytes) if self._feature_scaler_bytes is not None else None
+
+    def array(self, name: str) -> np.ndarray:
+        info = self._members[f"{name}.npy"]
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"Member {info.filename} of {self.path} is compressed and cannot be memory mapped")
+
+        with open(self.path, "rb") as f:
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            name_len, extra_len = fields[-2], fields[-1]
+            f.seek(name_len + extra_len, io.SEEK_CUR)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            data_offset = f.tell()
+
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=data_offset, shape=shape,
+                         order="F" if fortran_order else "C")
@@ -0,0 +1,236 @@
+# 📁 tasks/timeseries/data/windows.py
+import os
+import math
+import pickle
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tasks.timeseries.data.split_store import SPLIT_STORE_FILE, SplitStore, write_split_store
+from tasks.timeseries.data.dtypes import storage_dtype
+from tasks.timeseries.data.frame_cache import file_sha256
+
+SPLIT_NAMES = ("train", "val", "test")
+
+
+class WindowedSeries:
+    """
+    Sliding windows over a scaled series, exposed as read-only strided views.
+
+    Only the series itself is kept in memory: window ``i`` is
+    ``series[i:i + sequences]`` and its target is ``targets[i + sequences]``
+    (``targets[i + sequences:i + sequences + horizon]`` for multi-step targets).
+    A 2-D ``(T, F)`` series yields ``(N, sequences, F)`` windows; its scaled target
+    column is passed as ``targets``. A 1-D series is its own target.
+    ``start``/``stop`` select a contiguous range of windows, so train/val/test
+    splits all share the same underlying buffer.
+    """
+
+    def __init__(self, series: np.ndarray, sequences: int, start: int = 0, stop: int = None,
+                 targets: np.ndarray = None, horizon: int = 1):
+        self.series = np.asarray(series)
+        if targets is None and self.series.ndim != 1:
+            raise ValueError("Multivariate windows need the scaled target column as `targets`")
+        self.targets = self.series if targets is None else np.asarray(targets)
+        self.sequences = int(sequences)
+        self.horizon = int(horizon)
+        self.start = int(start)
+        self.stop = self.num_windows if stop is None else min(int(stop), self.num_windows)
+
+    @property
+    def num_windows(self) -> int:
+        # Every window needs `horizon` targets right after it
+        return max(len(self.series) - self.sequences - self.horizon + 1, 0)
+
+    @property
+    def num_features(self) -> int:
+        return 1 if self.series.ndim == 1 else self.series.shape[1]
+
+    @property
+    def is_multivariate(self) -> bool:
+        return self.targets is not self.series
+
+    def __len__(self) -> int:
+        return max(self.stop - self.start, 0)
+
+    @property
+    def X(self) -> np.ndarray:
+        windows = sliding_window_view(self.series, self.sequences, axis=0)
+        if self.series.ndim == 2:
+            # (N, F, seq) -> (N, seq, F); still a view, only the strides are swapped
+            windows = windows.swapaxes(1, 2)
+        return windows[self.start:self.stop]
+
+    @property
+    def y(self) -> np.ndarray:
+        first = self.start + self.sequences
+        if self.horizon > 1:
+            return sliding_window_view(self.targets, self.horizon)[first:self.stop + self.sequences]
+        targets = self.targets[first:self.stop + self.sequences].view()
+        targets.flags.writeable = False
+        return targets
+
+    def subset(self, start: int, stop: int) -> "WindowedSeries":
+        return WindowedSeries(self.series, self.sequences, self.start + start, self.start + stop,
+                              targets=self.targets if self.is_multivariate else None, horizon=self.horizon)
+
+    def split(self, test_size: float = 0.2, val_size: float = 0.1) -> Tuple["WindowedSeries", "WindowedSeries", "WindowedSeries"]:
+        n_train, n_val, _ = split_sizes(len(self), test_size, val_size)
+        return (
+            self.subset(0, n_train),
+            self.subset(n_train, n_train + n_val),
+            self.subset(n_train + n_val, len(self)),
+        )
+
+
+def strided_span(array: np.ndarray) -> Tuple[np.ndarray, Tuple[int, ...], Tuple[int, ...]]:
+    """
+    The contiguous 1-D span of memory behind a (strided) window view, with the view's shape
+    and strides in elements, so ``as_strided(span, shape, strides)`` rebuilds the view.
+    Lets a trainer upload only the series behind the windows, not N overlapping copies.
+    """
+    array = np.asarray(array)
+    if any(stride < 0 or stride % array.itemsize for stride in array.strides):
+        array = np.ascontiguousarray(array)
+    strides = tuple(stride // array.itemsize for stride in array.strides)
+    length = 1 + sum((n - 1) * stride for n, stride in zip(array.shape, strides)) if array.size else 0
+    span = np.lib.stride_tricks.as_strided(array, shape=(length,), strides=(array.itemsize,))
+    return span, array.shape, strides
+
+
+def subsample_windows(X: np.ndarray, y: np.ndarray, window_stride: int = 1, seq_stride: int = 1):
+    """
+    Every ``window_stride``-th window, each keeping every ``seq_stride``-th step counted back from
+    its last step (so the most recent step is always kept). Both are views: nothing is copied.
+    """
+    offset = (X.shape[1] - 1) % seq_stride
+    return X[::window_stride, offset::seq_stride], y[::window_stride]
+
+
+def split_sizes(n_samples: int, test_size: float = 0.2, val_size: float = 0.1) -> Tuple[int, int, int]:
+    """
+    Same sizes as two chained ``train_test_split(..., shuffle=False)`` calls, which is
+    how the splits used to be produced before windows were stored as views.
+    """
+    n_temp = math.ceil(test_size * n_samples)
+    n_train = n_samples - n_temp
+    val_split = val_size / (1 - test_size)
+    n_test = math.ceil(val_split * n_temp)
+    n_val = n_temp - n_test
+    return n_train, n_val, n_test
+
+
+# ---------- STORAGE ----------
+
+def save_windowed_series(version_folder: str, windows: WindowedSeries, splits: Dict[str, WindowedSeries], scaler=None,
+                         lineage: Dict = None, feature_scaler=None, feature_cols: List[str] = None,
+                         dtype: str = None) -> str:
+    """
+    Save the scaled series, the split boundaries and the scaler of a dataset version
+    into a single split store. Returns the store path so it can be versioned.
+    ``lineage`` describes the source file so the next version can be built incrementally.
+    Multivariate versions also store the scaled target column, the feature scaler and
+    the feature column names. Arrays are written as ``dtype`` (see ``dtypes.STORAGE_DTYPES``).
+    """
+    os.makedirs(version_folder, exist_ok=True)
+    dtype = storage_dtype(dtype)
+    manifest = {
+        "dtype": dtype.name,
+        "sequences": windows.sequences,
+        "horizon": windows.horizon,
+        "num_windows": windows.num_windows,
+        "splits": {name: [split.start, split.stop] for name, split in splits.items()},
+    }
+    arrays = {"series": windows.series.astype(dtype, copy=False)}
+    if windows.is_multivariate:
+        arrays["targets"] = windows.targets.astype(dtype, copy=False)
+        manifest["feature_cols"] = list(feature_cols) if feature_cols is not None else None
+    if lineage is not None:
+        manifest["lineage"] = lineage
+    return write_split_store(
+        os.path.join(version_folder, SPLIT_STORE_FILE),
+        arrays=arrays,
+        manifest=manifest,
+        scaler=scaler,
+        feature_scaler=feature_scaler,
+    )
+
+
+def load_windowed_series(store: SplitStore) -> WindowedSeries:
+    manifest = store.manifest
+    targets = store.array("targets") if "targets" in manifest["arrays"] else None
+    return WindowedSeries(store.array("series"), manifest["sequences"], targets=targets,
+                          horizon=manifest.get("horizon", 1))
+
+
+def load_split_arrays(version_folder: str, splits: Iterable[str] = SPLIT_NAMES) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Load ``{split: (X, y)}`` for a dataset version.
+
+    Versions with a split store return zero-copy window views over the memory-mapped
+    series, so only the pages behind the requested splits are ever read. Older versions
+    fall back to the materialized ``X_*.npy``/``y_*.npy`` files.
+    """
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if os.path.exists(store_path):
+        store = SplitStore(store_path)
+        windows = load_windowed_series(store)
+        result = {}
+        for name in splits:
+            start, stop = store.manifest["splits"][name]
+            split = windows.subset(start, stop)
+            result[name] = (split.X, split.y)
+        return result
+
+    return {
+        name: (
+            np.load(os.path.join(version_folder, f"X_{name}.npy"), mmap_mode="r"),
+            np.load(os.path.join(version_folder, f"y_{name}.npy"), mmap_mode="r"),
+        )
+        for name in splits
+    }
+
+
+def dataset_version_hash(version_folder: str) -> str:
+    """
+    Content hash of a dataset version: the split store, or the materialized split files of older
+    versions. Identical data gives the same hash whatever the version folder is called.
+    """
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if os.path.exists(store_path):
+        return file_sha256(store_path)
+
+    hasher = hashlib.sha256()
+    for name in SPLIT_NAMES:
+        for prefix in ("X", "y"):
+            hasher.update(file_sha256(os.path.join(version_folder, f"{prefix}_{name}.npy")).encode("ascii"))
+    return hasher.hexdigest()
+
+
+def load_scaler(version_folder: str):
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if os.path.exists(store_path):
+        return SplitStore(store_path).scaler
+
+    with open(os.path.join(version_folder, "scaler.pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+def load_feature_scaler(version_folder: str):
+    """Scaler of the input feature columns; None for univariate versions."""
+    store_path = os.path.join(version_folder, SPLIT_STORE_FILE)
+    if os.path.exists(store_path):
+        return SplitStore(store_path).feature_scaler
+    return None
+
+
+def inverse_transform_targets(scaler, values: np.ndarray) -> np.ndarray:
+    """
+    Map scaled targets or predictions back to the target's units as an ``(N, horizon)`` array.
+    Every step of a multi-step target was scaled with the same single-column scaler.
+    """
+    values = np.asarray(values)
+    values = values.reshape(len(values), -1)
+    return scaler.inverse_transform(values.reshape(-1, 1)).reshape(values.shape)
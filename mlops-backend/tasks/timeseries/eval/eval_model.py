@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from tasks.timeseries.utils.metrics import smape
 from tasks.timeseries.train.train_pytorch import predict_torch_model
+from tasks.timeseries.data.loaders import keras_window_dataset
+from tasks.timeseries.data.windows import inverse_transform_targets
+from tasks.timeseries.utils.mlflow_sink import MlflowSink
 import numpy as np
 @task(name="evaluate_timeseries_model")
 def evaluate_timeseries_model(
@@ -13,7 +16,9 @@ def evaluate_timeseries_model(
     y_test,
     scaler,
     framework: str = "tensorflow",
-    best_params: dict = None
+    best_params: dict = None,
+    cpu_profile: dict = None,
+    sink: MlflowSink = None
 ):
 
     logger = get_run_logger()
@@ -29,13 +34,16 @@ def evaluate_timeseries_model(
             X_test = X_test[:, :, np.newaxis]  # ➝ (batch, seq_len, 1)
         elif len(X_test.shape) == 1:
             X_test = X_test[np.newaxis, :, np.newaxis]  # ➝ (1, seq_len, 1)
-        y_pred_scaled = predict_torch_model(model, X_test, batch_size=batch_size)
+        y_pred_scaled = predict_torch_model(model, X_test, batch_size=batch_size, cpu_profile=cpu_profile)
     elif framework == "tensorflow":
-        y_pred_scaled = model.predict(X_test, batch_size=batch_size)
+        test_ds, _ = keras_window_dataset(X_test, batch_size=batch_size)
+        y_pred_scaled = model.predict(test_ds)
     else:
         raise ValueError(f"Unsupported framework: {framework}")
     
-    y_test_scaled = y_test.reshape(-1, 1)
+    # (N, horizon) for both, so single- and multi-step targets are compared element-wise
+    y_test_scaled = np.asarray(y_test).reshape(len(y_test), -1)
+    y_pred_scaled = np.asarray(y_pred_scaled).reshape(len(y_pred_scaled), -1)
     
     # 🔹 Tính metrics trên dữ liệu đã được scale
     mse_scaled = mean_squared_error(y_test_scaled, y_pred_scaled)
@@ -43,21 +51,25 @@ def evaluate_timeseries_model(
     smape_score_scaled = smape(y_test_scaled, y_pred_scaled)
 
     # 🔹 Inverse transform
-    y_pred = scaler.inverse_transform(y_pred_scaled)
-    y_true = scaler.inverse_transform(y_test_scaled)
+    y_pred = inverse_transform_targets(scaler, y_pred_scaled)
+    y_true = inverse_transform_targets(scaler, y_test_scaled)
 
     # 🔹 Tính metrics trên dữ liệu gốc
     mse = mean_squared_error(y_true, y_pred)
     mae = mean_absolute_error(y_true, y_pred)
     smape_score = smape(y_true, y_pred)
 
-    mlflow.log_metric("mse_eval", mse_scaled)
-    mlflow.log_metric("mae_eval", mae)
-    mlflow.log_metric("smape_eval", smape_score)
+    # One log_batch request (or the flow's sink, flushed at the end of the run)
+    metrics = {"mse_eval": mse_scaled, "mae_eval": mae, "smape_eval": smape_score}
+    if sink is not None:
+        sink.log_metrics(metrics)
+    else:
+        mlflow.log_metrics(metrics)
 
     plt.figure(figsize=(10, 5))
-    plt.plot(y_true, label="True")
-    plt.plot(y_pred, label="Predicted")
+    # One-step-ahead curve (first horizon step of every window)
+    plt.plot(y_true[:, 0], label="True")
+    plt.plot(y_pred[:, 0], label="Predicted")
     plt.legend()
     plt.title("True vs Predicted")
     plt.savefig("comparison_plot.png")
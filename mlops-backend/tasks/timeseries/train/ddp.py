@@ -0,0 +1,101 @@
+# 📁 tasks/timeseries/train/ddp.py
+
+import copy
+import socket
+from datetime import timedelta
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from tasks.timeseries.data.windows import strided_span
+from tasks.timeseries.utils.system import available_cpus
+from tasks.timeseries.train.train_pytorch import train_torch_model
+
+BACKEND = "gloo"
+PROCESS_GROUP_TIMEOUT = timedelta(minutes=30)
+
+
+def share_windows(array):
+    """The series behind a window view in shared memory, so worker processes get it without a copy."""
+    if array is None:
+        return None
+    span, shape, strides = strided_span(array)
+    data = torch.from_numpy(np.array(span, dtype=np.float32)).share_memory_()
+    return data, shape, strides
+
+
+def unshare_windows(shared):
+    if shared is None:
+        return None
+    data, shape, strides = shared
+    values = data.numpy()
+    return np.lib.stride_tricks.as_strided(values, shape, tuple(s * values.itemsize for s in strides), writeable=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run_rank(rank, world_size, init_method, model, shared, kwargs):
+    dist.init_process_group(BACKEND, init_method=init_method, rank=rank, world_size=world_size,
+                            timeout=PROCESS_GROUP_TIMEOUT)
+    threads = torch.get_num_threads()
+    try:
+        # Split the host's cores between the ranks instead of oversubscribing them
+        torch.set_num_threads(max(1, available_cpus() // world_size))
+        X_train, y_train, X_val, y_val = (unshare_windows(a) for a in shared)
+        return train_torch_model(model, X_train, y_train, X_val, y_val, rank=rank, world_size=world_size, **kwargs)
+    finally:
+        dist.destroy_process_group()
+        torch.set_num_threads(threads)
+
+
+def _worker(rank, world_size, init_method, model, shared, kwargs):
+    # The pickled model shares parameter memory with the parent; train a private copy
+    _run_rank(rank, world_size, init_method, copy.deepcopy(model), shared, kwargs)
+
+
+def train_torch_model_ddp(model, X_train, y_train, X_val, y_val, world_size, batch_size=64, logger=None,
+                          checkpointer=None, meter=None, **kwargs):
+    """
+    Data-parallel ``train_torch_model`` over ``world_size`` local CPU processes (gloo).
+
+    The calling process is rank 0: it keeps the Prefect logger and the throughput meter, writes
+    the checkpoints and ends up with the trained ``model``; ranks 1.. are spawned. ``batch_size``
+    stays the global batch (each rank takes ``batch_size // world_size``), so the optimization
+    matches a single process.
+    """
+    rank_batch = max(1, batch_size // world_size)
+    ctx = mp.get_context("spawn")
+    init_method = f"tcp://127.0.0.1:{_free_port()}"
+    shared = [share_windows(a) for a in (X_train, y_train, X_val, y_val)]
+
+    # Workers read the checkpoint on resume but never write one (rank 0 does)
+    worker_kwargs = {**kwargs, "batch_size": rank_batch, "checkpointer": checkpointer}
+    workers = [
+        ctx.Process(target=_worker, args=(rank, world_size, init_method, model, shared, worker_kwargs))
+        for rank in range(1, world_size)
+    ]
+    for worker in workers:
+        worker.start()
+    if logger:
+        logger.info(f"🧵 Data-parallel training: {world_size} processes ({BACKEND}), {rank_batch} windows per rank and step")
+
+    try:
+        history = _run_rank(0, world_size, init_method, model, shared, {**worker_kwargs, "logger": logger, "meter": meter})
+    except BaseException:
+        for worker in workers:
+            worker.terminate()
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
+
+    failed = [worker.exitcode for worker in workers if worker.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"❌ {len(failed)} data-parallel worker(s) failed with exit codes {failed}")
+    return history
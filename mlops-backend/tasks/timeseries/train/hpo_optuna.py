@@ -1,48 +1,161 @@
 # 📁 tasks/timeseries/train/hpo_optuna.py
+import math
 import optuna
+import torch
 from tasks.timeseries.utils.model_loader import build_model_by_type
 from tasks.timeseries.train.train_pytorch import train_torch_model
+from tasks.timeseries.train.ddp import share_windows, unshare_windows
+from tasks.timeseries.train.trial_runner import isolated, run_process_pool
+from tasks.timeseries.train.hpo_studies import (hpo_storage, study_location, open_study, finished_trials,
+                                                search_space_hash, DEFAULT_WARM_START_TRIALS)
+from tasks.timeseries.data.loaders import keras_window_dataset
+from tasks.timeseries.data.windows import subsample_windows
+from tasks.timeseries.utils.system import pin_to_cpus, resolve_cpu_profile, apply_cpu_profile
 import numpy as np
 
+import tensorflow as tf
 from tensorflow.keras.callbacks import Callback
 
+DEFAULT_HPO_EPOCHS = 30
+DEFAULT_HPO_SEED = 42
+
 class EpochLogger(Callback):
     def on_epoch_end(self, epoch, logs=None):
         logs = logs or {}
         print(f"Epoch {epoch + 1}/{self.params['epochs']}: " + ", ".join(f"{k}={v:.4f}" for k, v in logs.items()))
 
 
-def objective(trial, input_shape, X_train, X_val, y_train, y_val, model_type=None):
-    # 👇 Common hyperparameters
-    batch_size = trial.suggest_int("batch_size", 32, 128, step=32)
-    learning_rate = trial.suggest_float("learning_rate", 0.001, 0.01)
+class KerasPruningCallback(Callback):
+    """Reports val_loss to the trial after every epoch and stops the trial as soon as the pruner says so."""
+
+    def __init__(self, trial, monitor="val_loss"):
+        super().__init__()
+        self.trial = trial
+        self.monitor = monitor
+
+    def on_epoch_end(self, epoch, logs=None):
+        report_and_prune(self.trial, epoch, (logs or {})[self.monitor])
+
+
+def report_and_prune(trial, step, val_loss, unit="epoch"):
+    trial.report(float(val_loss), step=step)
+    if trial.should_prune():
+        raise optuna.TrialPruned(f"Pruned at {unit} {step + 1} (val_loss = {val_loss:.4f})")
+
+
+def build_pruner(hpo_cfg=None, epochs=DEFAULT_HPO_EPOCHS):
+    """
+    Pruner from ``train.<data_type>.hpo``: median | hyperband | successive_halving | none.
+    Trial steps are epochs, so rungs are counted in epochs. In multi-fidelity mode the steps are
+    the fidelity rungs and trials outside the best ``promote_percentile`` % are not promoted.
+    """
+    hpo_cfg = hpo_cfg or {}
+    if fidelity_schedule(hpo_cfg, epochs):
+        return optuna.pruners.PercentilePruner(hpo_cfg["fidelity"].get("promote_percentile", 50.0),
+                                               n_startup_trials=hpo_cfg.get("startup_trials", 2), n_warmup_steps=0)
+    name = str(hpo_cfg.get("pruner", "median")).lower()
+    warmup = hpo_cfg.get("warmup_epochs", 5)
+
+    if name == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=hpo_cfg.get("startup_trials", 2), n_warmup_steps=warmup)
+    if name == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=hpo_cfg.get("min_epochs", 1), max_resource=epochs,
+                                              reduction_factor=hpo_cfg.get("reduction_factor", 3))
+    if name == "successive_halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=hpo_cfg.get("min_epochs", 1),
+                                                      reduction_factor=hpo_cfg.get("reduction_factor", 3))
+    if name in ("none", "nop"):
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Unsupported Optuna pruner: {name}")
+
+
+# 👇 Declarative search space: hashed into the study key, so changing it starts a new study
+SEARCH_SPACE = {
+    "batch_size": {"type": "int", "low": 32, "high": 128, "step": 32},
+    "learning_rate": {"type": "float", "low": 0.001, "high": 0.01},
+    # Auto model selection when model_type is AutoML
+    "model_type": {"type": "categorical", "choices": ["LSTM", "GRU", "BiLSTM", "Conv1D_BiLSTM"]},
+    "lstm_units": {"type": "int", "low": 32, "high": 256, "step": 32},
+    "conv_filters": {"type": "int", "low": 32, "high": 256, "step": 32},
+    "kernel_size": {"type": "int", "low": 3, "high": 7},
+    "num_layers": {"type": "int", "low": 1, "high": 4},
+    "dropout_rate": {"type": "float", "low": 0.1, "high": 0.5},
+}
+
 
-    # 👇 Auto model selection nếu chưa có model_type
+def search_space(model_type=None):
+    """SEARCH_SPACE for ``model_type``; only AutoML searches the model type itself."""
     if model_type is None or model_type == "AutoML":
-        model_type = trial.suggest_categorical("model_type", ["LSTM", "GRU", "BiLSTM", "Conv1D_BiLSTM"])
+        return dict(SEARCH_SPACE)
+    return {name: spec for name, spec in SEARCH_SPACE.items() if name != "model_type"}
 
-    
-    model_specific_params = {
-        "lstm_units": trial.suggest_int("lstm_units", 32, 256, step=32),
-        "conv_filters": trial.suggest_int("conv_filters", 32, 256, step=32),
-        "kernel_size": trial.suggest_int("kernel_size", 3, 7),
-        "num_layers": trial.suggest_int("num_layers", 1, 4),
-        "dropout_rate": trial.suggest_float("dropout_rate", 0.1, 0.5),
-        "learning_rate": learning_rate  # ✅ ensure learning_rate is passed
+
+def suggest_params(trial, space):
+    params = {}
+    for name, spec in space.items():
+        kwargs = {k: v for k, v in spec.items() if k != "type"}
+        params[name] = getattr(trial, f"suggest_{spec['type']}")(name, **kwargs)
+    return params
+
+
+def fidelity_schedule(hpo_cfg=None, epochs=DEFAULT_HPO_EPOCHS):
+    """
+    Rungs of the multi-fidelity mode (``hpo.fidelity``), or None when it is off.
+
+    Each rung trains a fresh model on every ``window_stride``-th training window, keeping every
+    ``seq_stride``-th step of each window, for ``epochs`` epochs. A trial only goes on to the next rung
+    when its val_loss is within the best ``promote_percentile`` % at that rung. The last rung should
+    be the full data (strides 1), so finished trials are compared at full fidelity.
+    """
+    fidelity_cfg = (hpo_cfg or {}).get("fidelity") or {}
+    if not fidelity_cfg.get("enabled", False):
+        return None
+    rungs = [
+        {"window_stride": int(rung.get("window_stride", 1)), "seq_stride": int(rung.get("seq_stride", 1)),
+         "epochs": int(rung.get("epochs", epochs))}
+        for rung in fidelity_cfg.get("rungs") or []
+    ]
+    return rungs or None
+
+
+def objective_settings(hpo_cfg, epochs, fidelity):
+    """
+    Settings that change what a trial's intermediate and final values mean (epochs, pruner,
+    fidelity rungs); part of the stored study key, so studies run under other settings are not reused.
+    """
+    pruner_keys = ("pruner", "warmup_epochs", "min_epochs", "reduction_factor", "startup_trials")
+    return {
+        "epochs": epochs,
+        "pruner": {key: hpo_cfg[key] for key in pruner_keys if key in hpo_cfg},
+        "fidelity": {"rungs": fidelity, "promote_percentile": hpo_cfg["fidelity"].get("promote_percentile", 50.0)}
+        if fidelity else None,
     }
-    model = build_model_by_type(model_type, input_shape=input_shape, **model_specific_params)
 
-    
+
+def describe_fidelity(rungs, input_shape, n_train):
+    return " → ".join(
+        f"rung {i}: {math.ceil(n_train / r['window_stride'])} windows x {math.ceil(input_shape[0] / r['seq_stride'])} steps, "
+        f"{r['epochs']} epochs"
+        for i, r in enumerate(rungs)
+    )
+
+
+def _train_trial(trial, model, X_train, y_train, X_val, y_val, batch_size, learning_rate, epochs, trial_seed,
+                 prune_epochs=True):
     is_keras = hasattr(model, "fit")
     history = None
     if is_keras:
         epoch_logger = EpochLogger()
+        train_ds, steps = keras_window_dataset(X_train, y_train, batch_size=batch_size, shuffle=True, epochs=epochs,
+                                                   **({} if trial_seed is None else {"seed": trial_seed}))
+        val_ds, _ = keras_window_dataset(X_val, y_val, batch_size=batch_size)
         history = model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
-            epochs=30,
-            batch_size=batch_size,
-            callbacks=[epoch_logger],
+            train_ds,
+            validation_data=val_ds,
+            steps_per_epoch=steps,
+            epochs=epochs,
+            # Pruned trials stop at the epoch the pruner rejects them
+            callbacks=[epoch_logger] + ([KerasPruningCallback(trial)] if prune_epochs else []),
             verbose=0
         )
         val_loss = history.history['val_loss'][-1]
@@ -57,19 +170,149 @@ def objective(trial, input_shape, X_train, X_val, y_train, y_val, model_type=Non
             X_train=X_train, y_train=y_train,
             X_val=X_val, y_val=y_val,
             batch_size=batch_size,
-            epochs=30,
-            learning_rate=learning_rate
+            epochs=epochs,
+            learning_rate=learning_rate,
+            epoch_callback=(lambda epoch, logs: report_and_prune(trial, epoch, logs["val_loss"])) if prune_epochs else None
         )
         val_loss = history["val_loss"][-1]
 
     return val_loss
 
 
-def optimize(input_shape, X_train, y_train, X_val, y_val, model_type=None, n_trials=100):
-    study = optuna.create_study(direction="minimize")
+def objective(trial, input_shape, X_train, X_val, y_train, y_val, model_type=None, output_size=1, epochs=DEFAULT_HPO_EPOCHS,
+              seed=None, fidelity=None):
+    # 👇 Per-trial seed: a trial trains the same way whichever worker runs it
+    trial_seed = None if seed is None else seed + trial.number
+    if trial_seed is not None:
+        tf.keras.utils.set_random_seed(trial_seed)
+        torch.manual_seed(trial_seed)
+
+    params = suggest_params(trial, search_space(model_type))
+    batch_size = params.pop("batch_size")
+    learning_rate = params["learning_rate"]
+    model_type = params.pop("model_type", model_type)
+
+    model_specific_params = {
+        **params,  # ✅ includes learning_rate
+        "output_size": output_size
+    }
+    if not fidelity:
+        model = build_model_by_type(model_type, input_shape=input_shape, **model_specific_params)
+        return _train_trial(trial, model, X_train, y_train, X_val, y_val, batch_size, learning_rate, epochs, trial_seed)
+
+    # 👇 Multi-fidelity: the pruner decides between rungs instead of between epochs
+    for rung, spec in enumerate(fidelity):
+        X_rung, y_rung = subsample_windows(X_train, y_train, spec["window_stride"], spec["seq_stride"])
+        X_val_rung, y_val_rung = subsample_windows(X_val, y_val, 1, spec["seq_stride"])
+        model = build_model_by_type(model_type, input_shape=(X_rung.shape[1], input_shape[1]), **model_specific_params)
+        val_loss = _train_trial(trial, model, X_rung, y_rung, X_val_rung, y_val_rung, batch_size, learning_rate,
+                                spec["epochs"], trial_seed, prune_epochs=False)
+        trial.set_user_attr(f"rung_{rung}_val_loss", float(val_loss))
+        print(f"Trial {trial.number} rung {rung}: val_loss = {val_loss:.4f}")
+        if rung < len(fidelity) - 1:
+            report_and_prune(trial, rung, val_loss, unit="rung")
+    return val_loss
+
+
+def _sampler(seed):
+    return optuna.samplers.TPESampler(seed=seed)
+
+
+def _hpo_worker(worker, cpus, n_trials, study_name, storage_spec, shared, input_shape, model_type, output_size,
+                hpo_cfg, seed):
+    # Own core slice and thread budget; TF is first initialized here, so its settings still apply
+    pin_to_cpus(cpus)
+    apply_cpu_profile(resolve_cpu_profile({"name": "default", "intra_op_threads": len(cpus), "inter_op_threads": 1}))
+
+    X_train, X_val, y_train, y_val = (unshare_windows(a) for a in shared)
+    epochs = hpo_cfg.get("epochs", DEFAULT_HPO_EPOCHS)
+    study = optuna.load_study(study_name=study_name, storage=hpo_storage(*storage_spec),
+                              sampler=_sampler(None if seed is None else seed + worker),
+                              pruner=build_pruner(hpo_cfg, epochs))
     study.optimize(
-        lambda trial: objective(trial, input_shape, X_train, y_train, X_val, y_val, model_type),
+        isolated(lambda trial: objective(trial, input_shape, X_train, X_val, y_train, y_val, model_type, output_size,
+                                         epochs, seed, fidelity_schedule(hpo_cfg, epochs))),
         n_trials=n_trials
     )
-    return study.best_params
 
+
+def _run_workers(study_name, storage_spec, input_shape, X_train, X_val, y_train, y_val, model_type, n_trials,
+                 output_size, hpo_cfg, seed):
+    """
+    Runs ``n_trials`` trials of a stored study in ``hpo_cfg['n_jobs']`` spawned processes
+    (``trial_runner.run_process_pool``), replaced every ``hpo_cfg['trials_per_process']`` trials.
+
+    Each worker is pinned to its own slice of the CPUs with a matching torch/TF thread budget and
+    has its own TF runtime (nothing is shared but the storage and the read-only windows).
+    Every trial is seeded with ``seed + trial.number``; which parameters TPE proposes still
+    depends on the order the workers finish in, so only ``n_jobs: 1`` replays a search exactly.
+    """
+    n_jobs = int(hpo_cfg.get("n_jobs", 1))
+    trials_per_process = int(hpo_cfg.get("trials_per_process", 0))
+    shared = [share_windows(a) for a in (X_train, X_val, y_train, y_val)]
+    print(f"Optuna: {min(n_jobs, n_trials)} worker processes"
+          f"{f' (recycled every {trials_per_process} trials)' if trials_per_process > 0 else ''}, "
+          f"study '{study_name}' on {storage_spec[1]}")
+    started = run_process_pool(_hpo_worker, (study_name, storage_spec, shared, input_shape, model_type, output_size,
+                                             hpo_cfg, seed), n_trials, n_jobs, trials_per_process)
+    print(f"Optuna: {started} worker processes used")
+
+
+def optimize(input_shape, X_train, X_val, y_train, y_val, model_type=None, n_trials=100, output_size=1, hpo_cfg=None,
+             storage_dir=None, dataset=None):
+    """
+    Best parameters of an Optuna search over ``search_space(model_type)``.
+
+    Without ``storage_dir`` the study lives in memory. With it, the study is stored on disk (see
+    ``hpo_studies.study_location``); given ``dataset`` (``{"name", "version_hash"}``) it is kept per
+    dataset version, model type, search space and objective settings (``objective_settings``): a study that already holds ``n_trials`` finished
+    trials returns its best parameters without training, an interrupted one runs the missing trials,
+    and a new dataset version starts from the best trials of the previous one.
+    ``hpo_cfg['n_jobs'] > 1`` runs the trials in parallel processes and ``hpo_cfg['trials_per_process'] > 0``
+    in processes that are replaced after that many trials (stored studies only). Every trial releases
+    the Keras session and heap it used and records its peak RSS (``trial_runner.isolated``).
+    """
+    hpo_cfg = hpo_cfg or {}
+    epochs = hpo_cfg.get("epochs", DEFAULT_HPO_EPOCHS)
+    seed = hpo_cfg.get("seed", DEFAULT_HPO_SEED)
+    fidelity = fidelity_schedule(hpo_cfg, epochs)
+    if fidelity:
+        print(f"Optuna multi-fidelity schedule: {describe_fidelity(fidelity, input_shape, len(X_train))}")
+    run_trial = isolated(lambda trial: objective(trial, input_shape, X_train, X_val, y_train, y_val, model_type,
+                                                 output_size, epochs, seed, fidelity))
+
+    if storage_dir is None:
+        study = optuna.create_study(direction="minimize", sampler=_sampler(seed), pruner=build_pruner(hpo_cfg, epochs))
+        study.optimize(run_trial, n_trials=n_trials)
+    else:
+        space = search_space(model_type)
+        space_hash = search_space_hash(space)
+        settings = objective_settings(hpo_cfg, epochs, fidelity)
+        settings_hash = search_space_hash(settings)
+        study_name, storage_spec = study_location(hpo_cfg, storage_dir, model_type, space_hash, dataset, settings_hash)
+        attrs = {"model_type": model_type or "AutoML", "search_space_hash": space_hash,
+                 "objective_settings": settings, "objective_settings_hash": settings_hash, **(
+            {"dataset_name": dataset["name"], "dataset_version_hash": dataset["version_hash"]} if dataset else {}),
+            **({"fidelity": fidelity} if fidelity else {})}
+        study = open_study(study_name, storage_spec, attrs,
+                           warm_start_trials=hpo_cfg.get("warm_start_trials", DEFAULT_WARM_START_TRIALS))
+
+        finished = finished_trials(study)
+        remaining = n_trials - len(finished)
+        if remaining <= 0 and any(t.state == optuna.trial.TrialState.COMPLETE for t in finished):
+            print(f"Optuna: study '{study_name}' already has {n_trials} finished trials; reusing best_params "
+                  f"(val_loss = {study.best_value:.4f})")
+            return study.best_params
+
+        if int(hpo_cfg.get("n_jobs", 1)) > 1 or int(hpo_cfg.get("trials_per_process", 0)) > 0:
+            _run_workers(study_name, storage_spec, input_shape, X_train, X_val, y_train, y_val, model_type, remaining,
+                         output_size, hpo_cfg, seed)
+            study = optuna.load_study(study_name=study_name, storage=hpo_storage(*storage_spec))
+        else:
+            study = optuna.load_study(study_name=study_name, storage=hpo_storage(*storage_spec),
+                                      sampler=_sampler(seed), pruner=build_pruner(hpo_cfg, epochs))
+            study.optimize(run_trial, n_trials=remaining)
+
+    pruned = sum(t.state == optuna.trial.TrialState.PRUNED for t in study.trials)
+    print(f"Optuna: {len(study.trials)} trials, {pruned} pruned, best val_loss = {study.best_value:.4f}")
+    return study.best_params
@@ -0,0 +1,100 @@
+# 📁 tasks/timeseries/train/hpo_studies.py
+
+import os
+import json
+import uuid
+import hashlib
+from typing import Dict, Optional, Tuple
+
+import optuna
+
+# Trials that count towards a study's budget (failed and interrupted ones are run again)
+FINISHED_STATES = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+DEFAULT_WARM_START_TRIALS = 5
+
+
+def search_space_hash(space: Dict) -> str:
+    return hashlib.sha256(json.dumps(space, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def hpo_storage(kind, path):
+    """Optuna storage on local disk: ``journal`` (append-only file) or ``sqlite``."""
+    if kind == "journal":
+        return optuna.storages.JournalStorage(optuna.storages.journal.JournalFileBackend(path))
+    if kind == "sqlite":
+        # Workers write concurrently; wait for the database lock instead of failing
+        return optuna.storages.RDBStorage(f"sqlite:///{path}", engine_kwargs={"connect_args": {"timeout": 60}})
+    raise ValueError(f"Unsupported Optuna storage: {kind}")
+
+
+def study_location(hpo_cfg: Dict, storage_dir: str, model_type: Optional[str], space_hash: str,
+                   dataset: Optional[Dict] = None, settings_hash: str = "") -> Tuple[str, Tuple[str, str]]:
+    """
+    Study name and storage spec ``(kind, path)``.
+
+    With ``dataset`` (``{"name": ..., "version_hash": ...}``) the study is keyed by
+    (dataset name, dataset version hash, model type, search-space hash, objective-settings hash):
+    every version of a dataset gets its own study, in one storage file per (dataset, model type,
+    search space, settings) so the studies of earlier versions can warm-start the next one.
+    Without it, a one-off study is created.
+    """
+    kind = str(hpo_cfg.get("storage", "journal")).lower()
+    extension = {"journal": "log", "sqlite": "db"}.get(kind, kind)
+    model_type = model_type or "AutoML"
+
+    if dataset is None:
+        name = f"hpo-{model_type}-{uuid.uuid4().hex[:8]}"
+        return name, (kind, os.path.join(storage_dir, f"{name}.{extension}"))
+
+    stem = f"{model_type}-{space_hash[:12]}" + (f"-{settings_hash[:8]}" if settings_hash else "")
+    name = f"{dataset['name']}-{stem}-{dataset['version_hash'][:12]}"
+    return name, (kind, os.path.join(storage_dir, dataset["name"], f"{stem}.{extension}"))
+
+
+def finished_trials(study) -> list:
+    return study.get_trials(deepcopy=False, states=FINISHED_STATES)
+
+
+def _previous_study(storage, study_name: str) -> Optional[str]:
+    """Latest other study in ``storage`` (same dataset, model type and search space) with a completed trial."""
+    summaries = [s for s in optuna.get_all_study_summaries(storage, include_best_trial=True)
+                 if s.study_name != study_name and s.best_trial is not None]
+    if not summaries:
+        return None
+    return max(summaries, key=lambda s: s.datetime_start).study_name
+
+
+def open_study(study_name: str, storage_spec: Tuple[str, str], attrs: Optional[Dict] = None,
+               warm_start_trials: int = DEFAULT_WARM_START_TRIALS, logger=None):
+    """
+    Create the study (or load it when it already exists) and return it.
+
+    A new study is warm-started with the ``warm_start_trials`` best trials of the previous study in
+    the same storage, i.e. of the previous dataset version: their parameters are enqueued and
+    evaluated first.
+    """
+    log = logger.info if logger else print
+    kind, path = storage_spec
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    storage = hpo_storage(kind, path)
+
+    existing = study_name in optuna.get_all_study_names(storage)
+    study = optuna.create_study(study_name=study_name, storage=storage, direction="minimize", load_if_exists=True)
+    if existing:
+        log(f"📚 Optuna study '{study_name}' loaded: {len(finished_trials(study))} finished trials")
+        return study
+
+    for key, value in (attrs or {}).items():
+        study.set_user_attr(key, value)
+
+    previous = _previous_study(storage, study_name) if warm_start_trials > 0 else None
+    if previous:
+        completed = optuna.load_study(study_name=previous, storage=storage).get_trials(
+            deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+        best = sorted(completed, key=lambda t: t.value)[:warm_start_trials]
+        for trial in best:
+            study.enqueue_trial(trial.params, user_attrs={"warm_start_from": previous}, skip_if_exists=True)
+        log(f"🔥 Optuna study '{study_name}' warm-started with the {len(best)} best trials of '{previous}'")
+    else:
+        log(f"📚 Optuna study '{study_name}' created on {path}")
+    return study
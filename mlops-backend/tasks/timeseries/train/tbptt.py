@@ -0,0 +1,86 @@
+# 📁 tasks/timeseries/train/tbptt.py
+
+import math
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+from tasks.timeseries.data.dtypes import COMPUTE_DTYPE
+
+DEFAULT_TRUNCATION = 64
+DEFAULT_STREAMS = 16
+
+
+def series_stream(X: np.ndarray, y: np.ndarray):
+    """
+    The contiguous series behind (N, seq[, F]) windows with their (N[, H]) targets.
+
+    Returns ``inputs`` (T, F), ``targets`` (T, H) and ``weights`` (T,) with T = N + seq - 1:
+    the target of step t is the target of the window ending at t, so the first seq - 1 steps
+    (no complete window yet) get weight 0.
+    """
+    seq = X.shape[1]
+    X = X[..., np.newaxis] if X.ndim == 2 else X
+    inputs = np.concatenate([X[0], X[1:, -1]]).astype(COMPUTE_DTYPE)
+
+    n = len(y)
+    targets = np.zeros((n + seq - 1, int(np.prod(y.shape[1:])) or 1), dtype=COMPUTE_DTYPE)
+    targets[seq - 1:] = np.asarray(y, dtype=COMPUTE_DTYPE).reshape(n, -1)
+    weights = np.zeros(n + seq - 1, dtype=COMPUTE_DTYPE)
+    weights[seq - 1:] = 1.0
+    return inputs, targets, weights
+
+
+def stream_chunks(inputs, targets, weights, streams: int, truncation: int):
+    """
+    Lay the series out as ``streams`` contiguous segments (the batch) and cut them into
+    ``truncation``-step chunks: chunk k of every segment forms step k, so a stateful model sees
+    each segment in order and back-propagates over at most ``truncation`` steps.
+    The tail is zero-padded with weight 0. Returns ``(dataset, steps)``.
+    """
+    length = math.ceil(len(inputs) / streams / truncation) * truncation
+    steps = length // truncation
+
+    def layout(array):
+        padded = np.zeros((streams * length,) + array.shape[1:], dtype=COMPUTE_DTYPE)
+        padded[:len(array)] = array
+        # (streams, steps, truncation, ...) -> (steps, streams, truncation, ...)
+        return np.ascontiguousarray(np.swapaxes(padded.reshape((streams, steps, truncation) + array.shape[1:]), 0, 1))
+
+    dataset = tf.data.Dataset.from_tensor_slices((layout(inputs), layout(targets), layout(weights)))
+    return dataset.prefetch(tf.data.AUTOTUNE), steps
+
+
+class ResetStates(Callback):
+    """Every epoch walks the series from its start again."""
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.model.reset_states()
+
+
+class StatefulValidation(Callback):
+    """
+    val_loss / val_mae / val_mape / val_smape of a stateful model: a batch-1 copy runs the validation
+    series as one stream (O(series)) and the masked per-step errors are added to the epoch
+    logs, ahead of EarlyStopping and History. Must be the first callback.
+    """
+
+    def __init__(self, val_model, inputs, targets, weights):
+        super().__init__()
+        self.val_model = val_model
+        self.inputs = inputs[np.newaxis]
+        self.targets = targets[weights > 0]
+        self.mask = weights > 0
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.val_model.set_weights(self.model.get_weights())
+        self.val_model.reset_states()
+        pred = self.val_model.predict(self.inputs, batch_size=1, verbose=0)[0][self.mask]
+
+        error = pred - self.targets
+        denominator = np.abs(self.targets) + np.abs(pred) + 1e-7
+        if logs is not None:
+            logs["val_loss"] = float(np.mean(error ** 2))
+            logs["val_mae"] = float(np.mean(np.abs(error)))
+            logs["val_mape"] = float(100.0 * np.mean(np.abs(error) / np.maximum(np.abs(self.targets), 1e-7)))
+            logs["val_smape"] = float(200.0 * np.mean(np.abs(error) / denominator))
@@ -17,6 +17,7 @@ import tensorflow as tf
 from tensorflow.keras.models import  load_model
 
 import tensorflow.keras.backend as K
+from tensorflow.keras.callbacks import EarlyStopping
 from tensorflow.keras.metrics import MeanAbsoluteError, MeanAbsolutePercentageError
 
 from tasks.timeseries.utils.system import clear_gpu_memory
@@ -32,8 +33,16 @@ import numpy as np
 import mlflow
 
 from tasks.timeseries.train.train_pytorch import train_torch_model, predict_torch_model
+from tasks.timeseries.train.ddp import train_torch_model_ddp
+from tasks.timeseries.train.tbptt import (series_stream, stream_chunks, ResetStates, StatefulValidation,
+                                          DEFAULT_TRUNCATION, DEFAULT_STREAMS)
 from tasks.timeseries.utils.metrics import smape  # NumPy-based smape
-from tasks.timeseries.utils.callbacks import EpochLogger  # Keras callback
+from tasks.timeseries.utils.callbacks import (EpochLogger, ResumableEarlyStopping, KerasCheckpoint,
+                                              KerasThroughputMeter)  # Keras callbacks
+from tasks.timeseries.utils.throughput import ThroughputMeter
+from tasks.timeseries.data.loaders import keras_window_dataset
+from tasks.timeseries.data.windows import inverse_transform_targets
+from tasks.timeseries.utils.mlflow_sink import MlflowSink
 
 
 @task(name="train_timeseries_model")
@@ -45,10 +54,18 @@ def train_timeseries_model(
     scaler,
     best_params,
     epochs=10,
-    patience=10
+    patience=10,
+    cpu_profile=None,
+    checkpointer=None,
+    sink=None,
+    world_size=1,
+    meter=None,
+    stateful_builder=None,
+    truncation=DEFAULT_TRUNCATION,
+    streams=DEFAULT_STREAMS
 ):
     logger = get_run_logger()
-    logger.info(f"🚀 Starting training with {epochs} epochs")
+    logger.info(f"🚀 Starting training with up to {epochs} epochs (early stopping patience = {patience})")
 
     # Clear GPU (nếu bạn có hàm clear_gpu_memory)
     clear_gpu_memory()
@@ -60,37 +77,107 @@ def train_timeseries_model(
 
     is_keras = hasattr(model, "fit")
     history = None
+    # Samples/s, input wait and step time per epoch; the flow reads it for model_train_info
+    meter = meter or ThroughputMeter()
 
     # 🔹 Training
     if is_keras:
+        if world_size > 1:
+            logger.warning(f"⚠️ world_size = {world_size} only applies to PyTorch models; Keras trains in one process")
         epoch_logger = EpochLogger(logger, total_epochs=epochs)
-        history_obj = model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+
+        # Truncated BPTT: a stateful twin of the model walks the series in chunks (O(series) per epoch)
+        # and its weights are copied back into the windowed model afterwards
+        fit_model = stateful_builder(streams) if stateful_builder is not None else model
+
+        # ⏯️ Resume from the last checkpoint of this run, if any
+        resumed = checkpointer.restore_keras(fit_model) if checkpointer is not None else None
+        initial_epoch, prior_history = 0, {}
+        if resumed:
+            initial_epoch, prior_history = resumed["epoch"], resumed["history"]
+            logger.info(f"⏯️ Resuming training at epoch {initial_epoch + 1}/{epochs} from checkpoint")
+
+        early_stopping = ResumableEarlyStopping(resume_state=resumed.get("early_stopping") if resumed else None,
+                                                monitor="val_loss", patience=patience, restore_best_weights=True)
+        callbacks = [epoch_logger, early_stopping]
+
+        if stateful_builder is not None:
+            train_stream = series_stream(X_train, y_train)
+            train_ds, steps = stream_chunks(*train_stream, streams=streams, truncation=truncation)
+            logger.info(f"🔁 Truncated BPTT: {streams} streams x {steps} chunks of {truncation} steps per epoch")
+            fit_args = {"validation_data": None}
+            callbacks = [StatefulValidation(stateful_builder(1), *series_stream(X_val, y_val)), ResetStates()] + callbacks
+            callbacks.append(KerasThroughputMeter(meter, len(train_stream[0]), streams * truncation))
+        else:
+            # tf.data over the stored series; epoch shuffles are keyed on the epoch, so a resume needs no shuffle state
+            train_ds, steps = keras_window_dataset(X_train, y_train, batch_size=batch_size, shuffle=True,
+                                                   epochs=epochs, initial_epoch=initial_epoch)
+            val_ds, _ = keras_window_dataset(X_val, y_val, batch_size=batch_size)
+            fit_args = {"validation_data": val_ds, "steps_per_epoch": steps}
+            callbacks.append(KerasThroughputMeter(meter, len(X_train), batch_size))
+
+        if checkpointer is not None and checkpointer.enabled:
+            callbacks.append(KerasCheckpoint(checkpointer, early_stopping, prior_history))
+
+        history_obj = fit_model.fit(
+            train_ds,
             epochs=epochs,
-            batch_size=batch_size,
-            callbacks=[epoch_logger],
-            verbose=0
+            initial_epoch=initial_epoch,
+            callbacks=callbacks,
+            verbose=0,
+            **fit_args
         )
-        history = history_obj.history  # Keras trả về History object
+        # Keras trả về History object; a resumed run only holds the epochs since the checkpoint
+        history = {k: list(prior_history.get(k, [])) + list(v) for k, v in history_obj.history.items()}
+        if not history:
+            history = {k: list(v) for k, v in prior_history.items()}
+        if early_stopping.stopped_epoch == 0 and early_stopping.best_weights is not None:
+            # Keras only restores the best weights when it actually stops early
+            fit_model.set_weights(early_stopping.best_weights)
+        if fit_model is not model:
+            model.set_weights(fit_model.get_weights())
     else:
         if len(X_train.shape) == 2:
             X_train = X_train[..., np.newaxis]
             X_val = X_val[..., np.newaxis]
             X_test = X_test[..., np.newaxis]
 
-        history = train_torch_model(
-            model,
-            X_train, y_train,
-            X_val, y_val,
-            batch_size,
-            epochs,
-            learning_rate,
-            logger=logger
-        )
+        if world_size > 1:
+            # Data-parallel over local CPU processes; this process is rank 0 (logging, checkpoints)
+            history = train_torch_model_ddp(
+                model,
+                X_train, y_train,
+                X_val, y_val,
+                world_size,
+                batch_size=batch_size,
+                epochs=epochs,
+                learning_rate=learning_rate,
+                logger=logger,
+                cpu_profile=cpu_profile,
+                patience=patience,
+                checkpointer=checkpointer,
+                meter=meter
+            )
+        else:
+            history = train_torch_model(
+                model,
+                X_train, y_train,
+                X_val, y_val,
+                batch_size,
+                epochs,
+                learning_rate,
+                logger=logger,
+                cpu_profile=cpu_profile,
+                patience=patience,
+                checkpointer=checkpointer,
+                meter=meter
+            )
 
     # 🔹 Tính thời gian huấn luyện
     end_time = time.time()
+    epochs_run = len(history["loss"])
+    best_epoch = int(np.argmin(history["val_loss"]))
+    logger.info(f"🏁 Ran {epochs_run}/{epochs} epochs; best val_loss at epoch {best_epoch + 1}")
     total_seconds = end_time - start_time
     hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
@@ -98,14 +185,15 @@ def train_timeseries_model(
 
     # 🔹 Dự đoán
     if is_keras:
-        y_pred = model.predict(X_test)
+        test_ds, _ = keras_window_dataset(X_test, batch_size=batch_size)
+        y_pred = model.predict(test_ds)
     else:
-        y_pred = predict_torch_model(model, X_test, batch_size=batch_size)
+        y_pred = predict_torch_model(model, X_test, batch_size=batch_size, cpu_profile=cpu_profile)
 
     # 🔹 Inverse scale
     logger.info("📉 Inverse transforming predictions and true values...")
-    y_pred = scaler.inverse_transform(y_pred)
-    y_test = scaler.inverse_transform(y_test.reshape(-1, 1))
+    y_pred = inverse_transform_targets(scaler, y_pred)
+    y_test = inverse_transform_targets(scaler, y_test)
 
     smape_test = smape(y_test, y_pred)
 
@@ -113,32 +201,47 @@ def train_timeseries_model(
     if mlflow.active_run() is None:
         mlflow.start_run()
 
-    mlflow.log_params(best_params)
-    mlflow.log_params({"epochs": epochs, "batch_size": batch_size, "patience": patience})
+    # Batched logging (log_batch); a sink passed by the flow is flushed by the flow
+    own_sink = sink is None
+    if own_sink:
+        sink = MlflowSink()
 
-    for epoch in range(epochs):
-        mlflow.log_metric("train_loss", history["loss"][epoch], step=epoch)
-        mlflow.log_metric("val_loss", history["val_loss"][epoch], step=epoch)
+    sink.log_params(best_params)
+    sink.log_params({"epochs": epochs, "batch_size": batch_size, "patience": patience, "world_size": world_size})
+    if stateful_builder is not None and is_keras:
+        sink.log_params({"tbptt_truncation": truncation, "tbptt_streams": streams})
+    sink.log_metrics({"epochs_run": epochs_run, "best_epoch": best_epoch + 1})
+
+    # Keras names its SMAPE metric after the function; the torch trainer logs val_smape
+    val_smapes = history.get("val_smape_keras", history.get("val_smape"))
+
+    for epoch in range(epochs_run):
+        epoch_metrics = {
+            "train_loss": history["loss"][epoch],
+            "val_loss": history["val_loss"][epoch],
+        }
         
         if "mae" in history:
-            mlflow.log_metric("train_mae", history["mae"][epoch], step=epoch)
-            mlflow.log_metric("val_mae", history["val_mae"][epoch], step=epoch)
+            epoch_metrics["train_mae"] = history["mae"][epoch]
+        if "val_mae" in history:
+            epoch_metrics["val_mae"] = history["val_mae"][epoch]
         if "mape" in history:
-            mlflow.log_metric("train_mape", history["mape"][epoch], step=epoch)
-            mlflow.log_metric("val_mape", history["val_mape"][epoch], step=epoch)
+            epoch_metrics["train_mape"] = history["mape"][epoch]
+        if "val_mape" in history:
+            epoch_metrics["val_mape"] = history["val_mape"][epoch]
 
         # SMAPE → Accuracy
         if "smape_keras" in history:
             smape_train = history["smape_keras"][epoch]
-            smape_val = history["val_smape_keras"][epoch]
-            
             # Log raw smape
-            mlflow.log_metric("train_smape", smape_train, step=epoch)
-            mlflow.log_metric("val_smape", smape_val, step=epoch)
-
+            epoch_metrics["train_smape"] = smape_train
             # ✅ Tính accuracy từ smape (có thể âm nếu smape > 100)
-            mlflow.log_metric("train_acc", 100 - smape_train, step=epoch)
-            mlflow.log_metric("val_acc", 100 - smape_val, step=epoch)
+            epoch_metrics["train_acc"] = 100 - smape_train
+        if val_smapes is not None:
+            epoch_metrics["val_smape"] = val_smapes[epoch]
+            epoch_metrics["val_acc"] = 100 - val_smapes[epoch]
+
+        sink.log_metrics(epoch_metrics, step=epoch)
 
         # if "mae" in history:
         #     mlflow.log_metric("val_mae", history["mae"][epoch], step=epoch)
@@ -151,16 +254,28 @@ def train_timeseries_model(
         #     mlflow.log_metric("val_smape", history["smape_keras"][epoch], step=epoch)
         #     mlflow.log_metric("val_acc", 100 - history["smape_keras"][epoch], step=epoch)
 
-    mlflow.log_metrics({
-        "final_train_loss": history["loss"][-1],
-        "final_val_loss": history["val_loss"][-1],
-        "final_val_smape": history["val_smape_keras"][-1],    
+    # 🔹 Throughput: per epoch (steps follow the epoch numbers, also after a resume) and for the run
+    for record in meter.epochs:
+        sink.log_metrics({k: v for k, v in record.items() if k != "epoch"}, step=record["epoch"])
+    throughput = meter.summary()
+    if throughput:
+        sink.log_metrics({f"run_{k}": v for k, v in throughput.items()})
+        logger.info(f"⚡ {throughput['samples_per_sec']:.1f} samples/s, {throughput['steps_per_sec']:.2f} steps/s, "
+                    f"input wait {100 * throughput['data_wait_ratio']:.1f}%, peak RSS {throughput['peak_rss_mb']:.0f} MiB")
+
+    # The returned model carries the best epoch's weights, so "final" metrics are taken there
+    final_train_loss = history["loss"][best_epoch]
+    final_val_smape = val_smapes[best_epoch] if val_smapes is not None else smape_test
+
+    sink.log_metrics({
+        "final_train_loss": final_train_loss,
+        "final_val_loss": history["val_loss"][best_epoch],
+        "final_val_smape": final_val_smape,
         "smape_test": smape_test
     })
-
-    final_train_loss = history["loss"][-1]
-    final_val_smape = history["val_smape_keras"][-1]
+    if own_sink:
+        logger.info(f"📤 MLflow metrics flushed in {sink.close():.2f}s")
 
     logger.info("✅ Training completed successfully.")
-    return model, final_train_loss, final_val_smape, training_time
+    return model, final_train_loss, final_val_smape, training_time, epochs_run
 
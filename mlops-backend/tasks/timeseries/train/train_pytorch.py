@@ -1,8 +1,137 @@
+import os
+import numpy as np
 import torch
 import torch.nn as nn
-from torch.utils.data import TensorDataset, DataLoader
-from tasks.timeseries.utils.metrics import mean_absolute_error, symmetric_mean_absolute_percentage_error
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, BatchSampler, RandomSampler, SequentialSampler, DistributedSampler
+from tasks.timeseries.data.loaders import TorchWindowBatches
+from tasks.timeseries.data.windows import strided_span
+from tasks.timeseries.utils.metrics import absolute_error_sum, smape_sum
 from tasks.timeseries.utils.callbacks import TorchEpochLogger
+from tasks.timeseries.utils.throughput import ThroughputMeter
+
+# Windows are preloaded on the device when their memory takes at most this share of the free device memory
+DEVICE_MEMORY_FRACTION = 0.5
+LOADER_WORKERS = min(4, os.cpu_count() or 1)
+# Sharded (data-parallel) shuffles are keyed on this seed and the epoch, so every rank agrees on the order
+SHARD_SEED = 0
+
+
+def to_device_windows(array, device):
+    """
+    Upload the memory behind a window view once and rebuild the windows on ``device`` with
+    ``torch.as_strided``, so (N, seq[, F]) windows cost as much memory as the series itself.
+    """
+    span, shape, strides = strided_span(array)
+    data = torch.from_numpy(np.array(span, dtype=np.float32)).to(device)
+    return torch.as_strided(data, shape, strides)
+
+
+def fits_on_device(arrays, device) -> bool:
+    if device.type != "cuda":
+        # CPU training: the series is already in host memory
+        return True
+    free, _ = torch.cuda.mem_get_info(device)
+    needed = sum(strided_span(array)[0].size * 4 for array in arrays if array is not None)
+    return needed <= DEVICE_MEMORY_FRACTION * free
+
+
+class WindowBatches:
+    """
+    Iterates ``(xb, yb)`` device batches over window views.
+
+    Device-resident mode: the data is uploaded once and each batch is a slice of a permutation
+    generated on the device. Otherwise DataLoader workers gather batches into pinned memory
+    and they are copied asynchronously. ``yb`` is None when ``y`` is None.
+
+    ``shard=(rank, world_size)`` iterates only this rank's share of the windows. Shuffled shards
+    are padded to equal size (every rank must run as many backward passes for the gradient
+    all-reduce); sequential shards are not, so evaluation counts each window once.
+    """
+
+    def __init__(self, X, y, batch_size, device, shuffle=False, shard=None):
+        self.batch_size = batch_size
+        self.device = device
+        self.shuffle = shuffle
+        self.shard = shard
+        self.epoch = 0
+        self.resident = fits_on_device([X, y], device)
+        self.sampler = None
+
+        if self.resident:
+            self.X = to_device_windows(X, device)
+            if self.X.dim() == 2:
+                # Univariate windows are (N, seq); models expect (N, seq, 1)
+                self.X = self.X.unsqueeze(-1)
+            self.y = to_device_windows(y, device) if y is not None else None
+        else:
+            indices = range(len(X))
+            if shard is None:
+                self.sampler = RandomSampler(indices) if shuffle else SequentialSampler(indices)
+            elif shuffle:
+                self.sampler = DistributedSampler(indices, num_replicas=shard[1], rank=shard[0], shuffle=True, seed=SHARD_SEED)
+            else:
+                self.sampler = indices[shard[0]::shard[1]]
+            sampler = BatchSampler(self.sampler, batch_size=batch_size, drop_last=False)
+            self.loader = DataLoader(
+                TorchWindowBatches(X, y),
+                batch_size=None,
+                sampler=sampler,
+                num_workers=LOADER_WORKERS,
+                pin_memory=device.type == "cuda",
+                persistent_workers=LOADER_WORKERS > 0
+            )
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        if isinstance(self.sampler, DistributedSampler):
+            self.sampler.set_epoch(epoch)
+
+    def _shard_order(self, n):
+        rank, world_size = self.shard
+        if not self.shuffle:
+            return torch.arange(rank, n, world_size, device=self.device)
+        generator = torch.Generator().manual_seed(SHARD_SEED + self.epoch)
+        order = torch.randperm(n, generator=generator)
+        padded = -(-n // world_size) * world_size
+        order = torch.cat([order, order[:padded - n]])
+        return order[rank::world_size].to(self.device)
+
+    def __iter__(self):
+        if not self.resident:
+            for batch in self.loader:
+                xb = batch[0].to(self.device, non_blocking=True)
+                yb = batch[1].to(self.device, non_blocking=True) if len(batch) > 1 else None
+                yield xb, yb
+            return
+
+        n = len(self.X)
+        if self.shard is not None:
+            order = self._shard_order(n)
+            n = len(order)
+        else:
+            order = torch.randperm(n, device=self.device) if self.shuffle else None
+        for start in range(0, n, self.batch_size):
+            idx = order[start:start + self.batch_size] if order is not None else slice(start, start + self.batch_size)
+            yield self.X[idx], (self.y[idx] if self.y is not None else None)
+
+
+def compiled_forward(model, cpu_profile=None, logger=None):
+    """``torch.compile``-d forward when the CPU profile asks for it; ``model`` itself keeps the plain state dict."""
+    if not (cpu_profile and cpu_profile.get("torch_compile")):
+        return model
+    try:
+        return torch.compile(model)
+    except Exception as e:
+        if logger:
+            logger.warning(f"⚠️ torch.compile unavailable, running eagerly: {e}")
+        return model
+
+
+def cpu_autocast(device, cpu_profile=None):
+    enabled = bool(cpu_profile and cpu_profile.get("bf16_autocast")) and device.type == "cpu"
+    return torch.autocast("cpu", dtype=torch.bfloat16, enabled=enabled)
 
 
 def train_torch_model(
@@ -15,96 +144,208 @@ def train_torch_model(
     epochs=20,
     learning_rate=0.001,
     device=None,
-    logger=None
+    logger=None,
+    cpu_profile=None,
+    patience=None,
+    min_delta=0.0,
+    checkpointer=None,
+    rank=0,
+    world_size=1,
+    meter=None,
+    epoch_callback=None
 ):
-    if device is None:
+    """
+    Train on window views and return the per-epoch history. With ``patience``, training stops
+    once val_loss has not improved by ``min_delta`` for that many epochs, and the weights of
+    the best epoch are restored (the history still covers every epoch that ran).
+
+    With a ``TrainingCheckpointer``, training resumes from its last checkpoint (weights,
+    optimizer, RNG, history, early-stopping state) and writes a new one every ``checkpointer.every`` epochs.
+
+    ``world_size > 1`` runs this as ``rank`` of an initialized gloo process group (see
+    ``tasks.timeseries.train.ddp``): each rank trains on its shard, DDP all-reduces the
+    gradients and the epoch sums are all-reduced, so every rank sees the same history.
+    Only rank 0 writes checkpoints.
+
+    ``meter`` (a ``ThroughputMeter``) collects per-epoch samples/s, input wait and
+    forward/backward/optimizer time of the training pass.
+
+    ``epoch_callback(epoch, logs)`` is called after every epoch with that epoch's loss/metrics
+    (e.g. to report to an Optuna trial); an exception raised there ends training immediately.
+    """
+    distributed = world_size > 1
+    if distributed:
+        # gloo data parallelism runs in CPU processes
+        device = torch.device("cpu")
+    elif device is None:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
     model.to(device)
     model.train()
 
-    train_dataset = TensorDataset(torch.Tensor(X_train), torch.Tensor(y_train))
-    val_dataset = TensorDataset(torch.Tensor(X_val), torch.Tensor(y_val))
+    meter = (meter or ThroughputMeter()).bind(device, world_size)
 
-    train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=batch_size)
+    shard = (rank, world_size) if distributed else None
+    train_batches = WindowBatches(X_train, y_train, batch_size, device, shuffle=True, shard=shard)
+    val_batches = WindowBatches(X_val, y_val, batch_size, device, shard=shard)
+    if logger:
+        logger.info(f"🧮 Torch data path: {'device-resident' if train_batches.resident else 'pinned DataLoader'} on {device}"
+                    + (f", rank {rank} of {world_size}" if distributed else ""))
 
     criterion = nn.MSELoss()
     optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
 
-    history = {"loss": [], "val_loss": [], "mae": [], "smape": []}
+    history = {"loss": [], "val_loss": [], "val_mae": [], "val_smape": []}
     epoch_logger = TorchEpochLogger(logger, total_epochs=epochs) if logger else None
 
-    for epoch in range(epochs):
+    best_val_loss = float("inf")
+    best_epoch = -1
+    best_state = None
+    start_epoch = 0
+
+    resumed = checkpointer.restore_torch(model, optimizer, device) if checkpointer is not None else None
+    if resumed:
+        start_epoch = resumed["epoch"]
+        history = {k: list(resumed["history"].get(k, [])) for k in history}
+        best_val_loss = resumed["early_stopping"]["best_val_loss"]
+        best_epoch = resumed["early_stopping"]["best_epoch"]
+        best_state = resumed["best_state"]
+        if logger:
+            logger.info(f"⏯️ Resuming training at epoch {start_epoch + 1}/{epochs} from checkpoint")
+
+    if distributed:
+        # Wrapped after the resume so every rank starts from the same (broadcast) weights.
+        # Validation runs each rank's shard on the plain module: no collectives per batch.
+        forward = compiled_forward(DistributedDataParallel(model, broadcast_buffers=False), cpu_profile, logger)
+        eval_forward = model
+    else:
+        forward = eval_forward = compiled_forward(model, cpu_profile, logger)
+
+    for epoch in range(start_epoch, epochs):
         model.train()
-        train_losses = []
+        train_batches.set_epoch(epoch)
+        # Loss and metrics are summed on the device; nothing is read back until the epoch ends
+        train_loss_sum = torch.zeros((), device=device)
+        n_train = 0
+        meter.start_epoch(epoch)
 
-        for xb, yb in train_loader:
-            xb, yb = xb.to(device), yb.to(device)
+        for xb, yb in meter.batches(train_batches):
+            optimizer.zero_grad(set_to_none=True)
+            with meter.phase("forward"):
+                with cpu_autocast(device, cpu_profile):
+                    pred = forward(xb)
+                # Loss in float32 even when the forward pass ran in bf16
+                pred = pred.float()
+                # (B,) single-step targets against (B, 1) outputs must not broadcast to (B, B)
+                yb = yb.view_as(pred)
+                loss = criterion(pred, yb)
+            with meter.phase("backward"):
+                loss.backward()
+            with meter.phase("optimizer"):
+                optimizer.step()
 
-            optimizer.zero_grad()
-            pred = model(xb)
-            loss = criterion(pred, yb)
-            loss.backward()
-            optimizer.step()
+            train_loss_sum += loss.detach() * len(xb)
+            n_train += len(xb)
+            meter.step(len(xb))
 
-            train_losses.append(loss.item())
+        meter.end_epoch()
 
         model.eval()
-        val_losses = []
-        total_mae = 0.0
-        total_smape = 0.0
+        val_loss_sum = torch.zeros((), device=device)
+        abs_error_sum = torch.zeros((), device=device)
+        smape_total = torch.zeros((), device=device)
         n_val = 0
+        n_val_values = 0
 
         with torch.no_grad():
-            for xb, yb in val_loader:
-                xb, yb = xb.to(device), yb.to(device)
-                pred = model(xb)
-                loss = criterion(pred, yb)
-                val_losses.append(loss.item())
+            for xb, yb in val_batches:
+                with cpu_autocast(device, cpu_profile):
+                    pred = eval_forward(xb)
+                pred = pred.float()
+                yb = yb.view_as(pred)
+                val_loss_sum += criterion(pred, yb) * len(xb)
+                abs_error_sum += absolute_error_sum(yb, pred)
+                smape_total += smape_sum(yb, pred)
+                n_val += len(xb)
+                n_val_values += yb.numel()
 
-                total_mae += mean_absolute_error(yb, pred) * len(yb)
-                total_smape += symmetric_mean_absolute_percentage_error(yb, pred) * len(yb)
-                n_val += len(yb)
+        # One device -> host transfer per epoch
+        sums = torch.stack([train_loss_sum, val_loss_sum, abs_error_sum, smape_total])
+        if distributed:
+            counts = torch.tensor([n_train, n_val, n_val_values], dtype=torch.float64)
+            dist.all_reduce(sums)
+            dist.all_reduce(counts)
+            n_train, n_val, n_val_values = counts.tolist()
+        train_loss_sum, val_loss_sum, abs_error_sum, smape_total = sums.tolist()
 
-        avg_train_loss = sum(train_losses) / len(train_losses)
-        avg_val_loss = sum(val_losses) / len(val_losses)
-        avg_mae = total_mae / n_val
-        avg_smape = total_smape / n_val
+        avg_train_loss = train_loss_sum / max(n_train, 1)
+        avg_val_loss = val_loss_sum / max(n_val, 1)
+        avg_mae = abs_error_sum / max(n_val_values, 1)
+        avg_smape = smape_total / max(n_val_values, 1)
 
         history["loss"].append(avg_train_loss)
         history["val_loss"].append(avg_val_loss)
-        history["mae"].append(avg_mae)
-        history["smape"].append(avg_smape)
+        history["val_mae"].append(avg_mae)
+        history["val_smape"].append(avg_smape)
 
         if epoch_logger:
             epoch_logger.log(epoch, avg_train_loss, avg_val_loss, {
-                "mae": avg_mae,
-                "smape": avg_smape
+                "val_mae": avg_mae,
+                "val_smape": avg_smape
             })
-        else:
+        elif rank == 0:
             print(f"[Epoch {epoch+1}/{epochs}] Train Loss: {avg_train_loss:.4f} | "
                   f"Val Loss: {avg_val_loss:.4f} | MAE: {avg_mae:.4f} | SMAPE: {avg_smape:.2f}")
 
+        if epoch_callback is not None:
+            epoch_callback(epoch, {"loss": avg_train_loss, "val_loss": avg_val_loss,
+                                   "val_mae": avg_mae, "val_smape": avg_smape})
+
+        stop = False
+        if patience is not None:
+            if avg_val_loss < best_val_loss - min_delta:
+                best_val_loss, best_epoch = avg_val_loss, epoch
+                # Snapshot stays on the device; no host copy per improvement
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+            elif epoch - best_epoch >= patience:
+                stop = True
+        if distributed:
+            # Rank 0 decides, so no rank can leave the loop while the others wait in an all-reduce
+            decision = torch.tensor([int(stop)])
+            dist.broadcast(decision, src=0)
+            stop = bool(decision.item())
+
+        if not stop and rank == 0 and checkpointer is not None and checkpointer.due(epoch):
+            checkpointer.save_torch(epoch, model, optimizer, history, best_state,
+                                    early_stopping={"best_val_loss": best_val_loss, "best_epoch": best_epoch})
+
+        if stop:
+            if logger:
+                logger.info(f"⏹️ Early stopping at epoch {epoch + 1}: val_loss has not improved for {patience} epochs")
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+        if logger:
+            logger.info(f"♻️ Restored weights of epoch {best_epoch + 1} (val_loss = {best_val_loss:.4f})")
+
     return history
 
 
-def predict_torch_model(model, X, batch_size=64, device=None):
+def predict_torch_model(model, X, batch_size=64, device=None, cpu_profile=None):
     if device is None:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
     model.to(device)
     model.eval()
 
-    data = torch.Tensor(X)
-    loader = DataLoader(TensorDataset(data), batch_size=batch_size)
-
+    forward = compiled_forward(model, cpu_profile)
     predictions = []
 
     with torch.no_grad():
-        for (xb,) in loader:
-            xb = xb.to(device)
-            pred = model(xb)
-            predictions.append(pred.cpu())
+        for xb, _ in WindowBatches(X, None, batch_size, device):
+            with cpu_autocast(device, cpu_profile):
+                predictions.append(forward(xb).float())
 
-    return torch.cat(predictions, dim=0).numpy()
+    # Predictions stay on the device until the single copy back
+    return torch.cat(predictions, dim=0).cpu().numpy()
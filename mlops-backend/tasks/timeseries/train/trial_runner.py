@@ -0,0 +1,72 @@
+# 📁 tasks/timeseries/train/trial_runner.py
+
+from functools import wraps
+from multiprocessing.connection import wait
+
+import torch.multiprocessing as mp
+
+from tasks.timeseries.utils.system import clear_gpu_memory, cpu_slices
+from tasks.timeseries.utils.throughput import reset_peak_rss, peak_rss_since_reset_mb
+
+
+def isolated(objective):
+    """
+    Wraps an Optuna objective so every trial starts from a clean process state: the Keras session,
+    the TF graph, the CUDA cache and the Python heap are released after the trial, whether it
+    finished, was pruned or failed. The trial's peak RSS is stored as the ``peak_rss_mb`` user attribute.
+    """
+    @wraps(objective)
+    def run(trial):
+        reset_peak_rss()
+        try:
+            return objective(trial)
+        finally:
+            peak = peak_rss_since_reset_mb()
+            trial.set_user_attr("peak_rss_mb", round(peak, 1))
+            print(f"Trial {trial.number}: peak RSS {peak:.0f} MiB")
+            clear_gpu_memory()
+    return run
+
+
+def run_process_pool(target, args, n_trials, n_jobs=1, trials_per_process=0) -> int:
+    """
+    Runs ``n_trials`` trials in at most ``n_jobs`` spawned processes, each on its own slice of the CPUs.
+
+    ``target(worker, cpus, n_trials, *args)`` runs ``n_trials`` trials in process number ``worker``.
+    With ``trials_per_process > 0`` a process exits after that many trials and a fresh one takes
+    over its CPU slice (``1`` = every trial in a new process), so whatever a trial leaks is returned
+    to the OS. Returns the number of processes started.
+    """
+    ctx = mp.get_context("spawn")
+    slices = cpu_slices(n_jobs)
+    shares = [n_trials // n_jobs + (i < n_trials % n_jobs) for i in range(n_jobs)]
+    running = {}
+    started = 0
+
+    def start(slot):
+        nonlocal started
+        count = min(trials_per_process, shares[slot]) if trials_per_process > 0 else shares[slot]
+        shares[slot] -= count
+        process = ctx.Process(target=target, args=(started, slices[slot], count, *args))
+        process.start()
+        running[process.sentinel] = (slot, process)
+        started += 1
+
+    for slot in range(n_jobs):
+        if shares[slot]:
+            start(slot)
+    try:
+        while running:
+            for sentinel in wait(list(running)):
+                slot, process = running.pop(sentinel)
+                process.join()
+                if process.exitcode != 0:
+                    raise RuntimeError(f"❌ HPO worker {process.name} failed with exit code {process.exitcode}")
+                if shares[slot]:
+                    start(slot)
+    except BaseException:
+        for _, process in running.values():
+            process.terminate()
+            process.join()
+        raise
+    return started
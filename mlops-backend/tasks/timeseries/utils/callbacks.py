@@ -1,4 +1,5 @@
-from tensorflow.keras.callbacks import Callback
+import time
+from tensorflow.keras.callbacks import Callback, EarlyStopping
 
 class EpochLogger(Callback):
     def __init__(self, logger, total_epochs=1):
@@ -40,4 +41,86 @@ class TorchEpochLogger:
             for k, v in metrics.items():
                 msg += f", {k} = {v:.4f}"
 
-        self.logger.info(msg)
\ No newline at end of file
+        self.logger.info(msg)
+
+class ResumableEarlyStopping(EarlyStopping):
+    """EarlyStopping whose wait/best/best_weights survive a checkpoint resume (``fit`` resets them)."""
+
+    def __init__(self, resume_state=None, **kwargs):
+        super().__init__(**kwargs)
+        self.resume_state = resume_state
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.resume_state:
+            for k, v in self.resume_state.items():
+                setattr(self, k, v)
+
+    def snapshot(self):
+        return {"wait": self.wait, "best": self.best, "best_weights": self.best_weights,
+                "best_epoch": getattr(self, "best_epoch", 0)}
+
+
+class KerasCheckpoint(Callback):
+    """
+    Writes a ``TrainingCheckpointer`` checkpoint every ``checkpointer.every`` epochs, together with
+    the history so far (``initial_history`` holds the epochs of the resumed run) and the
+    early-stopping state.
+    """
+
+    def __init__(self, checkpointer, early_stopping=None, initial_history=None):
+        super().__init__()
+        self.checkpointer = checkpointer
+        self.early_stopping = early_stopping
+        self.history = {k: list(v) for k, v in (initial_history or {}).items()}
+
+    def on_epoch_end(self, epoch, logs=None):
+        for k, v in (logs or {}).items():
+            self.history.setdefault(k, []).append(float(v))
+        if not self.checkpointer.due(epoch):
+            return
+        extra = {}
+        if self.early_stopping is not None:
+            extra["early_stopping"] = self.early_stopping.snapshot()
+        self.checkpointer.save_keras(epoch, self.model, self.history, **extra)
+
+
+class KerasThroughputMeter(Callback):
+    """
+    Feeds a ``ThroughputMeter`` from ``fit``: the time between two training batches is input wait,
+    the batch itself is the fused ``compute`` step. The epoch is closed when validation starts.
+    """
+
+    def __init__(self, meter, num_samples, batch_size):
+        super().__init__()
+        self.meter = meter
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+        # Keep batch logs as tensors: converting them to numpy every batch would sync the device
+        self._supports_tf_logs = True
+        self._open = False
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.meter.start_epoch(epoch)
+        self._open = True
+        self._last_end = time.perf_counter()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._batch_start = time.perf_counter()
+        self.meter.add("data_wait", self._batch_start - self._last_end)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_end = time.perf_counter()
+        self.meter.add("compute", self._last_end - self._batch_start)
+        self.meter.step(max(0, min(self.batch_size, self.num_samples - batch * self.batch_size)))
+
+    def _close_epoch(self):
+        if self._open:
+            self.meter.end_epoch()
+            self._open = False
+
+    def on_test_begin(self, logs=None):
+        self._close_epoch()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._close_epoch()
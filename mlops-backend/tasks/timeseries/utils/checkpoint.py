@@ -0,0 +1,181 @@
+# 📁 tasks/timeseries/utils/checkpoint.py
+
+import os
+import glob
+import pickle
+import random
+import shutil
+import logging
+from datetime import datetime
+
+import numpy as np
+import torch
+
+# Optional TensorFlow imports (only the Keras checkpoints need it)
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+logger = logging.getLogger(__name__)
+
+# Checkpoints live next to the model files, in their own folder so the model hash ignores them
+CHECKPOINT_DIR = "checkpoints"
+STATE_FILE = "state.pkl"
+DEFAULT_CHECKPOINT_EVERY = 5
+
+
+def checkpoint_path(save_dir: str) -> str:
+    return os.path.join(save_dir, CHECKPOINT_DIR)
+
+
+def capture_rng_state() -> dict:
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["torch_cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: dict):
+    if not state:
+        return
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "torch_cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["torch_cuda"])
+
+
+def read_checkpoint_state(save_dir: str):
+    """The last complete checkpoint state of ``save_dir``, or None."""
+    path = os.path.join(checkpoint_path(save_dir), STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Unreadable checkpoint state {path}: {e}")
+        return None
+
+
+def clear_checkpoints(save_dir: str):
+    shutil.rmtree(checkpoint_path(save_dir), ignore_errors=True)
+
+
+def find_resumable_run(models_root: str, model_name: str, model_type: str = None, dataset_version: str = None):
+    """
+    Latest interrupted run of ``model_name`` under ``models_root``: a run directory whose
+    checkpoints were not cleared by a finished training. Returns ``(run_name, state)`` or None.
+    ``model_type=None`` matches any type (AutoML runs are named after the selected model).
+    """
+    if not os.path.isdir(models_root):
+        return None
+    pattern = f"{model_name}_model_ver*_{model_type}" if model_type else f"{model_name}_model_ver*_*"
+
+    candidates = []
+    for run_dir in glob.glob(os.path.join(models_root, pattern)):
+        state = read_checkpoint_state(run_dir)
+        if state is None:
+            continue
+        if dataset_version and state.get("dataset_version") != dataset_version:
+            continue
+        candidates.append((state.get("saved_at", ""), os.path.basename(run_dir), state))
+
+    if not candidates:
+        return None
+    _, run_name, state = max(candidates, key=lambda c: c[0])
+    return run_name, state
+
+
+class TrainingCheckpointer:
+    """
+    Periodic training checkpoints in ``<save_dir>/checkpoints``.
+
+    Every ``every`` epochs the weights (and optimizer) are written first, then ``state.pkl``
+    (epoch, history, RNG and early-stopping state plus ``meta``) is atomically replaced to point
+    at them, so a crash mid-write leaves the previous checkpoint usable. Older weights are pruned.
+    """
+
+    def __init__(self, save_dir: str, every: int = DEFAULT_CHECKPOINT_EVERY, meta: dict = None):
+        self.directory = checkpoint_path(save_dir)
+        self.save_dir = save_dir
+        self.every = int(every or 0)
+        self.meta = dict(meta or {})
+
+    @property
+    def enabled(self) -> bool:
+        return self.every > 0
+
+    def due(self, epoch: int) -> bool:
+        """``epoch`` is the 0-based epoch that just finished."""
+        return self.enabled and (epoch + 1) % self.every == 0
+
+    def load(self):
+        return read_checkpoint_state(self.save_dir)
+
+    def _commit(self, epoch, weights, history, extra):
+        state = {
+            **self.meta,
+            "epoch": epoch + 1,  # next epoch to run
+            "weights": weights,
+            "history": {k: list(v) for k, v in history.items()},
+            "rng": capture_rng_state(),
+            "saved_at": datetime.now().isoformat(),
+            **extra,
+        }
+        tmp_path = os.path.join(self.directory, STATE_FILE + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
+
+        # Drop weights no longer referenced by the state
+        for path in glob.glob(os.path.join(self.directory, "weights-*")):
+            if not os.path.basename(path).startswith(weights + "."):
+                os.remove(path)
+        logger.info(f"💾 Checkpoint saved after epoch {epoch + 1} in {self.directory}")
+
+    # ---------- PyTorch ----------
+
+    def save_torch(self, epoch, model, optimizer, history, best_state=None, **extra):
+        os.makedirs(self.directory, exist_ok=True)
+        weights = f"weights-{epoch + 1:04d}"
+        torch.save({
+            "model": model.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "best_state": best_state,
+        }, os.path.join(self.directory, weights + ".pt"))
+        self._commit(epoch, weights, history, extra)
+
+    def restore_torch(self, model, optimizer, device=None):
+        """Load weights, optimizer and RNG state; returns the checkpoint state (with ``best_state``) or None."""
+        state = self.load()
+        if state is None:
+            return None
+        payload = torch.load(os.path.join(self.directory, state["weights"] + ".pt"), map_location=device)
+        model.load_state_dict(payload["model"])
+        optimizer.load_state_dict(payload["optimizer"])
+        restore_rng_state(state.get("rng"))
+        return {**state, "best_state": payload.get("best_state")}
+
+    # ---------- TensorFlow / Keras ----------
+
+    def save_keras(self, epoch, model, history, **extra):
+        os.makedirs(self.directory, exist_ok=True)
+        weights = f"weights-{epoch + 1:04d}"
+        tf.train.Checkpoint(model=model, optimizer=model.optimizer).write(os.path.join(self.directory, weights))
+        self._commit(epoch, weights, history, extra)
+
+    def restore_keras(self, model):
+        """Load model and optimizer variables (slots are restored lazily on the first step) and RNG state."""
+        state = self.load()
+        if state is None:
+            return None
+        tf.train.Checkpoint(model=model, optimizer=model.optimizer).read(
+            os.path.join(self.directory, state["weights"])).expect_partial()
+        restore_rng_state(state.get("rng"))
+        return state
@@ -6,7 +6,8 @@ import torch
 
 #For Tensorflow
 def smape(y_true, y_pred):
-    return 100 / len(y_true) * np.sum(2 * np.abs(y_pred - y_true) / (np.abs(y_true) + np.abs(y_pred)))
+    # Mean over every element, so (N, horizon) multi-step targets are averaged over all steps
+    return 100 * np.mean(2 * np.abs(y_pred - y_true) / (np.abs(y_true) + np.abs(y_pred)))
 
 def smape_keras(y_true, y_pred):
     epsilon = K.epsilon()
@@ -24,3 +25,13 @@ def symmetric_mean_absolute_percentage_error(y_true, y_pred):
     denominator = (torch.abs(y_true) + torch.abs(y_pred)) + epsilon
     smape = torch.mean(2.0 * torch.abs(y_pred - y_true) / denominator)
     return (smape * 100).item()
+
+
+#For Torch, accumulated on the device (sums stay tensors; divide by the element count once per epoch)
+def absolute_error_sum(y_true, y_pred):
+    return torch.abs(y_true - y_pred).sum()
+
+def smape_sum(y_true, y_pred):
+    epsilon = 1e-8
+    denominator = (torch.abs(y_true) + torch.abs(y_pred)) + epsilon
+    return (2.0 * torch.abs(y_pred - y_true) / denominator).sum() * 100
@@ -0,0 +1,158 @@
+# 📁 tasks/timeseries/utils/mlflow_sink.py
+
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+logger = logging.getLogger(__name__)
+
+# log_batch limits of the MLflow REST API
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+
+QUEUE_SIZE = 64
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0  # seconds, doubled per attempt
+
+
+class MlflowSink:
+    """
+    Buffers metrics, params and tags of one MLflow run and sends them with ``log_batch``:
+    one request per 1000 metrics / 100 params / 100 tags instead of one per value.
+
+    ``asynchronous=True`` hands full batches to a background thread through a bounded queue
+    (the caller only blocks when the queue is full); failed requests are retried with backoff.
+    ``flush()`` / ``close()`` send what is left and return the time the flush took.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, asynchronous: bool = False, client: MlflowClient = None,
+                 max_retries: int = MAX_RETRIES):
+        if run_id is None:
+            run_id = mlflow.active_run().info.run_id
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._params: Dict[str, Param] = {}
+        self._tags: Dict[str, RunTag] = {}
+        self.sent = {"metrics": 0, "params": 0, "tags": 0, "requests": 0}
+
+        self._queue = None
+        self._worker = None
+        if asynchronous:
+            self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+            self._worker = threading.Thread(target=self._drain, name="mlflow-sink", daemon=True)
+            self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- buffering ----------
+
+    def log_metric(self, key: str, value: float, step: int = 0):
+        self.log_metrics({key: value}, step=step)
+
+    def log_metrics(self, metrics: Dict[str, float], step: int = 0):
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            self._metrics.extend(Metric(k, float(v), timestamp, step or 0) for k, v in metrics.items())
+            full = len(self._metrics) >= MAX_METRICS_PER_BATCH
+        if full:
+            self._send_pending()
+
+    def log_params(self, params: Dict[str, Any]):
+        with self._lock:
+            # Last value wins; log_batch rejects duplicate keys in one request
+            self._params.update({k: Param(k, str(v)) for k, v in params.items()})
+            full = len(self._params) >= MAX_PARAMS_PER_BATCH
+        if full:
+            self._send_pending()
+
+    def set_tag(self, key: str, value: Any):
+        self.set_tags({key: value})
+
+    def set_tags(self, tags: Dict[str, Any]):
+        with self._lock:
+            self._tags.update({k: RunTag(k, str(v)) for k, v in tags.items()})
+            full = len(self._tags) >= MAX_TAGS_PER_BATCH
+        if full:
+            self._send_pending()
+
+    # ---------- sending ----------
+
+    def _take_batches(self):
+        with self._lock:
+            metrics, params, tags = self._metrics, list(self._params.values()), list(self._tags.values())
+            self._metrics, self._params, self._tags = [], {}, {}
+
+        batches = []
+        while metrics or params or tags:
+            batches.append((metrics[:MAX_METRICS_PER_BATCH], params[:MAX_PARAMS_PER_BATCH], tags[:MAX_TAGS_PER_BATCH]))
+            metrics = metrics[MAX_METRICS_PER_BATCH:]
+            params = params[MAX_PARAMS_PER_BATCH:]
+            tags = tags[MAX_TAGS_PER_BATCH:]
+        return batches
+
+    def _send_pending(self):
+        for batch in self._take_batches():
+            if self._queue is not None:
+                self._queue.put(batch)
+            else:
+                self._send(batch)
+
+    def _send(self, batch):
+        metrics, params, tags = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+                self.sent["metrics"] += len(metrics)
+                self.sent["params"] += len(params)
+                self.sent["tags"] += len(tags)
+                self.sent["requests"] += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"❌ MLflow log_batch failed after {attempt + 1} attempts, "
+                                 f"dropping {len(metrics)} metrics / {len(params)} params / {len(tags)} tags: {e}")
+                    return
+                delay = RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"⚠️ MLflow log_batch failed ({e}); retrying in {delay:.0f}s")
+                time.sleep(delay)
+
+    def _drain(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                self._send(batch)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> float:
+        """Send everything buffered (and wait for the background thread); returns the seconds it took."""
+        start = time.perf_counter()
+        self._send_pending()
+        if self._queue is not None:
+            self._queue.join()
+        return time.perf_counter() - start
+
+    def close(self) -> float:
+        seconds = self.flush()
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+            self._worker, self._queue = None, None
+        return seconds
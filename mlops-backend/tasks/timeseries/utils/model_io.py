@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Dict, Union, List, Any
 from mlflow.tracking import MlflowClient
 from prefect import task, get_run_logger
+from tasks.timeseries.utils.checkpoint import CHECKPOINT_DIR
 
 # Optional TensorFlow imports
 try:
@@ -24,7 +25,9 @@ except ImportError:
 
 def calculate_model_hash(model_dir):
     hasher = hashlib.md5()
-    for root, _, files in os.walk(model_dir):
+    for root, dirs, files in os.walk(model_dir):
+        # Training checkpoints are not part of the model
+        dirs[:] = sorted(d for d in dirs if d != CHECKPOINT_DIR)
         for file in sorted(files):
             file_path = os.path.join(root, file)
             with open(file_path, 'rb') as f:
@@ -104,6 +107,17 @@ def save_timeseries_model(
     client = MlflowClient()
     model_version = None
 
+    tags = {
+        "model_name": model_name,
+        "framework": framework,
+        "accuracy": round(100 - smape_test, 1),
+        "final_loss": final_train_loss,
+        "training_time": model_train_info["training_time"],
+        "createdAt": datetime.now().strftime('%Y-%m-%d'),
+        **model_train_info,
+    }
+    tags = {key: str(val) for key, val in tags.items()}
+
     try:
         existing_versions = client.search_model_versions(f'name="{model_name_with_suffix}"')
 
@@ -113,6 +127,9 @@ def save_timeseries_model(
                 model_version = v
                 break
 
+        # A new version gets its tags in the create request; only an existing one is tagged key by key
+        tag_existing_version = model_version is not None
+
         if model_version is None:
             if not existing_versions:
                 mlflow.register_model(model_uri=model_uri, name=model_name_with_suffix)
@@ -121,7 +138,8 @@ def save_timeseries_model(
             model_version = client.create_model_version(
                 name=model_name_with_suffix,
                 source=model_uri,
-                run_id=run_id
+                run_id=run_id,
+                tags=tags
             )
             logger.info(f"🚀 Registered new model version: {model_version.version}")
 
@@ -140,23 +158,14 @@ def save_timeseries_model(
             stage="Staging"
         )
 
-        tags = {
-            "model_name": model_name,
-            "framework": framework,
-            "accuracy": round(100 - smape_test, 1),
-            "final_loss": final_train_loss,
-            "training_time": model_train_info["training_time"],
-            "createdAt": datetime.now().strftime('%Y-%m-%d'),
-            **model_train_info,
-        }
-
-        for key, val in tags.items():
-            client.set_model_version_tag(
-                name=model_name_with_suffix,
-                version=model_version.version,
-                key=key,
-                value=str(val)
-            )
+        if tag_existing_version:
+            for key, val in tags.items():
+                client.set_model_version_tag(
+                    name=model_name_with_suffix,
+                    version=model_version.version,
+                    key=key,
+                    value=val
+                )
 
         logger.info(f"🏷 Tags and metadata updated for version {model_version.version}")
 
@@ -1,6 +1,6 @@
 # 📁 tasks/timeseries/ai_models/model_loader.py
-from models.timeseries.LSTM import build_model as build_lstm
-from models.timeseries.GRU import build_model as build_gru
+from models.timeseries.LSTM import build_model as build_lstm, build_stateful_model as build_stateful_lstm
+from models.timeseries.GRU import build_model as build_gru, build_stateful_model as build_stateful_gru
 from models.timeseries.BiLSTM import build_model as build_bilstm
 from models.timeseries.Conv1D_BiLSTM import build_model as build_conv1d_bilstm
 from models.timeseries.Transformer import build_model as build_transformer
@@ -15,6 +15,13 @@ MODEL_BUILDERS = {
     "Transformer": build_transformer,
 }
 
+# Truncated-BPTT (stateful, chunked) training; bidirectional models need the future of each
+# window and cannot carry state forward across chunks, so they always train on windows
+STATEFUL_BUILDERS = {
+    "LSTM": build_stateful_lstm,
+    "GRU": build_stateful_gru,
+}
+
 
 # def build_model_by_type(model_type, input_shape, **kwargs):
 #     if model_type not in MODEL_BUILDERS:
@@ -23,10 +30,10 @@ MODEL_BUILDERS = {
 
 SUPPORTED_ARGS_BY_MODEL = {
     "Transformer": ["d_model", "nhead", "num_layers", "dim_feedforward", "dropout", "output_size"],
-    "LSTM": ["lstm_units", "dropout_rate", "learning_rate"],
-    "GRU": ["lstm_units", "dropout_rate", "learning_rate"],
-    "BiLSTM": ["lstm_units", "dropout_rate", "learning_rate"],
-    "Conv1D_BiLSTM": ["conv_filters", "kernel_size", "dropout_rate", "lstm_units", "learning_rate"],
+    "LSTM": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "GRU": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "BiLSTM": ["lstm_units", "dropout_rate", "learning_rate", "output_size"],
+    "Conv1D_BiLSTM": ["conv_filters", "kernel_size", "dropout_rate", "lstm_units", "learning_rate", "output_size"],
 }
 
 def build_model_by_type(model_type, input_shape, **kwargs):
@@ -43,4 +50,13 @@ def build_model_by_type(model_type, input_shape, **kwargs):
     logger.info(f"[DEBUG] Filtered kwargs: {filtered_kwargs}")
     logger.info(f"[DEBUG] Using build_model from: {MODEL_BUILDERS[model_type].__module__}")
 
-    return MODEL_BUILDERS[model_type](input_shape, **filtered_kwargs)
\ No newline at end of file
+    return MODEL_BUILDERS[model_type](input_shape, **filtered_kwargs)
+
+
+def build_stateful_model_by_type(model_type, num_features, batch_size, **kwargs):
+    if model_type not in STATEFUL_BUILDERS:
+        raise ValueError(f"No stateful (TBPTT) variant for model type: {model_type}")
+
+    supported_keys = SUPPORTED_ARGS_BY_MODEL.get(model_type, [])
+    filtered_kwargs = {k: v for k, v in kwargs.items() if k in supported_keys}
+    return STATEFUL_BUILDERS[model_type](batch_size, num_features, **filtered_kwargs)
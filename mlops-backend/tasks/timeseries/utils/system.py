@@ -1,8 +1,23 @@
+import os
 import tensorflow as tf
 import tensorflow.keras.backend as K
 import gc
 import torch
 
+# Optional: physical core count (falls back to the CPUs this process may run on)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Optional: glibc malloc_trim (not available on musl, macOS or Windows)
+try:
+    import ctypes
+    libc = ctypes.CDLL("libc.so.6")
+    libc.malloc_trim
+except (OSError, AttributeError):
+    libc = None
+
 
 
 def clear_gpu_memory():
@@ -25,4 +40,127 @@ def clear_gpu_memory():
     try:
         gc.collect()  # Forces Python garbage collection to free up memory
     except Exception as e:
-        print(f"⚠ Error freeing system RAM: {e}")
\ No newline at end of file
+        print(f"⚠ Error freeing system RAM: {e}")
+
+    # 🛑 4. Hand the freed heap pages back to the OS (glibc only)
+    if libc is not None:
+        libc.malloc_trim(0)
+
+
+# ---------- CPU acceleration profiles (train.timeseries.hparams.cpu_profile) ----------
+
+CPU_PROFILE_DEFAULTS = {
+    "name": "default",
+    "intra_op_threads": None,   # threads used inside one op; "auto" = physical cores available to us
+    "inter_op_threads": None,   # ops run concurrently
+    "bf16_autocast": False,     # torch.autocast("cpu", bfloat16), only on CPUs with native bf16
+    "torch_compile": False,     # torch.compile the model for training/prediction
+    "xla_jit": False,           # XLA auto-clustering for the Keras train/predict functions
+}
+
+CPU_PROFILES = {
+    # Framework defaults: nothing is changed
+    "default": {},
+    # One op spread over all cores, a couple of ops in flight, bf16 matmuls where available
+    "throughput": {"intra_op_threads": "auto", "inter_op_threads": 2, "bf16_autocast": True, "xla_jit": True},
+    # Same plus graph compilation; pays a one-off compile per input shape
+    "compiled": {"intra_op_threads": "auto", "inter_op_threads": 2, "bf16_autocast": True, "xla_jit": True,
+                 "torch_compile": True},
+}
+
+
+def available_cpus() -> int:
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    physical = psutil.cpu_count(logical=False) if psutil is not None else None
+    return max(1, min(logical, physical or logical))
+
+
+def cpu_slices(n: int) -> list:
+    """
+    Split the CPUs this process may run on into ``n`` contiguous, disjoint slices (one per worker).
+    With fewer CPUs than workers, single CPUs are shared round-robin.
+    """
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    if n >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(n)]
+    size, extra = divmod(len(cpus), n)
+    slices, start = [], 0
+    for i in range(n):
+        end = start + size + (i < extra)
+        slices.append(cpus[start:end])
+        start = end
+    return slices
+
+
+def pin_to_cpus(cpus) -> bool:
+    """Restrict this process to ``cpus`` (Linux only); returns whether the affinity was set."""
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, cpus)
+    return True
+
+
+def cpu_supports_bf16() -> bool:
+    # Native bf16 (AVX512-BF16 or AMX); elsewhere bf16 autocast is emulated and slower than fp32
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def resolve_cpu_profile(spec=None) -> dict:
+    """
+    ``spec`` is a profile name from CPU_PROFILES or a dict ``{"name": ..., <overrides>}``.
+    Returns the concrete settings ("auto" resolved, unsupported features switched off).
+    """
+    if isinstance(spec, dict):
+        name, overrides = spec.get("name", "default"), {k: v for k, v in spec.items() if k != "name"}
+    else:
+        name, overrides = spec or "default", {}
+    if name not in CPU_PROFILES:
+        raise ValueError(f"Unknown cpu_profile '{name}'. Choose one of {list(CPU_PROFILES)}.")
+
+    profile = {**CPU_PROFILE_DEFAULTS, **CPU_PROFILES[name], **overrides, "name": name}
+    for key in ("intra_op_threads", "inter_op_threads"):
+        if profile[key] == "auto":
+            profile[key] = available_cpus()
+    profile["bf16_autocast"] = bool(profile["bf16_autocast"]) and cpu_supports_bf16()
+    profile["torch_compile"] = bool(profile["torch_compile"]) and hasattr(torch, "compile")
+    profile["xla_jit"] = bool(profile["xla_jit"])
+    return profile
+
+
+def apply_cpu_profile(profile: dict, logger=None) -> dict:
+    """Apply the thread and JIT settings of a resolved profile to torch and TensorFlow."""
+    log = logger.info if logger else print
+    intra, inter = profile["intra_op_threads"], profile["inter_op_threads"]
+
+    if intra:
+        torch.set_num_threads(intra)
+    if inter:
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError as e:
+            # Only settable before the first inter-op parallel work of the process
+            log(f"⚠ torch inter-op threads already fixed: {e}")
+
+    try:
+        if intra:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # TensorFlow only accepts thread settings before its runtime is initialized
+        log(f"⚠ TensorFlow threading already initialized: {e}")
+    tf.config.optimizer.set_jit(profile["xla_jit"])
+
+    log(f"🧵 CPU profile '{profile['name']}': intra_op={intra or 'default'}, inter_op={inter or 'default'}, "
+        f"bf16_autocast={profile['bf16_autocast']}, torch_compile={profile['torch_compile']}, xla_jit={profile['xla_jit']}")
+    return profile
+
+
+def cpu_profile_params(profile: dict) -> dict:
+    """MLflow params of a resolved profile, so runs with different profiles can be compared."""
+    return {f"cpu_{key}": ("default" if value is None else value) for key, value in profile.items()}
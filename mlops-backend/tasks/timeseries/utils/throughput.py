@@ -0,0 +1,162 @@
+# 📁 tasks/timeseries/utils/throughput.py
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import torch
+
+# Optional: peak RSS via getrusage (not available on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (0.0 when unavailable)."""
+    if resource is None:
+        return 0.0
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS mark of this process (Linux), so the next read covers only what follows."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_since_reset_mb() -> float:
+    """Peak RSS in MiB since the last ``reset_peak_rss()`` (VmHWM); the process peak when unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+class ThroughputMeter:
+    """
+    Per-epoch training throughput: samples/s and steps/s of the training pass (validation excluded),
+    time spent waiting on input and per phase (forward/backward/optimizer for PyTorch, the fused
+    ``compute`` step for Keras), and peak RSS.
+
+    CUDA phases are timed with CUDA events and read once at the end of the epoch, so the hot
+    loop never synchronizes the device.
+    """
+
+    def __init__(self):
+        self.epochs = []
+        self.device = None
+        self.world_size = 1
+        self._reset(0)
+
+    def bind(self, device=None, world_size: int = 1):
+        self.device = device
+        # Data-parallel runs: every rank processes as many samples as this one
+        self.world_size = world_size
+        return self
+
+    def _reset(self, epoch):
+        self._epoch = epoch
+        self._start = time.perf_counter()
+        self._times = defaultdict(float)
+        self._events = []
+        self._samples = 0
+        self._steps = 0
+
+    def start_epoch(self, epoch: int):
+        self._reset(epoch)
+
+    def add(self, phase: str, seconds: float):
+        self._times[phase] += seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.device is not None and self.device.type == "cuda":
+            start, end = torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True)
+            start.record()
+            yield
+            end.record()
+            self._events.append((name, start, end))
+        else:
+            start = time.perf_counter()
+            yield
+            self._times[name] += time.perf_counter() - start
+
+    def batches(self, iterable):
+        """Iterate ``iterable`` and count the time each ``next()`` blocks as input wait."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._times["data_wait"] += time.perf_counter() - start
+            yield batch
+
+    def step(self, samples: int):
+        self._samples += samples
+        self._steps += 1
+
+    def end_epoch(self) -> dict:
+        if self._events:
+            torch.cuda.synchronize(self.device)
+            for name, start, end in self._events:
+                self._times[name] += start.elapsed_time(end) / 1000
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+
+        record = {
+            "epoch": self._epoch,
+            "samples_per_sec": self._samples * self.world_size / elapsed,
+            "steps_per_sec": self._steps / elapsed,
+            "epoch_train_sec": elapsed,
+            **{f"{name}_sec": seconds for name, seconds in self._times.items()},
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        self.epochs.append(record)
+        return record
+
+    def summary(self) -> dict:
+        """Run-level figures: mean rates over the measured epochs, total phase times, peak RSS."""
+        if not self.epochs:
+            return {}
+        n = len(self.epochs)
+        summary = {
+            "samples_per_sec": sum(e["samples_per_sec"] for e in self.epochs) / n,
+            "steps_per_sec": sum(e["steps_per_sec"] for e in self.epochs) / n,
+            "peak_rss_mb": max(e["peak_rss_mb"] for e in self.epochs),
+        }
+        train_seconds = sum(e["epoch_train_sec"] for e in self.epochs)
+        phases = {k for e in self.epochs for k in e
+                  if k.endswith("_sec") and not k.endswith("_per_sec") and k != "epoch_train_sec"}
+        for key in sorted(phases):
+            summary[f"total_{key}"] = sum(e.get(key, 0.0) for e in self.epochs)
+        summary["data_wait_ratio"] = summary.get("total_data_wait_sec", 0.0) / max(train_seconds, 1e-9)
+        return summary
+
+    def train_info(self) -> dict:
+        """
+        Summary for ``model_train_info`` (model version tags / metadata), as plain numbers under
+        ``train_*`` keys: the ``latency``/``throughput`` tags describe serving, not training.
+        """
+        summary = self.summary()
+        if not summary:
+            return {}
+        return {
+            "train_samples_per_sec": round(summary["samples_per_sec"], 1),
+            "train_step_latency_ms": round(1000 / max(summary["steps_per_sec"], 1e-9), 1),
+            "train_steps_per_sec": round(summary["steps_per_sec"], 2),
+            "train_data_wait_ratio": round(summary["data_wait_ratio"], 3),
+            "train_peak_rss_mb": round(summary["peak_rss_mb"], 1),
+        }
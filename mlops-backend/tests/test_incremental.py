@@ -0,0 +1,107 @@
+# 📁 tests/test_incremental.py
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("prefect")
+
+from tasks.timeseries.data import dataset, incremental
+from tasks.timeseries.data.dataset import load_time_series_data, prepare_time_series_data
+from tasks.timeseries.data.incremental import build_lineage, extend_windowed_series, find_appended_rows
+from tasks.timeseries.data.windows import SPLIT_NAMES, save_windowed_series
+
+SEQUENCES = 4
+DATE_COL, TARGET_COL = "date", "value"
+
+
+@pytest.fixture(autouse=True)
+def run_logger(monkeypatch):
+    # The tasks log through Prefect's run logger, which only exists inside a flow run
+    for module in (dataset, incremental):
+        monkeypatch.setattr(module, "get_run_logger", lambda name=module.__name__: logging.getLogger(name))
+
+
+def frame(start, values):
+    return pd.DataFrame({
+        DATE_COL: pd.date_range(start, periods=len(values), freq="h").strftime("%Y-%m-%d %H:%M:%S"),
+        TARGET_COL: values,
+    })
+
+
+def build_version(file_path, version_folder):
+    """What the data flow stores for a version built from scratch; returns its windows and scaler."""
+    _, _, data_train = load_time_series_data(str(file_path), DATE_COL, TARGET_COL, projected=True)
+    lineage = build_lineage(str(file_path), data_train, DATE_COL, TARGET_COL)
+    windows, scaler = prepare_time_series_data(data_train.copy(), SEQUENCES, TARGET_COL)
+    save_windowed_series(str(version_folder), windows, dict(zip(SPLIT_NAMES, windows.split())),
+                         scaler=scaler, lineage=lineage, dtype="float32")
+    return windows, scaler
+
+
+def find(file_path, prev_folder):
+    return find_appended_rows(str(file_path), str(prev_folder), DATE_COL, TARGET_COL, sequences=SEQUENCES)
+
+
+def assert_same_as_rebuild(appended, file_path, tmp_path):
+    windows, scaler, lineage = extend_windowed_series(appended, str(file_path), DATE_COL, TARGET_COL)
+    rebuilt, rebuilt_scaler = build_version(file_path, tmp_path / "rebuilt")
+
+    np.testing.assert_allclose(windows.series, rebuilt.series, atol=1e-6)
+    np.testing.assert_allclose(scaler.data_min_, rebuilt_scaler.data_min_)
+    np.testing.assert_allclose(scaler.data_max_, rebuilt_scaler.data_max_)
+    expected = incremental.load_lineage(str(tmp_path / "rebuilt"))
+    assert lineage["target_stats"] == pytest.approx(expected.pop("target_stats"))
+    assert {key: value for key, value in lineage.items() if key != "target_stats"} == expected
+
+
+def test_byte_prefix_append_remaps_range(tmp_path):
+    file_path = tmp_path / "series.csv"
+    frame("2024-01-01", np.linspace(10.0, 20.0, 50)).to_csv(file_path, index=False)
+    build_version(file_path, tmp_path / "v1")
+
+    # Values outside the previous [10, 20] range force the affine remap of the stored series
+    frame("2024-01-03 02:00", [25.0, 5.0, 12.5]).to_csv(file_path, mode="a", header=False, index=False)
+    appended = find(file_path, tmp_path / "v1")
+
+    assert appended is not None and appended.method == "byte_prefix" and len(appended) == 3
+    assert_same_as_rebuild(appended, file_path, tmp_path)
+
+
+def test_row_digest_append(tmp_path):
+    file_path = tmp_path / "series.csv"
+    old = frame("2024-01-01", np.linspace(1.0, 2.0, 30))
+    old.to_csv(file_path, index=False)
+    build_version(file_path, tmp_path / "v1")
+
+    # A re-exported file (different column order) has no byte prefix in common with the old one
+    new = pd.concat([old, frame("2024-01-02 06:00", [2.5, 0.5])], ignore_index=True)
+    new[[TARGET_COL, DATE_COL]].to_csv(file_path, index=False)
+    appended = find(file_path, tmp_path / "v1")
+
+    assert appended is not None and appended.method == "row_digest" and len(appended) == 2
+    assert_same_as_rebuild(appended, file_path, tmp_path)
+
+
+def test_rows_older_than_watermark_rebuild(tmp_path):
+    file_path = tmp_path / "series.csv"
+    frame("2024-01-01", np.linspace(1.0, 2.0, 30)).to_csv(file_path, index=False)
+    build_version(file_path, tmp_path / "v1")
+
+    frame("2023-12-31", [3.0, 4.0]).to_csv(file_path, mode="a", header=False, index=False)
+    assert find(file_path, tmp_path / "v1") is None
+
+
+@pytest.mark.parametrize("old_values, new_values", [
+    ([1.0, 0.0, 2.0] * 10, [3.0, 4.0]),     # the stored series holds non-zero-mean fills
+    ([1.0, 2.0, 3.0] * 10, [np.nan, 4.0]),  # the new rows would be filled with the mean of all rows
+])
+def test_filled_targets_rebuild(tmp_path, old_values, new_values):
+    file_path = tmp_path / "series.csv"
+    frame("2024-01-01", old_values).to_csv(file_path, index=False)
+    build_version(file_path, tmp_path / "v1")
+
+    frame("2024-01-03", new_values).to_csv(file_path, mode="a", header=False, index=False)
+    assert find(file_path, tmp_path / "v1") is None
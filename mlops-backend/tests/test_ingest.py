@@ -0,0 +1,29 @@
+# 📁 tests/test_ingest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from tasks.timeseries.data import ingest
+
+
+def test_mixed_column_type_after_first_block(tmp_path, monkeypatch):
+    # The first CSV blocks infer ``value`` as int64; strings only appear in the last rows
+    monkeypatch.setattr(ingest, "CSV_BLOCK_SIZE", 1 << 14)
+    rows = 20_000
+    data = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=rows, freq="min").astype(str),
+        "value": np.arange(rows).astype(object),
+    })
+    data.loc[rows - 3:, "value"] = "sensor-fault"
+    file_path = tmp_path / "series.csv"
+    data.to_csv(file_path, index=False)
+
+    assert ingest.convert_to_columnar(str(file_path)) is not None
+    values = ingest.read_columns(str(file_path), columns=["value"])["value"]
+    assert len(values) == rows
+    assert values.iloc[0] == "0"
+    assert list(values.iloc[-3:]) == ["sensor-fault"] * 3
+    assert sum(len(chunk) for chunk in ingest.iter_chunks(str(file_path), chunk_rows=7_000)) == rows
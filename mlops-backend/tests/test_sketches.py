@@ -0,0 +1,37 @@
+# 📁 tests/test_sketches.py
+
+import numpy as np
+import pandas as pd
+
+from tasks.timeseries.data.sketches import TopKSketch
+
+
+def test_top_k_space_saving_bounds():
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.zipf(1.3, 50_000) % 5_000)
+    exact = values.value_counts()
+
+    # Chunks summarized separately and merged, as for a streamed file or an appended version
+    sketch = TopKSketch(capacity=64)
+    for start in range(0, len(values), 7_500):
+        part = TopKSketch(capacity=64)
+        part.update(values.iloc[start:start + 7_500])
+        sketch.merge(part)
+
+    assert sketch.truncated and len(sketch.counts) == 64
+    true = exact.reindex(sketch.counts.index, fill_value=0)
+    assert (sketch.counts >= true).all()
+    assert (sketch.counts - sketch.errors <= true).all()
+    assert exact.drop(sketch.counts.index).max() <= sketch.floor()
+    assert sketch.top()[0] == exact.index[0]
+
+
+def test_top_k_exact_below_capacity():
+    sketch = TopKSketch(capacity=8)
+    sketch.update(pd.Series(["a", "b", "a", "c"]))
+    sketch.update(pd.Series(["c", "a"]))
+
+    assert not sketch.truncated and sketch.floor() == 0
+    assert sketch.counts.to_dict() == {"a": 3, "b": 1, "c": 2}
+    assert (sketch.errors == 0).all()
+    assert sketch.top() == ("a", 3)